@@ -0,0 +1,48 @@
+"""
+JWT authentication for WebSocket connections.
+
+Browsers cannot set headers on a WebSocket handshake, so the access token is
+read from the ``token`` query parameter, falling back to an
+``Authorization: Bearer <token>`` header for other clients.  Tokens are
+validated exactly as the REST API validates them (SimpleJWT); the
+connection's ``scope["user"]`` is the token's user, or AnonymousUser.
+"""
+
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+
+def _raw_token(scope):
+    query = parse_qs(scope.get("query_string", b"").decode())
+    if query.get("token"):
+        return query["token"][0]
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] == "Bearer":
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def _user_for_token(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    async def __call__(self, scope, receive, send):
+        raw_token = _raw_token(scope)
+        scope = dict(
+            scope,
+            user=await _user_for_token(raw_token) if raw_token else AnonymousUser(),
+        )
+        return await super().__call__(scope, receive, send)
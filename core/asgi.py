@@ -18,6 +18,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 asgi_app = get_asgi_application()
 
 from accounts.urls import auth_router
+from notifications.urls import websocket_router as notifications_router
 
 app = ProtocolTypeRouter(
     {
@@ -26,6 +27,7 @@ app = ProtocolTypeRouter(
             URLRouter(
                 [
                     path("test/", auth_router),
+                    path("ws/", notifications_router),
                     path(
                         "dev",
                         AuthMiddlewareStack(
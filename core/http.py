@@ -0,0 +1,36 @@
+"""
+Process-wide pooled HTTP sessions for outbound APIs.
+
+Each named session keeps up to ``pool_maxsize`` connections open, so calls to
+the same service reuse them instead of paying a TCP + TLS handshake each.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def pooled_session(name: str, pool_maxsize: int) -> requests.Session:
+    """The pooled session registered as ``name``, created on first use."""
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[name] = session
+    return session
+
+
+def close_sessions(prefix: str = "") -> None:
+    """Close and forget the sessions whose name starts with ``prefix``."""
+    with _sessions_lock:
+        for name in [name for name in _sessions if name.startswith(prefix)]:
+            _sessions.pop(name).close()
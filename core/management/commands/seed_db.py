@@ -24,6 +24,7 @@ from business.models import (
     Role,
 )
 from inventories.models import Group, Item, Property
+from notifications.bulk import bulk_inventory_changes
 from orders.models import Order, OrderItem
 
 User = get_user_model()
@@ -56,7 +57,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Flushing existing data..."))
             self.flush_data()
 
-        with transaction.atomic():
+        with bulk_inventory_changes(), transaction.atomic():
             self.stdout.write("Starting database seeding...")
 
             # Create sample data
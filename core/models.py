@@ -1,6 +1,7 @@
 from uuid import uuid4
 
 from django.db import models
+from django.utils import timezone
 
 
 class BaseModel(models.Model):
@@ -17,3 +18,37 @@ class BaseModel(models.Model):
         super().__init_subclass__(**kwargs)
         if not hasattr(cls._meta, "db_table") or not cls._meta.db_table:
             cls._meta.db_table = cls.__name__.lower()
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event written in the same transaction as the change that caused it.
+
+    Signal receivers append one row per side effect instead of doing the work
+    inline; ``core.tasks.dispatch_outbox_task`` drains pending rows in id order
+    and hands each to the Celery task registered for its topic.  Rows survive
+    broker outages and are retried with backoff until dispatched.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        db_table = "outbox_event"
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=models.Q(dispatched_at__isnull=True),
+                name="outbox_event_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
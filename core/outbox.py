@@ -0,0 +1,113 @@
+"""
+Transactional outbox.
+
+``publish`` writes a compact ``OutboxEvent`` row inside the caller's
+transaction, so slow side effects (notification fan-out, stock checks) no
+longer run while the caller holds row locks, and an event is recorded if and
+only if the change that caused it commits.
+
+Each topic is handled by exactly one Celery task registered with
+``register_handler``.  ``dispatch_pending`` drains pending rows in batches and
+enqueues the handler with the row's payload as keyword arguments; rows whose
+enqueue fails (e.g. broker down) stay pending and are retried with backoff.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_BATCH_SIZE = 200
+MAX_BACKOFF_SECONDS = 300
+
+_handlers = {}
+
+
+def register_handler(topic, task):
+    """Route events of ``topic`` to the Celery ``task``."""
+    _handlers[topic] = task
+    return task
+
+
+def publish(topic, payload):
+    """
+    Record an event for ``topic`` in the current transaction.
+
+    ``payload`` must be JSON serialisable; it becomes the handler task's
+    keyword arguments.  A dispatch is kicked once the transaction commits;
+    the periodic dispatcher picks up anything the kick misses.
+    """
+    event = OutboxEvent.objects.create(topic=topic, payload=payload)
+    transaction.on_commit(_kick_dispatcher, robust=True)
+    return event
+
+
+def _kick_dispatcher():
+    from core.tasks import dispatch_outbox_task
+
+    dispatch_outbox_task.delay()
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(2**attempts, MAX_BACKOFF_SECONDS))
+
+
+def dispatch_pending(batch_size=DISPATCH_BATCH_SIZE):
+    """
+    Enqueue one batch of pending events.  Returns the number dispatched.
+
+    Rows are claimed with ``SKIP LOCKED`` so concurrent dispatchers never
+    enqueue the same event twice.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(dispatched_at__isnull=True, available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+
+        dispatched, failed = [], []
+        for event in events:
+            task = _handlers.get(event.topic)
+            if task is None:
+                event.last_error = f"No handler registered for topic {event.topic!r}"
+                failed.append(event)
+                continue
+            try:
+                task.apply_async(kwargs=event.payload)
+            except Exception as exc:
+                logger.warning(
+                    "outbox: could not enqueue event %s (%s): %s",
+                    event.pk,
+                    event.topic,
+                    exc,
+                )
+                event.last_error = str(exc)
+                failed.append(event)
+                continue
+            dispatched.append(event.pk)
+
+        if dispatched:
+            OutboxEvent.objects.filter(pk__in=dispatched).update(dispatched_at=now)
+        if failed:
+            for event in failed:
+                event.attempts += 1
+                event.available_at = now + _backoff(event.attempts)
+            OutboxEvent.objects.bulk_update(
+                failed, ["attempts", "available_at", "last_error"]
+            )
+
+    return len(dispatched)
+
+
+def purge_dispatched(older_than=timedelta(days=7)):
+    """Delete events dispatched before ``older_than`` ago."""
+    cutoff = timezone.now() - older_than
+    deleted, _ = OutboxEvent.objects.filter(dispatched_at__lt=cutoff).delete()
+    return deleted
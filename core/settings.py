@@ -1,4 +1,5 @@
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 from urllib.parse import parse_qsl, urlparse
@@ -291,6 +292,29 @@ CACHES = {
     }
 }
 
+# Channel layer for real-time notifications (notifications.realtime).  Redis
+# in production; the in-memory layer (one process, no Redis) under DEBUG and
+# for `manage.py test`.  CHANNEL_LAYER_BACKEND overrides either.
+TESTING = sys.argv[1:2] == ["test"]
+CHANNEL_LAYER_BACKEND = os.getenv(
+    "CHANNEL_LAYER_BACKEND",
+    (
+        "channels.layers.InMemoryChannelLayer"
+        if DEBUG or TESTING
+        else "channels_redis.core.RedisChannelLayer"
+    ),
+)
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": CHANNEL_LAYER_BACKEND,
+        "CONFIG": (
+            {"hosts": [os.getenv("CHANNELS_REDIS_URL", "redis://localhost:6379/2")]}
+            if CHANNEL_LAYER_BACKEND.startswith("channels_redis.")
+            else {}
+        ),
+    }
+}
+
 EMAIL_BACKEND = os.getenv(
     "EMAIL_BACKEND",
     (
@@ -342,6 +366,38 @@ CELERY_TASK_QUEUES = CeleryQueue.queues()
 CELERY_TASK_DEFAULT_QUEUE = "default"
 CELERY_TASK_CREATE_MISSING_QUEUES = True
 
+# Periodic tasks run by `celery -A core.celery beat`. The outbox dispatcher is
+# also kicked after every commit that publishes an event; the schedule only
+# sweeps up events whose enqueue failed (e.g. while the broker was down).
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-outbox-events": {
+        "task": "core.tasks.dispatch_outbox_task",
+        "schedule": 15.0,
+    },
+    "purge-outbox-events": {
+        "task": "core.tasks.purge_outbox_task",
+        "schedule": 60 * 60 * 24,
+    },
+    # Freezes each branch's totals once a month is over, and re-freezes
+    # months reopened by backdated transactions (see finances.closing).
+    "close-financial-periods": {
+        "task": "finances.tasks.close_financial_periods_task",
+        "schedule": 60 * 60,
+    },
+    # Pushes queued for coalescing whose scheduled flush never ran (see
+    # notifications.push).
+    "flush-push-notifications": {
+        "task": "notifications.tasks.flush_push_notifications_task",
+        "schedule": 60,
+    },
+    # Low-stock digests for stock changed outside checkout (see
+    # notifications.stock_alerts); checkouts are checked as they happen.
+    "sweep-low-stock": {
+        "task": "notifications.tasks.sweep_low_stock_task",
+        "schedule": 60 * 60,
+    },
+}
+
 
 SIMPLE_JWT = {
     # Defaults match common DRF SimpleJWT recommendations. Override per-environment
@@ -439,6 +495,9 @@ TELEBIRR_BASE_URL = os.getenv("TELEBIRR_BASE_URL")
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 
+# Bot API origin; overridable to point delivery at a local stub (benchmarks).
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+
 # Public base URL of the Mini App / web frontend, used to build the
 # "connect your Telegram" magic link emailed to users (no trailing slash).
 FRONTEND_URL = os.getenv("FRONTEND_URL", "")
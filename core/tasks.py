@@ -0,0 +1,35 @@
+import logging
+
+from celery import shared_task
+
+from core.celery.queues import CeleryQueue
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(queue=CeleryQueue.Definitions.REAL_TIME_NOTIFICATIONS)
+def dispatch_outbox_task(max_batches=10):
+    """
+    Drain pending outbox events to their handler tasks.
+
+    Kicked after every committing transaction that published an event and run
+    periodically by beat to pick up events left behind by broker outages.
+    """
+    from core.outbox import DISPATCH_BATCH_SIZE, dispatch_pending
+
+    total = 0
+    for _ in range(max_batches):
+        count = dispatch_pending()
+        total += count
+        if count < DISPATCH_BATCH_SIZE:
+            break
+    if total:
+        logger.debug("dispatch_outbox_task: dispatched %d event(s)", total)
+    return total
+
+
+@shared_task(queue=CeleryQueue.Definitions.SYSTEM_MAINTENANCE)
+def purge_outbox_task():
+    from core.outbox import purge_dispatched
+
+    return purge_dispatched()
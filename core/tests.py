@@ -0,0 +1,247 @@
+import re
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from business.models import Branch, Business
+from core import outbox
+from core.http import close_sessions, pooled_session
+from core.models import OutboxEvent
+from finances.models import Transaction
+from orders.models import Order
+
+User = get_user_model()
+
+
+class PooledSessionTest(SimpleTestCase):
+    def tearDown(self):
+        close_sessions("test:")
+
+    def test_named_session_is_shared_and_pooled(self):
+        session = pooled_session("test:api", 4)
+
+        self.assertIs(pooled_session("test:api", 4), session)
+        self.assertIsNot(pooled_session("test:other", 4), session)
+        self.assertEqual(session.get_adapter("https://example.com")._pool_maxsize, 4)
+
+    def test_close_sessions_drops_only_matching_names(self):
+        kept = pooled_session("kept", 1)
+        self.addCleanup(close_sessions, "kept")
+        dropped = pooled_session("test:api", 1)
+
+        close_sessions("test:")
+
+        self.assertIsNot(pooled_session("test:api", 1), dropped)
+        self.assertIs(pooled_session("kept", 1), kept)
+
+
+class OutboxDispatchTest(TestCase):
+    def setUp(self):
+        self.task = mock.Mock()
+        patcher = mock.patch.dict(outbox._handlers, {"test.topic": self.task})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_publish_records_event_without_running_handler(self):
+        outbox.publish("test.topic", {"value": 1})
+
+        self.assertEqual(OutboxEvent.objects.filter(topic="test.topic").count(), 1)
+        self.task.apply_async.assert_not_called()
+
+    def test_dispatch_enqueues_payload_and_marks_dispatched(self):
+        first = outbox.publish("test.topic", {"value": 1})
+        second = outbox.publish("test.topic", {"value": 2})
+
+        self.assertEqual(outbox.dispatch_pending(), 2)
+
+        self.assertEqual(
+            [c.kwargs["kwargs"] for c in self.task.apply_async.call_args_list],
+            [{"value": 1}, {"value": 2}],
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertIsNotNone(first.dispatched_at)
+        self.assertIsNotNone(second.dispatched_at)
+        self.assertEqual(outbox.dispatch_pending(), 0)
+
+    def test_failed_enqueue_stays_pending_with_backoff(self):
+        self.task.apply_async.side_effect = ConnectionError("broker down")
+        event = outbox.publish("test.topic", {"value": 1})
+
+        self.assertEqual(outbox.dispatch_pending(), 0)
+
+        event.refresh_from_db()
+        self.assertIsNone(event.dispatched_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("broker down", event.last_error)
+        self.assertGreater(event.available_at, timezone.now())
+
+
+# Tables the report endpoints aggregate over, and the indexes built for
+# their predicates.  The sales rollup is read through its own unique cell
+# constraint, so for it only the absence of a full scan is asserted.
+HOT_TABLES = ("finances_transaction", "orders_order", "order_daily_sales_rollup")
+REPORT_INDEXES = {
+    "transaction_branch_created_idx",
+    "transaction_branch_type_idx",
+    "transaction_open_credit_idx",
+    "order_branch_created_idx",
+    "order_branch_status_idx",
+    "order_business_status_idx",
+}
+INDEXED_TABLES = ("finances_transaction", "orders_order")
+
+
+def query_plan(sql):
+    """The database's plan for ``sql`` as text, one node per line."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return "\n".join(row[-1] for row in cursor.fetchall())
+        cursor.execute(f"EXPLAIN {sql}")
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def full_scans(sql, plan):
+    """Hot tables ``plan`` reads in full instead of through an index."""
+    if connection.vendor == "sqlite":
+        # SQLite names subquery tables by their alias, e.g. ``SCAN U0``.
+        aliases = dict(
+            (alias, table) for table, alias in re.findall(r'"(\w+)" ([A-Z]\d+)\b', sql)
+        )
+        scanned = re.findall(r"\bSCAN (\w+)", plan)
+    else:
+        aliases = {}
+        scanned = re.findall(r"Seq Scan on (\w+)", plan)
+    return {aliases.get(name, name) for name in scanned} & set(HOT_TABLES)
+
+
+def used_indexes(plan):
+    if connection.vendor == "sqlite":
+        return set(re.findall(r"USING (?:COVERING )?INDEX (\w+)", plan))
+    return set(re.findall(r"(?:Index Scan|Index Only Scan) using (\w+)", plan)) | set(
+        re.findall(r"Bitmap Index Scan on (\w+)", plan)
+    )
+
+
+@skipUnless(
+    connection.vendor in ("sqlite", "postgresql"), "EXPLAIN output is vendor-specific"
+)
+class ReportQueryPlanTest(APITestCase):
+    """
+    Seed several branches with a year of orders and transactions, then
+    EXPLAIN every query the report and dashboard endpoints run against the
+    order, transaction and sales rollup tables: each must be served by one of
+    the report indexes and none may scan a hot table in full.
+    """
+
+    BRANCHES = 4
+    DAYS = 360
+    ROWS_PER_BRANCH = 1500
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="plans@example.com", password="password123"
+        )
+        cls.business = Business.objects.create(name="Plan Business", owner=cls.user)
+        cls.branch = Branch.objects.get(business=cls.business)
+        branches = [cls.branch] + [
+            Branch.objects.create(business=cls.business, name=f"Branch {n}")
+            for n in range(1, cls.BRANCHES)
+        ]
+
+        now = timezone.now()
+        statuses = [choice for choice, _ in Order.StatusChoices.choices]
+        types = [choice for choice, _ in Transaction.TransactionType.choices]
+        orders, transactions = [], []
+        for branch in branches:
+            for n in range(cls.ROWS_PER_BRANCH):
+                created_at = now - timedelta(days=n % cls.DAYS, minutes=n)
+                orders.append(
+                    Order(
+                        business=cls.business,
+                        branch=branch,
+                        status=statuses[n % len(statuses)],
+                        total_payable=10 + n % 7,
+                        created_at=created_at,
+                    )
+                )
+                transactions.append(
+                    Transaction(
+                        business=cls.business,
+                        branch=branch,
+                        type=types[n % len(types)],
+                        total_paid_amount=5 + n % 11,
+                        created_at=created_at,
+                    )
+                )
+        Order.objects.bulk_create(orders, batch_size=1000)
+        Transaction.objects.bulk_create(transactions, batch_size=1000)
+        # Give the planner real statistics, as production has.
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def assertQueriesUseReportIndexes(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        hot_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+            and any(f'"{table}"' in query["sql"] for table in HOT_TABLES)
+        ]
+        self.assertTrue(hot_queries)
+        for sql in hot_queries:
+            plan = query_plan(sql)
+            with self.subTest(sql=sql, plan=plan):
+                self.assertEqual(full_scans(sql, plan), set())
+                if any(f'"{table}"' in sql for table in INDEXED_TABLES):
+                    self.assertTrue(used_indexes(plan) & REPORT_INDEXES)
+
+    def test_finance_summary(self):
+        self.assertQueriesUseReportIndexes(
+            reverse("finance-summary"), {"branch_id": self.branch.id}
+        )
+
+    def test_finance_reports(self):
+        self.assertQueriesUseReportIndexes(
+            reverse("finance-reports"), {"branch_id": self.branch.id}
+        )
+
+    def test_finance_report(self):
+        today = timezone.localdate()
+        self.assertQueriesUseReportIndexes(
+            reverse("finance-report"),
+            {
+                "branch_id": self.branch.id,
+                "start_date": (today - timedelta(days=30)).isoformat(),
+                "end_date": (today + timedelta(days=1)).isoformat(),
+            },
+        )
+
+    def test_home_stats(self):
+        for params in (
+            {"branch_id": self.branch.id},
+            {"business_id": self.business.id},
+        ):
+            self.assertQueriesUseReportIndexes(reverse("home-stats-stats"), params)
+
+    def test_best_sellers(self):
+        self.assertQueriesUseReportIndexes(
+            reverse("order-best-sellers"),
+            {"branch_id": self.branch.id, "filter": "this_year"},
+        )
@@ -0,0 +1,267 @@
+"""
+Monthly close of financial periods.
+
+Once a (UTC calendar) month is over its figures practically never change, so
+``close_period`` freezes a branch's per-type, per-payment-method and
+per-category totals for it into a ``FinancialPeriodSnapshot``.  Report
+endpoints read closed months from fresh snapshots and compute only the open
+month (and any month without one) live.
+
+A transaction written into a closed month — backdated entries, late syncs,
+deletions — calls ``invalidate_period``, which marks the month's snapshot
+stale; readers ignore it until ``close_due_periods`` (run by the beat task)
+recomputes it.  Closing is optimistic: a close only lands if no
+invalidation happened while it was computing, otherwise the snapshot stays
+stale for the next run.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from finances.models import FinancialPeriodSnapshot, Transaction
+from orders.models import Order
+
+
+def month_of(when):
+    """First day of the UTC month ``when`` falls in."""
+    when = when.astimezone(dt_timezone.utc)
+    return date(when.year, when.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """``(start, end)`` UTC datetimes of ``month``; ``end`` is exclusive."""
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    following = add_months(month, 1)
+    end = datetime(following.year, following.month, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def current_month():
+    return month_of(timezone.now())
+
+
+def is_closed(month):
+    return month < current_month()
+
+
+def _amounts(values):
+    return {key: str(value or Decimal("0")) for key, value in values.items()}
+
+
+def decimal_amounts(values):
+    """Snapshot ``{key: amount string}`` as ``{key: Decimal}``."""
+    return {key: Decimal(value) for key, value in values.items()}
+
+
+def compute_period_totals(branch, month):
+    """Live totals of ``branch`` for ``month``, as snapshot field values."""
+    from finances.views import _get_income_by_category
+
+    start, end = month_bounds(month)
+    rows = (
+        Transaction.objects.filter(
+            business_id=branch.business_id,
+            branch=branch,
+            created_at__gte=start,
+            created_at__lt=end,
+        )
+        .values("payment_method_id", "type")
+        .annotate(total=Sum("total_paid_amount"), count=Count("pk"))
+        .order_by()
+    )
+
+    totals_by_type = defaultdict(Decimal)
+    totals_by_payment_method = defaultdict(dict)
+    transaction_count = 0
+    for row in rows:
+        amount = row["total"] or Decimal("0")
+        totals_by_type[row["type"]] += amount
+        payment_method = str(row["payment_method_id"] or "")
+        totals_by_payment_method[payment_method][row["type"]] = str(amount)
+        transaction_count += row["count"]
+
+    type_labels = dict(Transaction.TransactionType.choices)
+    expense_by_category = {
+        type_labels[type]: total
+        for type, total in totals_by_type.items()
+        if type in Transaction.EXPENSE_TYPES
+    }
+    income_by_category = _get_income_by_category(
+        Q(
+            order__business_id=branch.business_id,
+            order__branch=branch,
+            order__status__in=[
+                Order.StatusChoices.COMPLETED,
+                Order.StatusChoices.PAID,
+                Order.StatusChoices.PARTIALLY_PAID,
+                Order.StatusChoices.DELIVERED,
+            ],
+            order__created_at__gte=start,
+            order__created_at__lt=end,
+        )
+    )
+
+    return {
+        "totals_by_type": _amounts(totals_by_type),
+        "totals_by_payment_method": dict(totals_by_payment_method),
+        "income_by_category": _amounts(income_by_category),
+        "expense_by_category": _amounts(expense_by_category),
+        "transaction_count": transaction_count,
+    }
+
+
+def close_period(branch, month):
+    """
+    Freeze ``branch``'s totals for the closed ``month``.  Returns False when
+    the month is still open or was invalidated while being computed.
+    """
+    if not is_closed(month):
+        return False
+    snapshot, _ = FinancialPeriodSnapshot.objects.get_or_create(
+        branch=branch, month=month, defaults={"business_id": branch.business_id}
+    )
+    version = snapshot.version
+    totals = compute_period_totals(branch, month)
+    return bool(
+        FinancialPeriodSnapshot.objects.filter(pk=snapshot.pk, version=version).update(
+            is_stale=False, closed_at=timezone.now(), **totals
+        )
+    )
+
+
+def close_due_periods():
+    """
+    Close last month for every branch that has no snapshot for it yet and
+    re-close every stale snapshot.  Returns the number of periods closed.
+    """
+    from business.models import Branch
+
+    last_month = add_months(current_month(), -1)
+    due = [
+        (branch, last_month)
+        for branch in Branch.objects.exclude(
+            pk__in=FinancialPeriodSnapshot.objects.filter(month=last_month).values(
+                "branch_id"
+            )
+        )
+    ]
+    due += [
+        (snapshot.branch, snapshot.month)
+        for snapshot in FinancialPeriodSnapshot.objects.filter(
+            is_stale=True
+        ).select_related("branch")
+    ]
+    return sum(close_period(branch, month) for branch, month in due)
+
+
+def invalidate_period(business_id, branch_id, when):
+    """
+    Mark the snapshot of the month ``when`` falls in stale if that month is
+    closed.  Writes to the open month cost no query.
+
+    A marker row is created when the month has no snapshot yet, so a close
+    computing concurrently sees the bumped version (or blocks on the row)
+    and does not freeze totals that miss this write.
+    """
+    if not (branch_id and when) or not is_closed(month_of(when)):
+        return
+    month = month_of(when)
+    snapshots = FinancialPeriodSnapshot.objects.filter(branch_id=branch_id, month=month)
+    if snapshots.update(is_stale=True, version=F("version") + 1):
+        return
+    try:
+        with transaction.atomic():
+            FinancialPeriodSnapshot.objects.create(
+                business_id=business_id, branch_id=branch_id, month=month, version=1
+            )
+    except IntegrityError:
+        snapshots.update(is_stale=True, version=F("version") + 1)
+
+
+def fresh_snapshots(branch, months):
+    """``{month: snapshot}`` of the fresh snapshots of ``branch`` among ``months``."""
+    months = [month for month in months if is_closed(month)]
+    if not months:
+        return {}
+    return {
+        snapshot.month: snapshot
+        for snapshot in FinancialPeriodSnapshot.objects.filter(
+            branch=branch, month__in=months, is_stale=False
+        )
+    }
+
+
+def snapshot_type_totals(snapshot, payment_method_ids=None):
+    """``{type: Decimal}`` of a snapshot, optionally for some payment methods."""
+    if payment_method_ids is None:
+        return decimal_amounts(snapshot.totals_by_type)
+    totals = defaultdict(Decimal)
+    for payment_method in payment_method_ids:
+        for type, amount in snapshot.totals_by_payment_method.get(
+            str(uuid.UUID(str(payment_method))), {}
+        ).items():
+            totals[type] += Decimal(amount)
+    return dict(totals)
+
+
+def split_window(branch, start, end=None):
+    """
+    Cover ``[start, end)`` (open-ended when ``end`` is None) with the fresh
+    snapshots of the whole closed months inside it.  Returns
+    ``(snapshots, ranges)``: the snapshots used and the ``(start, end)``
+    ranges left to compute live, in order.
+    """
+    first = month_of(start)
+    if month_bounds(first)[0] < start:
+        first = add_months(first, 1)
+    months = []
+    month = first
+    while is_closed(month) and (end is None or month_bounds(month)[1] <= end):
+        months.append(month)
+        month = add_months(month, 1)
+
+    snapshots = fresh_snapshots(branch, months)
+    ranges = []
+    cursor = start
+    for month in sorted(snapshots):
+        month_start, month_end = month_bounds(month)
+        if cursor < month_start:
+            ranges.append((cursor, month_start))
+        cursor = month_end
+    if end is None or cursor < end:
+        ranges.append((cursor, end))
+    return [snapshots[month] for month in sorted(snapshots)], ranges
+
+
+def snapshot_window(branch, start, end=None, payment_method_ids=None):
+    """
+    Split the transaction totals of ``[start, end)`` into ``(totals,
+    live_filter)``: ``{type: Decimal}`` summed from the snapshots of the
+    closed months inside the window, and a ``created_at`` filter over the
+    rest for the caller to aggregate live (None when snapshots cover it all).
+    """
+    snapshots, ranges = split_window(branch, start, end)
+    totals = defaultdict(Decimal)
+    for snapshot in snapshots:
+        for type, amount in snapshot_type_totals(snapshot, payment_method_ids).items():
+            totals[type] += amount
+
+    live_filter = None
+    for range_start, range_end in ranges:
+        condition = Q(created_at__gte=range_start)
+        if range_end is not None:
+            condition &= Q(created_at__lt=range_end)
+        live_filter = condition if live_filter is None else live_filter | condition
+    return dict(totals), live_filter
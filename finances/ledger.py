@@ -0,0 +1,206 @@
+"""
+Per-payment-method balance ledger.
+
+``PaymentMethodBalance`` holds each account's running balance and
+``DailyPaymentMethodBalance`` its closing balance per local day, so reading a
+balance — current or as of a date — is a single indexed lookup instead of a
+sum over every transaction the account ever had.
+
+Both are adjusted in the same database transaction as the Transaction write
+that changes them (see ``finances.signals``).  The account's balance row is
+updated first; its row lock serialises concurrent writers of one account, so
+the daily rows are always adjusted against a consistent running balance.
+``rebuild_balances`` re-derives everything from the transactions and backs
+the ``rebuild_balances`` management command.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from finances.models import (
+    DailyPaymentMethodBalance,
+    PaymentMethodBalance,
+    Transaction,
+)
+
+CREDIT_TYPES = [*Transaction.INCOME_TYPES, Transaction.TransactionType.REFUND]
+# EXPENSE_TYPES already includes DEBT.
+DEBIT_TYPES = Transaction.EXPENSE_TYPES
+
+
+def balance_effect(type, amount):
+    """Signed amount a transaction of ``type`` adds to its account balance."""
+    if amount is None:
+        return Decimal("0")
+    if type in CREDIT_TYPES:
+        return amount
+    if type in DEBIT_TYPES:
+        return -amount
+    return Decimal("0")
+
+
+def apply_balance_change(payment_method_id, day, delta):
+    """Add ``delta`` to an account's balance and its closings from ``day`` on."""
+    if not payment_method_id or not delta:
+        return
+
+    updated = PaymentMethodBalance.objects.filter(pk=payment_method_id).update(
+        balance=F("balance") + delta, updated_at=timezone.now()
+    )
+    if not updated:
+        # No ledger row: the account is being deleted (cascades reverse its
+        # transactions) or predates the ledger; rebuild_balances repairs it.
+        return
+
+    daily = DailyPaymentMethodBalance.objects.filter(
+        payment_method_id=payment_method_id
+    )
+    daily.filter(date__gte=day).update(closing_balance=F("closing_balance") + delta)
+    if daily.filter(date=day).update(net_change=F("net_change") + delta):
+        return
+
+    previous = (
+        daily.filter(date__lt=day)
+        .order_by("-date")
+        .values_list("closing_balance", flat=True)
+        .first()
+    ) or Decimal("0")
+    DailyPaymentMethodBalance.objects.create(
+        payment_method_id=payment_method_id,
+        date=day,
+        net_change=delta,
+        closing_balance=previous + delta,
+    )
+
+
+def apply_snapshot(snapshot, sign=1):
+    """Apply (``sign=1``) or reverse (``sign=-1``) a ``Transaction.ledger_snapshot``."""
+    payment_method_id, created_at, type, amount = snapshot
+    if payment_method_id and created_at:
+        apply_balance_change(
+            payment_method_id,
+            timezone.localdate(created_at),
+            sign * balance_effect(type, amount),
+        )
+
+
+def record_transactions(transactions):
+    """Ledger counterpart of ``bulk_create``: apply many new transactions."""
+    deltas = defaultdict(Decimal)
+    for tx in transactions:
+        if tx.payment_method_id:
+            day = timezone.localdate(tx.created_at)
+            deltas[(tx.payment_method_id, day)] += balance_effect(
+                tx.type, tx.total_paid_amount
+            )
+    # A stable order keeps concurrent writers locking accounts alike.
+    for (payment_method_id, day), delta in sorted(
+        deltas.items(), key=lambda entry: (str(entry[0][0]), entry[0][1])
+    ):
+        apply_balance_change(payment_method_id, day, delta)
+
+
+def derived_balances(payment_method_ids):
+    """
+    ``{payment_method_id: {date: net_change}}`` recomputed from transactions.
+    """
+    effect = Case(
+        When(type__in=CREDIT_TYPES, then=F("total_paid_amount")),
+        When(type__in=DEBIT_TYPES, then=-F("total_paid_amount")),
+        default=Value(Decimal("0")),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    rows = (
+        Transaction.objects.filter(payment_method_id__in=payment_method_ids)
+        .annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .values("payment_method_id", "day")
+        .annotate(net_change=Sum(effect))
+        .order_by("payment_method_id", "day")
+    )
+    derived = defaultdict(dict)
+    for row in rows:
+        derived[row["payment_method_id"]][row["day"]] = row["net_change"]
+    return derived
+
+
+def drifted_accounts(payment_method_ids):
+    """
+    Ids among ``payment_method_ids`` whose stored balance or daily closing
+    balances differ from what their transactions add up to.
+    """
+    derived = derived_balances(payment_method_ids)
+    stored_balance = dict(
+        PaymentMethodBalance.objects.filter(
+            payment_method_id__in=payment_method_ids
+        ).values_list("payment_method_id", "balance")
+    )
+    stored_daily = defaultdict(dict)
+    for payment_method_id, day, net_change, closing in (
+        DailyPaymentMethodBalance.objects.filter(
+            payment_method_id__in=payment_method_ids
+        )
+        .exclude(net_change=0)
+        .values_list("payment_method_id", "date", "net_change", "closing_balance")
+    ):
+        stored_daily[payment_method_id][day] = (net_change, closing)
+
+    drifted = []
+    for payment_method_id in payment_method_ids:
+        expected_daily = {}
+        closing = Decimal("0")
+        for day, net_change in derived.get(payment_method_id, {}).items():
+            closing += net_change
+            if net_change:
+                expected_daily[day] = (net_change, closing)
+        if (
+            stored_balance.get(payment_method_id) != closing
+            or stored_daily.get(payment_method_id, {}) != expected_daily
+        ):
+            drifted.append(payment_method_id)
+    return drifted
+
+
+def rebuild_balances(payment_method_ids):
+    """Replace the ledger rows of ``payment_method_ids`` with derived ones."""
+    payment_method_ids = list(payment_method_ids)
+    with transaction.atomic():
+        # Lock the accounts (creating missing ledger rows) so no transaction
+        # write interleaves with the rebuild.
+        PaymentMethodBalance.objects.bulk_create(
+            [PaymentMethodBalance(payment_method_id=pk) for pk in payment_method_ids],
+            ignore_conflicts=True,
+        )
+        list(
+            PaymentMethodBalance.objects.select_for_update()
+            .filter(payment_method_id__in=payment_method_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        derived = derived_balances(payment_method_ids)
+        DailyPaymentMethodBalance.objects.filter(
+            payment_method_id__in=payment_method_ids
+        ).delete()
+
+        daily_rows = []
+        for payment_method_id in payment_method_ids:
+            closing = Decimal("0")
+            for day, net_change in derived.get(payment_method_id, {}).items():
+                closing += net_change
+                daily_rows.append(
+                    DailyPaymentMethodBalance(
+                        payment_method_id=payment_method_id,
+                        date=day,
+                        net_change=net_change,
+                        closing_balance=closing,
+                    )
+                )
+            PaymentMethodBalance.objects.filter(pk=payment_method_id).update(
+                balance=closing, updated_at=timezone.now()
+            )
+        DailyPaymentMethodBalance.objects.bulk_create(daily_rows, batch_size=1000)
@@ -0,0 +1,153 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finances.payments.cbe import CBEVerifier
+from finances.payments.samples import build_corpus
+from finances.payments.telebirr import TelebirrVerifier
+
+PROVIDER_BY_SUFFIX = {".pdf": "cbe", ".html": "telebirr"}
+
+
+def _normalise(data):
+    """Parsed ``TransactionData`` in the shape of a sample's expected fields."""
+    return {
+        "transaction_id": data.transaction_id,
+        "amount": str(data.amount) if data.amount is not None else None,
+        "sender_name": data.sender_name,
+        "receiver_name": data.receiver_name,
+        "receiver_account": data.receiver_account,
+        "timestamp": data.timestamp.isoformat() if data.timestamp else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the CBE PDF and Telebirr HTML receipt parsers offline: time "
+        "per receipt for text extraction and field parsing, and how many "
+        "expected fields each parse got right. Runs over --samples, a "
+        "directory of recorded receipts (<name>.pdf for CBE, <name>.html for "
+        "Telebirr, each with a <name>.json of expected fields), or over "
+        "built-in synthetic receipts when it is not given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples",
+            help="Directory of recorded receipts (default: synthetic receipts).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Parses per receipt to average the timings over (default: 20).",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Exit with an error if any field was parsed wrong.",
+        )
+
+    def handle(self, *args, **options):
+        corpus = (
+            self._load(Path(options["samples"]))
+            if options["samples"]
+            else build_corpus()
+        )
+        if not corpus:
+            raise CommandError("No receipts to benchmark.")
+        repeat = max(1, options["repeat"])
+
+        totals = {}
+        mismatches = 0
+        for provider, name, content, expected in corpus:
+            # Telebirr receipts are read back under the id that was looked up.
+            transaction_id = expected.get("transaction_id", name)
+            extract_ms, parse_ms, data = self._measure(
+                provider, transaction_id, content, repeat
+            )
+            parsed = _normalise(data)
+            wrong = {
+                field: (value, parsed.get(field))
+                for field, value in expected.items()
+                if parsed.get(field) != value
+            }
+            mismatches += len(wrong)
+
+            stats = totals.setdefault(provider, [0, 0.0, 0.0, 0, 0])
+            stats[0] += 1
+            stats[1] += extract_ms
+            stats[2] += parse_ms
+            stats[3] += len(expected) - len(wrong)
+            stats[4] += len(expected)
+
+            self.stdout.write(
+                f"{name}: extract {extract_ms:.3f} ms, parse {parse_ms:.3f} ms, "
+                f"{len(expected) - len(wrong)}/{len(expected)} fields"
+            )
+            for field, (want, got) in wrong.items():
+                self.stdout.write(f"  {field}: expected {want!r}, got {got!r}")
+
+        for provider, (count, extract_ms, parse_ms, right, fields) in totals.items():
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{provider}: {count} receipt(s), "
+                    f"extract {extract_ms / count:.3f} ms, "
+                    f"parse {parse_ms / count:.3f} ms per receipt, "
+                    f"accuracy {right}/{fields} fields"
+                )
+            )
+        if mismatches and options["strict"]:
+            raise CommandError(f"{mismatches} field(s) parsed wrong.")
+
+    def _load(self, directory):
+        if not directory.is_dir():
+            raise CommandError(f"{directory} is not a directory.")
+        corpus = []
+        for path in sorted(directory.iterdir()):
+            provider = PROVIDER_BY_SUFFIX.get(path.suffix.lower())
+            expected_path = path.with_suffix(".json")
+            if provider is None or not expected_path.exists():
+                continue
+            corpus.append(
+                (
+                    provider,
+                    path.stem,
+                    path.read_bytes(),
+                    json.loads(expected_path.read_text()),
+                )
+            )
+        return corpus
+
+    def _measure(self, provider, transaction_id, content, repeat):
+        """Mean ``(extract_ms, parse_ms)`` over ``repeat`` runs, and the result."""
+        if provider == "cbe":
+            verifier = CBEVerifier()
+
+            def extract():
+                return CBEVerifier.extract_text(content)
+
+            def parse(text):
+                return verifier.extract_fields(transaction_id, text)
+
+        else:
+            verifier = TelebirrVerifier()
+
+            def extract():
+                return content.decode()
+
+            def parse(html):
+                return verifier.extract_from_html(transaction_id, html)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            text = extract()
+        extract_ms = (time.perf_counter() - started) * 1000 / repeat
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            data = parse(text)
+        parse_ms = (time.perf_counter() - started) * 1000 / repeat
+        return extract_ms, parse_ms, data
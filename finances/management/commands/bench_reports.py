@@ -0,0 +1,144 @@
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from business.models import Branch, Business
+from finances.models import Transaction
+from finances.views import MAX_HISTORY_MONTHS, reports
+from inventories.models import Item, ItemVariant, SuppliedItem, Supply
+from orders.models import Order, OrderItem
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure GET /finances/reports/ as history_months grows: wall time and "
+        "query count per history length. Builds a throwaway business with "
+        "orders and expenses spread over the history in a transaction that is "
+        "rolled back afterwards; nothing is left in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            nargs="+",
+            default=[1, 12, 24, 36, MAX_HISTORY_MONTHS],
+            help="history_months values to measure (default: 1 12 24 36 60).",
+        )
+        parser.add_argument(
+            "--orders-per-month",
+            type=int,
+            default=20,
+            help="Orders (and expenses) created per month of history (default: 20).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Requests per history length; the best time is kept (default: 5).",
+        )
+
+    def handle(self, *args, **options):
+        months = sorted(options["months"])
+        try:
+            with transaction.atomic():
+                user, branch = self._build(max(months), options["orders_per_month"])
+                factory = APIRequestFactory()
+
+                for history_months in months:
+                    best = None
+                    for _ in range(max(1, options["repeat"])):
+                        request = factory.get(
+                            "/finances/reports/",
+                            {
+                                "branch_id": str(branch.id),
+                                "history_months": history_months,
+                            },
+                        )
+                        force_authenticate(request, user=user)
+                        with CaptureQueriesContext(connection) as queries:
+                            started = time.perf_counter()
+                            response = reports(request)
+                            elapsed = time.perf_counter() - started
+                        if best is None or elapsed < best:
+                            best = elapsed
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"history_months={history_months:>3}: "
+                            f"{best * 1000:8,.1f} ms, "
+                            f"{len(queries.captured_queries)} queries "
+                            f"(HTTP {response.status_code})"
+                        )
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _build(self, months, per_month):
+        owner = get_user_model().objects.create_user(
+            email=f"bench-{uuid4().hex}@example.com", password=uuid4().hex
+        )
+        business = Business.objects.create(name="Bench Reports", owner=owner)
+        branch = Branch.objects.filter(business=business).first()
+        supply = Supply.objects.create(label="Bench", branch=branch, business=business)
+        item = Item.objects.create(
+            name="Bench item", inventory_unit="pcs", business=business, branch=branch
+        )
+        variant = ItemVariant.objects.create(
+            item=item, name="Bench", quantity=0, sku=f"BENCH-{uuid4().hex[:8]}"
+        )
+        batch = SuppliedItem.objects.create(
+            quantity=months * per_month,
+            item=item,
+            purchase_price=5,
+            selling_price=8,
+            business=business,
+            supply=supply,
+            variant=variant,
+        )
+
+        now = timezone.now()
+        orders, expenses, dates = [], [], []
+        for n in range(months * per_month):
+            created_at = now - timedelta(days=30 * (n // per_month), hours=n % 24)
+            dates.append(created_at)
+            orders.append(
+                Order(
+                    business=business,
+                    branch=branch,
+                    total_payable=16,
+                    status=Order.StatusChoices.COMPLETED,
+                )
+            )
+            expenses.append(
+                Transaction(
+                    type=Transaction.TransactionType.EXPENSE,
+                    total_paid_amount=3,
+                    business=business,
+                    branch=branch,
+                    created_at=created_at,
+                )
+            )
+        orders = Order.objects.bulk_create(orders)
+        for order, created_at in zip(orders, dates):
+            order.created_at = created_at
+        Order.objects.bulk_update(orders, ["created_at"], batch_size=500)
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order, variant=variant, supplied_item=batch, quantity=2, price=8
+            )
+            for order in orders
+        )
+        Transaction.objects.bulk_create(expenses)
+        return owner, branch
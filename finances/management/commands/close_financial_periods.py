@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from business.models import Branch
+from finances.closing import add_months, close_period, current_month
+
+
+def _month(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Freeze closed months into FinancialPeriodSnapshot rows. The beat task "
+        "closes last month automatically; run this to backfill earlier months "
+        "after deploying the snapshot table or to force a re-close."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            help="Only close branches of this business id.",
+        )
+        parser.add_argument(
+            "--branch",
+            help="Only close this branch id.",
+        )
+        parser.add_argument(
+            "--since",
+            type=_month,
+            help="First month to close (YYYY-MM). Default: last month.",
+        )
+        parser.add_argument(
+            "--until",
+            type=_month,
+            help="Last month to close (YYYY-MM). Default: last month.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Preview changes without saving to the database.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        branches = Branch.objects.all()
+        if options["business"]:
+            branches = branches.filter(business_id=options["business"])
+        if options["branch"]:
+            branches = branches.filter(pk=options["branch"])
+        branches = list(branches)
+
+        last_month = add_months(current_month(), -1)
+        until = options["until"] or last_month
+        since = options["since"] or until
+        if until > last_month:
+            raise CommandError("--until must be a closed month (before this month).")
+        if since > until:
+            raise CommandError("--since must not be after --until.")
+
+        months = []
+        month = since
+        while month <= until:
+            months.append(month)
+            month = add_months(month, 1)
+
+        with transaction.atomic():
+            closed = sum(
+                close_period(branch, month) for branch in branches for month in months
+            )
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        label = "Would close" if dry_run else "Closed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label} {closed} period(s) for {len(branches)} branch(es) "
+                f"from {since:%Y-%m} to {until:%Y-%m}."
+            )
+        )
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finances.ledger import drifted_accounts, rebuild_balances
+from finances.models import BusinessPaymentMethod
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify the per-payment-method balance ledger against the transactions "
+        "it summarises and rebuild the accounts that drifted. With --check, "
+        "only report drifted accounts and exit non-zero if there are any."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            help="Only process payment methods of this business id.",
+        )
+        parser.add_argument(
+            "--branch",
+            help="Only process payment methods of this branch id.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild every selected account, not only the drifted ones.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Verify only; report drifted accounts without rebuilding.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Preview changes without saving to the database.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        payment_methods = BusinessPaymentMethod.objects.order_by("pk")
+        if options["business"]:
+            payment_methods = payment_methods.filter(business_id=options["business"])
+        if options["branch"]:
+            payment_methods = payment_methods.filter(branch_id=options["branch"])
+        payment_method_ids = list(payment_methods.values_list("pk", flat=True))
+
+        drifted = drifted_accounts(payment_method_ids)
+        for payment_method_id in drifted:
+            self.stdout.write(f"Drifted: {payment_method_id}")
+
+        if options["check"]:
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} of {len(payment_method_ids)} account(s) "
+                    "drifted from their transactions."
+                )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"All {len(payment_method_ids)} account(s) are in balance."
+                )
+            )
+            return
+
+        to_rebuild = payment_method_ids if options["all"] else drifted
+        with transaction.atomic():
+            rebuild_balances(to_rebuild)
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        label = "Would rebuild" if dry_run else "Rebuilt"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label} {len(to_rebuild)} of {len(payment_method_ids)} account(s)."
+            )
+        )
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:03
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+CREDIT_TYPES = ["SALE", "SERVICE_REVENUE", "OTHER_INCOME", "REFUND"]
+DEBIT_TYPES = [
+    "EXPENSE",
+    "RENT",
+    "SALARY",
+    "UTILITY",
+    "PURCHASE",
+    "MAINTENANCE",
+    "OTHER_EXPENSE",
+    "DEBT",
+]
+
+
+def backfill_balances(apps, schema_editor):
+    """Seed every account's running and daily closing balances from its
+    transactions, so the ledger starts in step with the old aggregate."""
+    BusinessPaymentMethod = apps.get_model("finances", "BusinessPaymentMethod")
+    Transaction = apps.get_model("finances", "Transaction")
+    PaymentMethodBalance = apps.get_model("finances", "PaymentMethodBalance")
+    DailyPaymentMethodBalance = apps.get_model("finances", "DailyPaymentMethodBalance")
+
+    effect = Case(
+        When(type__in=CREDIT_TYPES, then=F("total_paid_amount")),
+        When(type__in=DEBIT_TYPES, then=-F("total_paid_amount")),
+        default=Value(Decimal("0")),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    rows = (
+        Transaction.objects.filter(payment_method__isnull=False)
+        .annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .values("payment_method_id", "day")
+        .annotate(net_change=Sum(effect))
+        .order_by("payment_method_id", "day")
+    )
+
+    balances = {
+        pk: Decimal("0")
+        for pk in BusinessPaymentMethod.objects.values_list("pk", flat=True)
+    }
+    daily_rows = []
+    for row in rows.iterator():
+        balances[row["payment_method_id"]] += row["net_change"]
+        daily_rows.append(
+            DailyPaymentMethodBalance(
+                payment_method_id=row["payment_method_id"],
+                date=row["day"],
+                net_change=row["net_change"],
+                closing_balance=balances[row["payment_method_id"]],
+            )
+        )
+    DailyPaymentMethodBalance.objects.bulk_create(daily_rows, batch_size=1000)
+    PaymentMethodBalance.objects.bulk_create(
+        [
+            PaymentMethodBalance(payment_method_id=pk, balance=balance)
+            for pk, balance in balances.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finances", "0017_backfill_sale_transaction_created_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentMethodBalance",
+            fields=[
+                (
+                    "payment_method",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ledger",
+                        serialize=False,
+                        to="finances.businesspaymentmethod",
+                    ),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "payment_method_balance",
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyPaymentMethodBalance",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("date", models.DateField()),
+                (
+                    "net_change",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "closing_balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "payment_method",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_balances",
+                        to="finances.businesspaymentmethod",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "payment_method_daily_balance",
+                "ordering": ["date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("payment_method", "date"),
+                        name="unique_daily_balance_per_payment_method",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
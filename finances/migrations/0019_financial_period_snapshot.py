@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0016_employeeinvitation_telegram_username"),
+        ("finances", "0018_payment_method_balance_ledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FinancialPeriodSnapshot",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("month", models.DateField(help_text="First day of the UTC month")),
+                ("is_stale", models.BooleanField(default=True)),
+                ("version", models.PositiveIntegerField(default=0)),
+                ("totals_by_type", models.JSONField(default=dict)),
+                ("totals_by_payment_method", models.JSONField(default=dict)),
+                ("income_by_category", models.JSONField(default=dict)),
+                ("expense_by_category", models.JSONField(default=dict)),
+                ("transaction_count", models.PositiveIntegerField(default=0)),
+                ("closed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="business.branch",
+                    ),
+                ),
+                (
+                    "business",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="business.business",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "finance_period_snapshot",
+                "ordering": ["month"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("branch", "month"),
+                        name="unique_period_snapshot_per_branch",
+                    )
+                ],
+            },
+        ),
+    ]
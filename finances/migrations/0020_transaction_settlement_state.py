@@ -0,0 +1,101 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_settlement_state(apps, schema_editor):
+    """Move the settlement state the category suffixes used to carry
+    (``:settled`` on a settled credit, ``settled:<id>`` / ``supply:<id>:paid``
+    on what settled it) into the new columns."""
+    Transaction = apps.get_model("finances", "Transaction")
+
+    credits = Transaction.objects.filter(payment_method__identifier="CREDIT")
+    credits.update(settlement_state="OPEN")
+    # Pending totals used to skip ":paid" credits too; nothing links them.
+    credits.filter(category__endswith=":paid").update(settlement_state="SETTLED")
+
+    settled = []
+    for credit in credits.filter(
+        models.Q(category__endswith=":settled") | models.Q(category="settled")
+    ):
+        credit.settlement_state = "SETTLED"
+        credit.settled_by = (
+            Transaction.objects.filter(category=f"settled:{credit.pk}")
+            .order_by("created_at")
+            .first()
+        )
+        credit.settled_amount = (
+            credit.settled_by.total_paid_amount
+            if credit.settled_by
+            else credit.total_paid_amount
+        )
+        settled.append(credit)
+
+    for payment in Transaction.objects.filter(
+        category__startswith="supply:", category__endswith=":paid"
+    ):
+        for debt in Transaction.objects.filter(
+            category=payment.category.removesuffix(":paid"), type="DEBT"
+        ):
+            debt.settlement_state = "SETTLED"
+            debt.settled_by = payment
+            debt.settled_amount = payment.total_paid_amount
+            settled.append(debt)
+
+    Transaction.objects.bulk_update(
+        settled,
+        ["settlement_state", "settled_by", "settled_amount"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0016_employeeinvitation_telegram_username"),
+        ("finances", "0019_financial_period_snapshot"),
+        ("orders", "0018_order_search_document"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="settled_amount",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=10, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="settled_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="settles",
+                to="finances.transaction",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="settlement_state",
+            field=models.CharField(
+                blank=True,
+                choices=[("OPEN", "Open"), ("SETTLED", "Settled")],
+                max_length=10,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("settlement_state", "OPEN")),
+                fields=["branch", "created_at"],
+                name="transaction_open_credit_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_settlement_state, migrations.RunPython.noop),
+    ]
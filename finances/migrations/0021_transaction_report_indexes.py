@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finances", "0020_transaction_settlement_state"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["branch", "created_at"], name="transaction_branch_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["branch", "type", "created_at"],
+                name="transaction_branch_type_idx",
+            ),
+        ),
+    ]
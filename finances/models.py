@@ -121,9 +121,91 @@ class Transaction(BaseModel):
     total_paid_amount = models.DecimalField(max_digits=10, decimal_places=2)
     category = models.CharField(max_length=100, blank=True, null=True)
 
+    class SettlementState(models.TextChoices):
+        OPEN = "OPEN", "Open"
+        SETTLED = "SETTLED", "Settled"
+
+    # Settlement of credit transactions (receivables/payables recorded on a
+    # CREDIT payment method): OPEN until paid through a real account, then
+    # SETTLED with the amount paid and the transaction that paid it. Null
+    # for every other transaction.
+    settlement_state = models.CharField(
+        max_length=10, choices=SettlementState.choices, null=True, blank=True
+    )
+    settled_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    settled_by = models.ForeignKey(
+        "self",
+        related_name="settles",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    class Meta(BaseModel.Meta):
+        # Reports always scope by business *and* branch; a branch belongs to
+        # one business, so branch leads and business is checked on the rows.
+        indexes = [
+            # Period aggregates: summary, finance_report, reports, ledger.
+            models.Index(
+                fields=["branch", "created_at"],
+                name="transaction_branch_created_idx",
+            ),
+            # Per-type period totals, e.g. monthly expenses in reports.
+            models.Index(
+                fields=["branch", "type", "created_at"],
+                name="transaction_branch_type_idx",
+            ),
+            # Serves pending receivables/payables and open-credit aging,
+            # which only ever read the (few) unsettled credit rows.
+            models.Index(
+                fields=["branch", "created_at"],
+                condition=Q(settlement_state="OPEN"),
+                name="transaction_open_credit_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Transaction {self.id} - {self.type} ({self.total_paid_amount})"
 
+    @staticmethod
+    def initial_settlement_state(payment_method):
+        """OPEN for a transaction on a CREDIT payment method, else None."""
+        if payment_method is not None and payment_method.identifier == "CREDIT":
+            return Transaction.SettlementState.OPEN
+        return None
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.settlement_state is None:
+            self.settlement_state = self.initial_settlement_state(self.payment_method)
+        super().save(*args, **kwargs)
+
+    def mark_settled(self, settlement, amount):
+        """Record ``settlement`` as having paid ``amount`` of this credit."""
+        self.settlement_state = Transaction.SettlementState.SETTLED
+        self.settled_amount = amount
+        self.settled_by = settlement
+        self.save(update_fields=["settlement_state", "settled_amount", "settled_by"])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row contributes to its payment method's balance
+        # so the ledger can reverse it on update/delete without re-reading.
+        loaded = dict(zip(field_names, values))
+        if all(name in loaded for name in LEDGER_FIELDS):
+            instance._ledger_snapshot = tuple(loaded[name] for name in LEDGER_FIELDS)
+        return instance
+
+    def ledger_snapshot(self):
+        """Current values of ``LEDGER_FIELDS``, as stored in ``_ledger_snapshot``."""
+        return tuple(getattr(self, name) for name in LEDGER_FIELDS)
+
+
+# Columns that decide a transaction's effect on the balance ledger.
+LEDGER_FIELDS = ("payment_method_id", "created_at", "type", "total_paid_amount")
+
 
 class BusinessPaymentMethod(BaseModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -180,3 +262,100 @@ class BusinessPaymentMethod(BaseModel):
 
     class Meta:
         unique_together = ("business", "branch", "identifier")
+
+
+class PaymentMethodBalance(models.Model):
+    """
+    Running balance of a BusinessPaymentMethod account, maintained by
+    ``finances.ledger`` on every Transaction insert, update and delete:
+    income types and refunds add, expense types (including DEBT) subtract.
+    """
+
+    payment_method = models.OneToOneField(
+        BusinessPaymentMethod,
+        primary_key=True,
+        related_name="ledger",
+        on_delete=models.CASCADE,
+    )
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "payment_method_balance"
+
+    def __str__(self):
+        return f"{self.payment_method_id}: {self.balance}"
+
+
+class DailyPaymentMethodBalance(models.Model):
+    """
+    Closing balance of a payment method at the end of each local day that
+    had transactions.  The balance as of any date is the closing balance of
+    the latest row on or before it.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    payment_method = models.ForeignKey(
+        BusinessPaymentMethod,
+        related_name="daily_balances",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    net_change = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    closing_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "payment_method_daily_balance"
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["payment_method", "date"],
+                name="unique_daily_balance_per_payment_method",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.payment_method_id} {self.date}: {self.closing_balance}"
+
+
+class FinancialPeriodSnapshot(models.Model):
+    """
+    Totals of one branch for one closed (UTC calendar) month, frozen by the
+    monthly close in ``finances.closing`` so reports stop recomputing
+    periods that no longer change.  Amounts are stored as decimal strings.
+
+    A write that lands in a closed month marks its snapshot stale (and bumps
+    ``version``); stale snapshots are ignored by readers until the next
+    close recomputes them.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    business = models.ForeignKey(
+        "business.Business", related_name="+", on_delete=models.CASCADE
+    )
+    branch = models.ForeignKey(
+        "business.Branch", related_name="+", on_delete=models.CASCADE
+    )
+    month = models.DateField(help_text="First day of the UTC month")
+    is_stale = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0)
+    # {type: amount} over all of the branch's transactions in the month.
+    totals_by_type = models.JSONField(default=dict)
+    # {payment_method_id or "": {type: amount}}.
+    totals_by_payment_method = models.JSONField(default=dict)
+    income_by_category = models.JSONField(default=dict)
+    expense_by_category = models.JSONField(default=dict)
+    transaction_count = models.PositiveIntegerField(default=0)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "finance_period_snapshot"
+        ordering = ["month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["branch", "month"], name="unique_period_snapshot_per_branch"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.branch_id} {self.month:%Y-%m}"
@@ -7,6 +7,7 @@ import requests
 
 from .base import BaseVerifier, TransactionData
 from .cbe import CBEVerifier
+from .service import ProviderUnavailable, fetch_transaction_data
 from .telebirr import TelebirrVerifier
 
 
@@ -35,7 +36,9 @@ class PaymentVerifier:
         self.provider = provider
         self.account = account
         self.expected_receiver_name = expected_receiver_name
-        self.expected_amount = expected_amount
+        self.expected_amount = (
+            Decimal(str(expected_amount)) if expected_amount is not None else None
+        )
 
         self.args = args
         self.kwargs = kwargs
@@ -58,7 +61,7 @@ class PaymentVerifier:
                     data=None,
                 )
 
-            data = verifier.get_data(self.transaction_id)
+            data = fetch_transaction_data(verifier, self.transaction_id)
 
             if not verifier.does_the_account_match(
                 data=data,
@@ -103,6 +106,14 @@ class PaymentVerifier:
                 data=None,
             )
 
+        except ProviderUnavailable as unavailable:
+            return VerificationResult(
+                is_valid=False,
+                validation_message="Unable to verify the transaction at the moment.",
+                extra={"retry_after": unavailable.retry_after},
+                data=None,
+            )
+
         except requests.exceptions.ConnectTimeout:
             return VerificationResult(
                 is_valid=False,
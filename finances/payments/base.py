@@ -7,6 +7,8 @@ from decimal import Decimal
 import requests
 from bs4 import BeautifulSoup
 
+from core.http import pooled_session
+
 # Ethiopian names are conventionally given as "First Father Grandfather...".
 # Many people only enter their first and father's name (the part they consider
 # their "full name" day-to-day), even though the name on their bank account
@@ -42,6 +44,16 @@ def names_match(provided: str | None, expected: str | None) -> bool:
     return provided_parts[:compare_len] == expected_parts[:compare_len]
 
 
+# Connections kept open per provider; verifications of one provider reuse
+# them instead of paying a TCP + TLS handshake each.
+POOL_MAXSIZE = 10
+
+
+def get_session(provider: str) -> requests.Session:
+    """The process-wide pooled session of ``provider``, created on first use."""
+    return pooled_session(f"payments:{provider}", POOL_MAXSIZE)
+
+
 @dataclass
 class TransactionData:
     transaction_id: str
@@ -55,6 +67,7 @@ class TransactionData:
 
 class BaseVerifier(ABC):
 
+    PROVIDER = ""  # key of the pooled session, cache entries and breaker
     TIMEOUT = 10  # seconds
     HEADERS: dict = {}
 
@@ -64,25 +77,22 @@ class BaseVerifier(ABC):
         """Subclass hook for ``proxies``, ``verify``, etc."""
         return {}
 
-    def get_json(self, transaction_id: str) -> dict:
-        response = requests.get(
+    def fetch(self, transaction_id: str) -> requests.Response:
+        """GET the transaction's URL over the provider's pooled session."""
+        response = get_session(self.PROVIDER).get(
             self.get_url(transaction_id),
             headers=self.HEADERS,
             timeout=self.TIMEOUT,
             **self._extra_request_kwargs(),
         )
         response.raise_for_status()
-        return response.json()
+        return response
+
+    def get_json(self, transaction_id: str) -> dict:
+        return self.fetch(transaction_id).json()
 
     def get_html(self, transaction_id: str) -> str:
-        response = requests.get(
-            self.get_url(transaction_id),
-            headers=self.HEADERS,
-            timeout=self.TIMEOUT,
-            **self._extra_request_kwargs(),
-        )
-        response.raise_for_status()
-        return response.text
+        return self.fetch(transaction_id).text
 
     def get_soup(self, transaction_id: str) -> BeautifulSoup:
         return BeautifulSoup(self.get_html(transaction_id), "html.parser")
@@ -103,6 +113,10 @@ class BaseVerifier(ABC):
         """
         return self.get_url(transaction_id)
 
+    def receipt_key(self, transaction_id: str) -> str:
+        """Identity of the receipt ``transaction_id`` resolves to, for caching."""
+        return transaction_id.strip()
+
     @abstractmethod
     def get_data(self, transaction_id: str, *args, **kwargs) -> TransactionData:
         """Fetch and return parsed transaction data."""
@@ -1,16 +1,35 @@
+import hashlib
 import re
 from datetime import datetime, timezone
 from decimal import Decimal
 from io import BytesIO
 
-import requests
 from dateutil import parser as dateutil_parser
 
+from . import service
 from .base import BaseVerifier, TransactionData, names_match
 
+# Every field read off a receipt, matched in one pass over its text.  Payer
+# and Receiver hold their value after the label; the receipt has two
+# "Account <masked no>" lines, the payer's then the receiver's.
+RECEIPT_FIELDS = re.compile(
+    r"^(?P<label>Payer|Receiver)\s+(?P<value>.+?)\s*$"
+    r"|^Account\s+(?P<account>\S+)\s*$"
+    # Amount received by the payee, before fees.
+    r"|Transferred Amount\s+(?P<amount>[\d,]+(?:\.\d+)?)\s+ETB"
+    r"|Payment Date & Time\s+(?P<paid_at>.+?)\s*$"
+    r"|Reference No\.\s*\(VAT Invoice No\)\s+(?P<reference>\S+)",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+PARSED_RECEIPT_KEY = "payments:cbe:parsed:{}:{}"
+PARSED_RECEIPT_TTL = 60 * 60 * 24 * 7
+
 
 class CBEVerifier(BaseVerifier):
 
+    PROVIDER = "cbe"
+
     def __init__(self, *args, **kwargs):
         self.receiver_account = kwargs.pop("receiver_account", "")
         super().__init__()
@@ -55,92 +74,84 @@ class CBEVerifier(BaseVerifier):
     def get_receipt_url(self, transaction_id: str, receiver_account: str = "") -> str:
         return self.get_url(transaction_id)
 
+    def receipt_key(self, transaction_id: str) -> str:
+        return self._full_transaction_id(transaction_id.strip())
+
     # ── PDF fetching & parsing ────────────────────────────────────────────
 
-    def _get_pdf_text(self, transaction_id: str) -> str:
-        """Fetch the receipt PDF and return all extracted text."""
+    def get_pdf(self, transaction_id: str) -> bytes:
+        """Fetch the receipt PDF."""
+        return self.fetch(transaction_id).content
+
+    @staticmethod
+    def extract_text(pdf: bytes) -> str:
+        """Return all text extracted from a receipt PDF."""
         from pypdf import PdfReader
 
-        url = self.get_url(transaction_id)
-        response = requests.get(
-            url,
-            headers=self.HEADERS,
-            timeout=self.TIMEOUT,
-            **self._extra_request_kwargs(),
-        )
-        response.raise_for_status()
-        reader = PdfReader(BytesIO(response.content))
+        reader = PdfReader(BytesIO(pdf))
         return "\n".join(page.extract_text() or "" for page in reader.pages)
 
-    def _parse_inline_field(self, text: str, label: str) -> str | None:
-        """Return the value that appears on the same line after *label*."""
-        pattern = re.compile(
-            rf"^{re.escape(label)}\s+(.+?)\s*$",
-            re.MULTILINE | re.IGNORECASE,
-        )
-        match = pattern.search(text)
-        return match.group(1).strip() if match else None
-
-    def get_data(self, transaction_id: str, *args, **kwargs) -> TransactionData:
-        text = self._get_pdf_text(transaction_id)
+    def extract_fields(self, transaction_id: str, text: str) -> TransactionData:
+        """Parse the receipt fields out of ``text`` in a single regex pass."""
+        fields = {}
+        accounts = []
+        for match in RECEIPT_FIELDS.finditer(text):
+            if match["account"]:
+                accounts.append(match["account"])
+            elif match["label"]:
+                fields.setdefault(match["label"].lower(), match["value"].strip())
+            else:
+                for name in ("amount", "paid_at", "reference"):
+                    if match[name]:
+                        fields.setdefault(name, match[name])
 
-        # ── Transferred Amount (amount received by the payee, before fees) ──
         amount = None
-        amount_match = re.search(
-            r"Transferred Amount\s+([\d,]+(?:\.\d+)?)\s+ETB",
-            text,
-            re.IGNORECASE,
-        )
-        if amount_match:
-            amount = Decimal(amount_match.group(1).replace(",", ""))
-
-        # ── Sender / payer ────────────────────────────────────────────────
-        sender_name = self._parse_inline_field(text, "Payer")
-
-        # ── Receiver name ─────────────────────────────────────────────────
-        receiver_name = self._parse_inline_field(text, "Receiver")
+        if "amount" in fields:
+            amount = Decimal(fields["amount"].replace(",", ""))
 
-        # ── Account numbers ───────────────────────────────────────────────
-        # The receipt has two "Account <masked_no>" lines:
-        # the first is the payer account, the second is the receiver account.
-        account_lines = re.findall(
-            r"^Account\s+(\S+)\s*$", text, re.MULTILINE | re.IGNORECASE
-        )
-        receiver_account = (
-            account_lines[1]
-            if len(account_lines) >= 2
-            else (account_lines[0] if account_lines else None)
-        )
-
-        # ── Timestamp ─────────────────────────────────────────────────────
         timestamp = None
-        ts_match = re.search(
-            r"Payment Date & Time\s+(.+?)\s*$", text, re.MULTILINE | re.IGNORECASE
-        )
-        if ts_match:
+        if "paid_at" in fields:
             try:
-                timestamp = dateutil_parser.parse(ts_match.group(1)).replace(
+                timestamp = dateutil_parser.parse(fields["paid_at"]).replace(
                     tzinfo=timezone.utc
                 )
             except Exception:
                 pass
 
-        # ── Canonical transaction ID from the receipt ─────────────────────
-        ref_match = re.search(
-            r"Reference No\.\s*\(VAT Invoice No\)\s+(\S+)", text, re.IGNORECASE
+        # The first "Account" line is the payer's, the second the receiver's.
+        receiver_account = (
+            accounts[1] if len(accounts) >= 2 else next(iter(accounts), None)
         )
-        canonical_id = ref_match.group(1) if ref_match else transaction_id
 
         return TransactionData(
-            transaction_id=canonical_id,
+            # Canonical transaction ID from the receipt.
+            transaction_id=fields.get("reference", transaction_id),
             amount=amount,
-            sender_name=sender_name,
-            receiver_name=receiver_name,
+            sender_name=fields.get("payer"),
+            receiver_name=fields.get("receiver"),
             receiver_account=receiver_account,
             timestamp=timestamp,
             extra={"raw_text": text},
         )
 
+    def parse_pdf(self, transaction_id: str, pdf: bytes) -> TransactionData:
+        """
+        ``extract_fields`` of the PDF's text, cached by receipt and content
+        hash: the same bytes always parse the same, so a re-downloaded
+        receipt skips text extraction — even one that held no fields yet.
+        """
+        key = PARSED_RECEIPT_KEY.format(
+            self.receipt_key(transaction_id), hashlib.sha256(pdf).hexdigest()
+        )
+        data = service.cache_get(key)
+        if data is None:
+            data = self.extract_fields(transaction_id, self.extract_text(pdf))
+            service.cache_set(key, data, PARSED_RECEIPT_TTL)
+        return data
+
+    def get_data(self, transaction_id: str, *args, **kwargs) -> TransactionData:
+        return self.parse_pdf(transaction_id, self.get_pdf(transaction_id))
+
     # ── ownership checks ──────────────────────────────────────────────────
     # CBE masks account numbers with a fixed 4-asterisk placeholder that does
     # NOT preserve the original length, e.g. ``1****6385`` for an account
@@ -0,0 +1,148 @@
+"""
+Synthetic receipts laid out like the CBE PDF and Telebirr HTML receipts, for
+exercising the parsers without a provider (or anyone's real receipt).
+
+``build_corpus`` returns ``(provider, name, content, expected)`` tuples in the
+same shape ``bench_receipt_parsers`` reads a recorded corpus in.
+"""
+
+from io import BytesIO
+
+CBE_SAMPLES = [
+    {
+        "transaction_id": "FT26115CJJ8J",
+        "amount": "1250.00",
+        "sender_name": "ABEBE KEBEDE TESSEMA",
+        "receiver_name": "SHOP OWNER PLC",
+        "payer_account": "1****1234",
+        "receiver_account": "1****6385",
+        "timestamp": "2026-10-01T10:15:00+00:00",
+    },
+    {
+        "transaction_id": "FT26120AB12C",
+        "amount": "35000.50",
+        "sender_name": "HANNA GIRMA",
+        "receiver_name": "BITA TRADING",
+        "payer_account": "1****9981",
+        "receiver_account": "1****0042",
+        "timestamp": "2026-10-05T18:02:41+00:00",
+    },
+]
+
+TELEBIRR_SAMPLES = [
+    {
+        "transaction_id": "CJ41ABC123",
+        "amount": "480.00",
+        "sender_name": "Selam Tadesse",
+        "receiver_name": "Shop Owner",
+        "receiver_account": "2519****2063",
+        "timestamp": "2026-10-01T09:30:00",
+    },
+]
+
+
+def build_cbe_pdf(sample, columns=False):
+    """
+    A one-page receipt PDF.  ``columns`` draws labels and values as separate
+    text runs (extracted on separate lines) instead of one line each.
+    """
+    from dateutil import parser as dateutil_parser
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    paid_at = dateutil_parser.isoparse(sample["timestamp"])
+    rows = [
+        ("Commercial Bank of Ethiopia", ""),
+        ("Payer", sample["sender_name"]),
+        ("Account", sample["payer_account"]),
+        ("Receiver", sample["receiver_name"]),
+        ("Account", sample["receiver_account"]),
+        ("Payment Date & Time", paid_at.strftime("%m/%d/%Y, %I:%M:%S %p")),
+        ("Reference No. (VAT Invoice No)", sample["transaction_id"]),
+        ("Reason / Type of service", "Payment for goods"),
+        (
+            "Transferred Amount",
+            f"{float(sample['amount']):,.2f} ETB",
+        ),
+        ("Commission or Service Charge", "1.00 ETB"),
+        ("Total amount debited from customers account", "ETB"),
+    ]
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    y = 800
+    for label, value in rows:
+        if columns:
+            pdf.drawString(50, y, label)
+            pdf.drawString(300, y, value)
+        else:
+            pdf.drawString(50, y, f"{label}  {value}".strip())
+        y -= 20
+    pdf.save()
+    return buffer.getvalue()
+
+
+def build_telebirr_html(sample):
+    from dateutil import parser as dateutil_parser
+
+    paid_at = dateutil_parser.isoparse(sample["timestamp"])
+    return f"""
+<html><body><table>
+  <tr><td>Payer Name</td><td>{sample["sender_name"]}</td></tr>
+  <tr><td>Payer telebirr no.</td><td>2519****1111</td></tr>
+  <tr><td>Credited Party name</td><td>{sample["receiver_name"]}</td></tr>
+  <tr><td>Credited party account no</td><td>{sample["receiver_account"]}</td></tr>
+  <tr><td>transaction status</td><td>Completed</td></tr>
+</table>
+<table>
+  <tr>
+    <td class="receipttableTd2">Invoice No.</td>
+    <td class="receipttableTd">Payment date</td>
+    <td class="receipttableTd">Settled Amount</td>
+  </tr>
+  <tr>
+    <td class="receipttableTd2">{sample["transaction_id"]}</td>
+    <td class="receipttableTd">{paid_at.strftime("%d-%m-%Y %H:%M:%S")}</td>
+    <td class="receipttableTd">{sample["amount"]} Birr</td>
+  </tr>
+</table></body></html>
+"""
+
+
+def expected_fields(sample):
+    return {
+        key: sample[key]
+        for key in (
+            "transaction_id",
+            "amount",
+            "sender_name",
+            "receiver_name",
+            "receiver_account",
+            "timestamp",
+        )
+    }
+
+
+def build_corpus():
+    corpus = []
+    for sample in CBE_SAMPLES:
+        for columns in (False, True):
+            layout = "columns" if columns else "inline"
+            corpus.append(
+                (
+                    "cbe",
+                    f"cbe-{sample['transaction_id']}-{layout}",
+                    build_cbe_pdf(sample, columns=columns),
+                    expected_fields(sample),
+                )
+            )
+    for sample in TELEBIRR_SAMPLES:
+        corpus.append(
+            (
+                "telebirr",
+                f"telebirr-{sample['transaction_id']}",
+                build_telebirr_html(sample).encode(),
+                expected_fields(sample),
+            )
+        )
+    return corpus
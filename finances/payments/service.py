@@ -0,0 +1,202 @@
+"""
+Receipt fetching for payment verification.
+
+``fetch_transaction_data`` is the single way verifiers reach a provider:
+
+- requests go over the provider's pooled session (``base.get_session``);
+- successfully parsed receipts are cached by ``(provider, receipt)`` —
+  a receipt never changes once issued, so a retried verification of the same
+  transaction costs no request;
+- a per-provider circuit breaker stops calling a provider that keeps
+  failing, so a bank outage answers in microseconds instead of tying up a
+  worker for the full timeout on every verification.
+
+It also keeps the state of asynchronous verifications (see
+``queue_verification``) in the cache.  Every cache call fails soft: with the
+cache unreachable receipts are simply fetched each time, and verifications
+run synchronously.
+"""
+
+import logging
+import threading
+import time
+import uuid
+
+import requests
+from django.core.cache import cache
+
+from .base import BaseVerifier, TransactionData
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_CACHE_KEY = "payments:receipt:{}:{}"
+RECEIPT_CACHE_TTL = 60 * 60 * 24
+
+VERIFICATION_KEY = "payments:verification:{}"
+VERIFICATION_TTL = 60 * 60
+
+# Consecutive provider failures that open the breaker, and how long it stays
+# open before one trial request is let through.
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+
+class ProviderUnavailable(Exception):
+    """The provider's circuit breaker is open."""
+
+    def __init__(self, provider, retry_after):
+        super().__init__(f"{provider} is unavailable")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed → open after ``threshold`` consecutive failures; after
+    ``reset_seconds`` a single trial call is allowed (half-open) and its
+    outcome closes or re-opens the breaker.  State is per process.
+    """
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self, provider):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0 or self.trial_running:
+                raise ProviderUnavailable(provider, max(1, int(remaining)))
+            self.trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider):
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS
+            )
+        return _breakers[provider]
+
+
+def _is_provider_failure(error):
+    """Errors that say the provider is unhealthy, not that the receipt is bad."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is None or response.status_code >= 500
+    return isinstance(
+        error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    )
+
+
+def cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.warning("payments: cache unavailable, not reading %s", key)
+        return None
+
+
+def cache_set(key, value, timeout):
+    try:
+        cache.set(key, value, timeout)
+        return True
+    except Exception:
+        logger.warning("payments: cache unavailable, not storing %s", key)
+        return False
+
+
+def cache_delete(key):
+    try:
+        cache.delete(key)
+    except Exception:
+        logger.warning("payments: cache unavailable, not deleting %s", key)
+
+
+def fetch_transaction_data(
+    verifier: BaseVerifier, transaction_id: str
+) -> TransactionData:
+    """``verifier.get_data(transaction_id)``, cached and behind the breaker."""
+    provider = verifier.PROVIDER
+    key = RECEIPT_CACHE_KEY.format(provider, verifier.receipt_key(transaction_id))
+    data = cache_get(key)
+    if data is not None:
+        return data
+
+    breaker = get_breaker(provider)
+    breaker.before_call(provider)
+    try:
+        data = verifier.get_data(transaction_id)
+    except Exception as error:
+        if _is_provider_failure(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    breaker.record_success()
+
+    # A page without the receipt's fields is not a lookup worth keeping:
+    # the receipt may simply not be published yet.
+    if data.amount is not None or data.receiver_account:
+        cache_set(key, data, RECEIPT_CACHE_TTL)
+    return data
+
+
+def queue_verification(user_id, verifier_kwargs):
+    """
+    Start verifying in the background; returns the verification id, or None
+    when its state cannot be stored or the task cannot be queued (the caller
+    then verifies inline).
+    """
+    from finances.tasks import verify_payment_task
+
+    verification_id = str(uuid.uuid4())
+    key = VERIFICATION_KEY.format(verification_id)
+    pending = {"user_id": user_id, "status": "PENDING", "result": None}
+    if not cache_set(key, pending, VERIFICATION_TTL):
+        return None
+    try:
+        verify_payment_task.delay(verification_id, verifier_kwargs)
+    except Exception:
+        logger.warning("payments: could not queue verification %s", verification_id)
+        cache_delete(key)
+        return None
+    return verification_id
+
+
+def complete_verification(verification_id, result):
+    key = VERIFICATION_KEY.format(verification_id)
+    state = cache_get(key)
+    if state is None:
+        return
+    cache_set(key, {**state, "status": "DONE", "result": result}, VERIFICATION_TTL)
+
+
+def get_verification(verification_id, user_id):
+    """State of a queued verification, or None if unknown or not ``user_id``'s."""
+    state = cache_get(VERIFICATION_KEY.format(verification_id))
+    if state is None or state["user_id"] != user_id:
+        return None
+    return state
@@ -13,6 +13,8 @@ _TELEBIRR_RECEIPT_URL = (
 
 class TelebirrVerifier(BaseVerifier):
 
+    PROVIDER = "telebirr"
+
     def __init__(self, *args, **kwargs):
         pass
 
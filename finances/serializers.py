@@ -1,5 +1,6 @@
 from decimal import Decimal
 
+from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Count, Q, Sum
 from rest_framework import serializers
 
@@ -11,13 +12,12 @@ from .payments import PaymentVerifier
 class TransactionSerializer(serializers.ModelSerializer):
     is_settled = serializers.SerializerMethodField()
     customer_name = serializers.SerializerMethodField()
+    settled_by = serializers.PrimaryKeyRelatedField(read_only=True)
 
     def get_is_settled(self, obj) -> bool:
         """True when this credit transaction has been settled via the settle endpoint
-        or via the legacy supply settle_debt flow."""
-        if not obj.category:
-            return False
-        return obj.category.endswith(":settled") or obj.category.endswith(":paid")
+        or via the supply settle_debt flow."""
+        return obj.settlement_state == Transaction.SettlementState.SETTLED
 
     def get_customer_name(self, obj):
         """Return the linked order's customer full_name, if available."""
@@ -130,13 +130,17 @@ class AccountSerializer(serializers.ModelSerializer):
 
     def get_balance(self, obj):
         """Calculate balance: all income types + REFUND add; all expense types + DEBT subtract."""
-        # Fast path: the AccountViewset annotates these totals at the DB level so
-        # we avoid two aggregation queries per row. Fall back to per-object
-        # queries when the serializer is used outside that annotated queryset.
-        income_refund = getattr(obj, "_income_refund_total", None)
-        expense_debt = getattr(obj, "_expense_debt_total", None)
-        if income_refund is not None and expense_debt is not None:
-            return float(income_refund - expense_debt)
+        # Fast paths: the AccountViewset annotates ``_balance_as_of`` for
+        # ``?as_of=`` requests and joins the running-balance ledger row
+        # otherwise. Fall back to aggregating the transactions when the
+        # serializer is used outside that queryset or the row is missing.
+        balance_as_of = getattr(obj, "_balance_as_of", None)
+        if balance_as_of is not None:
+            return float(balance_as_of)
+        try:
+            return float(obj.ledger.balance)
+        except ObjectDoesNotExist:
+            pass
 
         transactions = Transaction.objects.filter(payment_method=obj)
 
@@ -359,6 +363,22 @@ class FinanceReportSerializer(serializers.Serializer):
     period_comparison = PeriodComparisonSerializer()
 
 
+class AgingBucketSerializer(serializers.Serializer):
+    bucket = serializers.CharField()
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    count = serializers.IntegerField()
+
+
+class OpenCreditAgingSerializer(serializers.Serializer):
+    """Serializer for the open-credit aging endpoint."""
+
+    as_of = serializers.DateField()
+    receivables = AgingBucketSerializer(many=True)
+    payables = AgingBucketSerializer(many=True)
+    total_receivables = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total_payables = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
 class PaymentVerificationSerializer(serializers.Serializer):
     transaction_id = serializers.CharField(write_only=True)
 
@@ -376,12 +396,19 @@ class PaymentVerificationSerializer(serializers.Serializer):
     is_valid = serializers.BooleanField(read_only=True)
     validation_message = serializers.CharField(read_only=True, allow_blank=True)
     data = serializers.JSONField(read_only=True, allow_null=True)
+    # e.g. ``retry_after`` (seconds) while the provider's breaker is open.
+    extra = serializers.JSONField(read_only=True)
 
-    def create(self, validated_data):
+    asynchronous = serializers.BooleanField(
+        required=False, default=False, write_only=True
+    )
 
+    def get_verifier_kwargs(self):
+        """JSON-safe ``PaymentVerifier`` arguments, also used by the async task."""
+        validated_data = self.validated_data
         business_payment_method = validated_data["business_payment_method"]
-        payment_method = validated_data["business_payment_method"].payment
-        account_number = validated_data["business_payment_method"].identifier
+        payment_method = business_payment_method.payment
+        account_number = business_payment_method.identifier
         receiver_name = (
             validated_data.get("receiver_name")
             or business_payment_method.receiver_name
@@ -389,11 +416,16 @@ class PaymentVerificationSerializer(serializers.Serializer):
         )
         expected_amount = validated_data.get("expected_amount")
 
-        return PaymentVerifier(
-            transaction_id=validated_data["transaction_id"],
-            provider=payment_method.short_name if payment_method else "",
-            account=account_number if account_number else "",
-            expected_receiver_name=receiver_name,
-            expected_amount=expected_amount,
-            receiver_account=business_payment_method.identifier,
-        ).verify_transaction()
+        return {
+            "transaction_id": validated_data["transaction_id"],
+            "provider": payment_method.short_name if payment_method else "",
+            "account": account_number if account_number else "",
+            "expected_receiver_name": receiver_name,
+            "expected_amount": (
+                str(expected_amount) if expected_amount is not None else None
+            ),
+            "receiver_account": business_payment_method.identifier,
+        }
+
+    def create(self, validated_data):
+        return PaymentVerifier(**self.get_verifier_kwargs()).verify_transaction()
@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from finances.models import Transaction
-from orders.signals import order_completed
+from finances import ledger
+from finances.closing import invalidate_period, month_of
+from finances.models import LEDGER_FIELDS, PaymentMethodBalance, Transaction
+from orders.signals import order_completed, orders_synced
 
 from .models import BusinessPaymentMethod, PaymentMethod
 
@@ -26,6 +28,80 @@ def create_transaction(sender, instance, **kwargs):
     )
 
 
+@receiver(orders_synced)
+def create_transactions_for_synced_orders(sender, orders, **kwargs):
+    """Bulk counterpart of ``create_transaction`` for offline-synced orders."""
+    transactions = Transaction.objects.bulk_create(
+        [
+            Transaction(
+                order=order,
+                type=Transaction.TransactionType.SALE,
+                total_paid_amount=order.total_payable,
+                payment_method=order.payment_method,
+                business=order.business,
+                branch=order.branch,
+                created_by=order.employee.user if order.employee_id else None,
+                created_at=order.created_at,
+                # bulk_create skips Transaction.save(), which sets this.
+                settlement_state=Transaction.initial_settlement_state(
+                    order.payment_method
+                ),
+            )
+            for order in orders
+        ]
+    )
+    # bulk_create sends no post_save, so post the batch to the ledger here.
+    ledger.record_transactions(transactions)
+    # Offline orders may be synced long after they were placed.
+    by_month = {month_of(tx.created_at): tx.created_at for tx in transactions}
+    for when in by_month.values():
+        invalidate_period(orders[0].business_id, orders[0].branch_id, when)
+
+
+@receiver(pre_save, sender=Transaction)
+def load_ledger_snapshot(sender, instance, raw=False, **kwargs):
+    """Read the stored values of a row saved without its ``from_db`` snapshot."""
+    if raw or instance._state.adding or hasattr(instance, "_ledger_snapshot"):
+        return
+    stored = (
+        Transaction.objects.filter(pk=instance.pk).values_list(*LEDGER_FIELDS).first()
+    )
+    if stored is not None:
+        instance._ledger_snapshot = stored
+
+
+@receiver(post_save, sender=Transaction)
+def update_balance_ledger(sender, instance, created, raw=False, **kwargs):
+    """
+    Move the transaction's balance effect from its old values to its new,
+    and reopen the closed periods either set of values falls in.
+    """
+    if raw:
+        return
+    current = instance.ledger_snapshot()
+    previous = None if created else getattr(instance, "_ledger_snapshot", None)
+    if previous != current:
+        if previous is not None:
+            ledger.apply_snapshot(previous, sign=-1)
+            invalidate_period(instance.business_id, instance.branch_id, previous[1])
+        ledger.apply_snapshot(current)
+        invalidate_period(instance.business_id, instance.branch_id, current[1])
+    instance._ledger_snapshot = current
+
+
+@receiver(post_delete, sender=Transaction)
+def reverse_balance_ledger(sender, instance, **kwargs):
+    snapshot = getattr(instance, "_ledger_snapshot", None) or instance.ledger_snapshot()
+    ledger.apply_snapshot(snapshot, sign=-1)
+    invalidate_period(instance.business_id, instance.branch_id, snapshot[1])
+
+
+@receiver(post_save, sender=BusinessPaymentMethod)
+def create_balance_ledger(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        PaymentMethodBalance.objects.create(payment_method=instance)
+
+
 def _is_credit_payment_method(bpm) -> bool:
     """Return True if this BusinessPaymentMethod represents a deferred-credit/debt."""
     if bpm.identifier and bpm.identifier.upper() == "CREDIT":
@@ -44,7 +120,8 @@ def create_supply_transaction(sender, instance, created, **kwargs):
     - Any other payment       →  PURCHASE transaction (actual expense)
 
     A debt can later be settled via the ``settle_debt`` action on SupplyViewset,
-    which creates a PURCHASE transaction with category ``supply:<id>:paid``.
+    which creates a PURCHASE transaction with category ``supply:<id>:paid``
+    and marks the DEBT settled by it.
     """
     if not instance.payment_method_id:
         return
@@ -76,6 +153,12 @@ def create_supply_transaction(sender, instance, created, **kwargs):
         business=instance.business,
         branch=instance.branch,
         category=supply_ref,
+        # A debt is an open payable even on an account matched by name only.
+        settlement_state=(
+            Transaction.SettlementState.OPEN
+            if tx_type == Transaction.TransactionType.DEBT
+            else None
+        ),
     )
 
 
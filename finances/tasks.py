@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from core.celery.queues import CeleryQueue
+from finances.closing import close_due_periods
+from finances.payments import PaymentVerifier
+from finances.payments.service import complete_verification
+
+
+@shared_task(queue=CeleryQueue.Definitions.FINANCIAL_REPORTING)
+def close_financial_periods_task():
+    """Beat task: close last month for every branch and re-close stale months."""
+    return close_due_periods()
+
+
+@shared_task(queue=CeleryQueue.Definitions.PAYMENT_PROCESSING)
+def verify_payment_task(verification_id, verifier_kwargs):
+    """Run a verification queued by ``PaymentVerifyViewset`` and store its result."""
+    result = PaymentVerifier(**verifier_kwargs).verify_transaction()
+    complete_verification(verification_id, result)
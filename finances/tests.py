@@ -1,5 +1,1019 @@
+import threading
 import uuid
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
+
+from business.models import Branch, Business
+from core.http import close_sessions
+from finances.closing import (
+    add_months,
+    close_due_periods,
+    close_period,
+    current_month,
+    decimal_amounts,
+    invalidate_period,
+    month_bounds,
+)
+from finances.ledger import drifted_accounts
+from finances.models import (
+    BusinessPaymentMethod,
+    DailyPaymentMethodBalance,
+    FinancialPeriodSnapshot,
+    PaymentMethod,
+    PaymentMethodBalance,
+    Transaction,
+)
+from finances.payments import PaymentVerifier, service
+from finances.payments.cbe import CBEVerifier
+from finances.payments.samples import CBE_SAMPLES, build_cbe_pdf
+from finances.tasks import verify_payment_task
+from finances.views import MAX_HISTORY_MONTHS
+from inventories.models import Item, ItemVariant, SuppliedItem, Supply
+from orders.models import Order, OrderItem
+
+User = get_user_model()
+
+
+class FinanceSummaryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="owner@example.com", password="password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.business = Business.objects.create(name="Test Business", owner=self.user)
+        self.branch = Branch.objects.get(business=self.business)
+        self.cash = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CASH"
+        )
+        self.credit = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CREDIT"
+        )
+        self.url = reverse("finance-summary") + f"?branch_id={self.branch.id}"
+
+        month_start = timezone.now().replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        last_month = month_start - timedelta(days=3)
+        T = Transaction.TransactionType
+        for type, amount, payment_method, created_at in [
+            (T.SALE, 100, self.cash, None),
+            (T.REFUND, -10, self.cash, None),
+            (T.EXPENSE, 30, self.cash, None),
+            (T.SALE, 50, self.credit, None),
+            (T.PURCHASE, 20, self.credit, None),
+            (T.SALE, 40, self.cash, last_month),
+        ]:
+            Transaction.objects.create(
+                type=type,
+                total_paid_amount=amount,
+                payment_method=payment_method,
+                business=self.business,
+                branch=self.branch,
+                created_by=self.user,
+                **({"created_at": created_at} if created_at else {}),
+            )
+
+    def _summary(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_metrics_per_period(self):
+        data = self._summary()
+
+        self.assertEqual(data["total_assets"], Decimal("130.00"))
+        self.assertEqual(data["pending_receivables"], Decimal("50.00"))
+        self.assertEqual(data["pending_payables"], Decimal("20.00"))
+        self.assertEqual(data["net_worth"], Decimal("110.00"))
+        self.assertEqual(data["monthly_income"], Decimal("150.00"))
+        self.assertEqual(data["monthly_expense"], Decimal("50.00"))
+        self.assertEqual(data["monthly_total_sales"], Decimal("150.00"))
+        self.assertEqual(data["monthly_net_sales"], Decimal("140.00"))
+        self.assertEqual(data["monthly_transactions"], 5)
+        self.assertEqual(data["previous_month_income"], Decimal("40.00"))
+        self.assertEqual(data["previous_month_total_sales"], Decimal("40.00"))
+
+    def test_metrics_are_computed_in_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._summary()
+
+        report_queries = [
+            q["sql"]
+            for q in queries.captured_queries
+            if any(
+                f'FROM "{table}"' in q["sql"]
+                for table in (
+                    "finances_transaction",
+                    "orders_order",
+                    "inventories_supplieditem",
+                )
+            )
+        ]
+        # One transaction aggregate, one order aggregate, one inventory value.
+        self.assertLess(len(report_queries), 5)
+
+
+class BalanceLedgerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="ledger@example.com", password="password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.business = Business.objects.create(name="Ledger Business", owner=self.user)
+        self.branch = Branch.objects.get(business=self.business)
+        self.cash = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CASH"
+        )
+        self.credit = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CREDIT"
+        )
+        self.today = timezone.now()
+        self.yesterday = self.today - timedelta(days=1)
+        self.last_week = self.today - timedelta(days=7)
+
+    def _transaction(self, type, amount, created_at, payment_method=None):
+        return Transaction.objects.create(
+            type=type,
+            total_paid_amount=amount,
+            payment_method=payment_method or self.cash,
+            business=self.business,
+            branch=self.branch,
+            created_by=self.user,
+            created_at=created_at,
+        )
+
+    def _balance(self, payment_method=None):
+        return PaymentMethodBalance.objects.get(
+            payment_method=payment_method or self.cash
+        ).balance
+
+    def _closings(self, payment_method=None):
+        return dict(
+            DailyPaymentMethodBalance.objects.filter(
+                payment_method=payment_method or self.cash
+            ).values_list("date", "closing_balance")
+        )
+
+    def _accounts(self, **params):
+        params.setdefault("branch_id", self.branch.id)
+        response = self.client.get(reverse("accounts-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data.get("results", response.data)
+        return {account["id"]: account["balance"] for account in results}
+
+    def test_new_payment_method_gets_an_empty_ledger_row(self):
+        self.assertEqual(self._balance(), Decimal("0"))
+        self.assertEqual(self._balance(self.credit), Decimal("0"))
+
+    def test_insert_update_delete_keep_balance_and_closings(self):
+        T = Transaction.TransactionType
+        sale = self._transaction(T.SALE, 100, self.yesterday)
+        expense = self._transaction(T.EXPENSE, 30, self.today)
+        self._transaction(T.REFUND, -10, self.today)
+        self.assertEqual(self._balance(), Decimal("60"))
+        self.assertEqual(
+            self._closings(),
+            {
+                timezone.localdate(self.yesterday): Decimal("100"),
+                timezone.localdate(self.today): Decimal("60"),
+            },
+        )
+
+        # Re-loaded rows are adjusted from the values they were read with.
+        sale = Transaction.objects.get(pk=sale.pk)
+        sale.total_paid_amount = 150
+        sale.save()
+        expense = Transaction.objects.get(pk=expense.pk)
+        expense.payment_method = self.credit
+        expense.save()
+        self.assertEqual(self._balance(), Decimal("140"))
+        self.assertEqual(self._balance(self.credit), Decimal("-30"))
+
+        # A backdated transaction moves every later closing balance.
+        self._transaction(T.RENT, 40, self.last_week)
+        self.assertEqual(
+            self._closings(),
+            {
+                timezone.localdate(self.last_week): Decimal("-40"),
+                timezone.localdate(self.yesterday): Decimal("110"),
+                timezone.localdate(self.today): Decimal("100"),
+            },
+        )
+
+        Transaction.objects.filter(type=T.RENT).delete()
+        self.assertEqual(self._balance(), Decimal("140"))
+        self.assertEqual(drifted_accounts([self.cash.pk, self.credit.pk]), [])
+
+    def test_accounts_read_the_ledger_and_balance_as_of_a_date(self):
+        T = Transaction.TransactionType
+        self._transaction(T.SALE, 100, self.last_week)
+        self._transaction(T.EXPENSE, 25, self.yesterday)
+        self._transaction(T.SALE, 5, self.today)
+
+        with CaptureQueriesContext(connection) as queries:
+            balances = self._accounts()
+        self.assertEqual(balances[str(self.cash.id)], 80.0)
+        self.assertFalse(
+            any(
+                'FROM "finances_transaction"' in q["sql"]
+                for q in queries.captured_queries
+            )
+        )
+
+        as_of = timezone.localdate(self.yesterday) - timedelta(days=1)
+        self.assertEqual(
+            self._accounts(as_of=as_of.isoformat())[str(self.cash.id)], 100.0
+        )
+        before = timezone.localdate(self.last_week) - timedelta(days=1)
+        self.assertEqual(
+            self._accounts(as_of=before.isoformat())[str(self.cash.id)], 0.0
+        )
+
+        response = self.client.get(
+            reverse("accounts-list"), {"branch_id": self.branch.id, "as_of": "x"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command_repairs_drift(self):
+        T = Transaction.TransactionType
+        self._transaction(T.SALE, 100, self.yesterday)
+        self._transaction(T.PURCHASE, 20, self.today)
+        # Writes that bypass signals leave the ledger behind.
+        Transaction.objects.filter(type=T.SALE).update(total_paid_amount=70)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_balances", "--check", stdout=StringIO())
+
+        call_command("rebuild_balances", "--dry-run", stdout=StringIO())
+        self.assertEqual(self._balance(), Decimal("80"))
+
+        call_command("rebuild_balances", stdout=StringIO())
+        self.assertEqual(self._balance(), Decimal("50"))
+        self.assertEqual(
+            self._closings(),
+            {
+                timezone.localdate(self.yesterday): Decimal("70"),
+                timezone.localdate(self.today): Decimal("50"),
+            },
+        )
+        call_command("rebuild_balances", "--check", stdout=StringIO())
+
+
+class FinanceReportsHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="reports@example.com", password="password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.business = Business.objects.create(
+            name="Reports Business", owner=self.user
+        )
+        self.branch = Branch.objects.get(business=self.business)
+        item = Item.objects.create(
+            name="Soap",
+            inventory_unit="pcs",
+            business=self.business,
+            branch=self.branch,
+        )
+        self.variant = ItemVariant.objects.create(
+            item=item, name="Soap", quantity=0, sku="SOAP-1"
+        )
+        supply = Supply.objects.create(
+            label="Supply", branch=self.branch, business=self.business
+        )
+        self.batch = SuppliedItem.objects.create(
+            quantity=10,
+            item=item,
+            purchase_price=5,
+            selling_price=8,
+            business=self.business,
+            supply=supply,
+            variant=self.variant,
+        )
+
+        # January: 2 x 8 at the line price plus 1 unpriced line valued at
+        # the batch's selling price. December: a rent payment.
+        self._order("2026-01-10", [(2, 8), (1, 0)])
+        self._order("2026-03-05", [(1, 10)])
+        Transaction.objects.create(
+            type=Transaction.TransactionType.RENT,
+            total_paid_amount=30,
+            business=self.business,
+            branch=self.branch,
+            created_at=timezone.datetime(2025, 12, 20, tzinfo=dt_timezone.utc),
+        )
+
+    def _order(self, day, lines):
+        order = Order.objects.create(
+            business=self.business,
+            branch=self.branch,
+            total_payable=0,
+            status=Order.StatusChoices.COMPLETED,
+        )
+        for quantity, price in lines:
+            OrderItem.objects.create(
+                order=order,
+                variant=self.variant,
+                supplied_item=self.batch,
+                quantity=quantity,
+                price=price,
+            )
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.datetime.fromisoformat(day).replace(
+                hour=12, tzinfo=dt_timezone.utc
+            )
+        )
+
+    def _history(self, months):
+        response = self.client.get(
+            reverse("finance-reports"),
+            {"branch_id": self.branch.id, "date": "2026-03", "history_months": months},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["historical_data"]
+
+    def test_history_is_grouped_per_month(self):
+        history = self._history(4)
+
+        self.assertEqual(
+            [row["month"][:7] for row in history],
+            ["2025-12", "2026-01", "2026-02", "2026-03"],
+        )
+        self.assertEqual(
+            [Decimal(row["total_income"]) for row in history],
+            [Decimal("0"), Decimal("24"), Decimal("0"), Decimal("10")],
+        )
+        self.assertEqual(
+            [Decimal(row["net_profit"]) for row in history],
+            [Decimal("-30"), Decimal("24"), Decimal("0"), Decimal("10")],
+        )
+
+    def test_history_length_does_not_change_query_count_and_is_capped(self):
+        with CaptureQueriesContext(connection) as short:
+            self._history(12)
+        with CaptureQueriesContext(connection) as long:
+            history = self._history(MAX_HISTORY_MONTHS + 24)
+
+        self.assertEqual(len(long.captured_queries), len(short.captured_queries))
+        self.assertEqual(len(history), MAX_HISTORY_MONTHS)
+
+
+class FinancialPeriodSnapshotTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="close@example.com", password="password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.business = Business.objects.create(name="Close Business", owner=self.user)
+        self.branch = Branch.objects.get(business=self.business)
+        self.cash = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CASH"
+        )
+        self.closed = add_months(current_month(), -2)
+        self.last = add_months(current_month(), -1)
+
+        T = Transaction.TransactionType
+        self.expense = self._transaction(T.EXPENSE, 30, self.closed)
+        self._transaction(T.SALE, 100, self.closed)
+        self.last_sale = self._transaction(T.SALE, 50, self.last)
+
+    def _transaction(self, type, amount, month, day=10):
+        return Transaction.objects.create(
+            type=type,
+            total_paid_amount=amount,
+            payment_method=self.cash,
+            business=self.business,
+            branch=self.branch,
+            created_at=month_bounds(month)[0] + timedelta(days=day - 1, hours=12),
+        )
+
+    def _snapshot(self, month=None):
+        return FinancialPeriodSnapshot.objects.get(
+            branch=self.branch, month=month or self.closed
+        )
+
+    def _history(self):
+        response = self.client.get(
+            reverse("finance-reports"),
+            {"branch_id": self.branch.id, "history_months": 3},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {
+            row["month"][:7]: Decimal(row["total_expense"])
+            for row in response.data["historical_data"]
+        }
+
+    def test_close_freezes_totals_that_reports_read(self):
+        self.assertTrue(close_period(self.branch, self.closed))
+
+        snapshot = self._snapshot()
+        self.assertFalse(snapshot.is_stale)
+        self.assertEqual(
+            decimal_amounts(snapshot.totals_by_type),
+            {"SALE": Decimal("100"), "EXPENSE": Decimal("30")},
+        )
+        self.assertEqual(
+            decimal_amounts(snapshot.totals_by_payment_method[str(self.cash.id)]),
+            {"SALE": Decimal("100"), "EXPENSE": Decimal("30")},
+        )
+        self.assertEqual(snapshot.transaction_count, 2)
+
+        # Rewrites that bypass signals are invisible: the month is frozen.
+        Transaction.objects.filter(pk=self.expense.pk).update(total_paid_amount=999)
+        self.assertEqual(self._history()[f"{self.closed:%Y-%m}"], Decimal("30"))
+
+    def test_backdated_transaction_reopens_the_month(self):
+        close_period(self.branch, self.closed)
+        version = self._snapshot().version
+
+        self._transaction(Transaction.TransactionType.RENT, 20, self.closed, day=3)
+        snapshot = self._snapshot()
+        self.assertTrue(snapshot.is_stale)
+        self.assertEqual(snapshot.version, version + 1)
+        self.assertEqual(self._history()[f"{self.closed:%Y-%m}"], Decimal("50"))
+
+        # Re-closes the stale month and closes last month for every branch.
+        self.assertGreaterEqual(close_due_periods(), 2)
+        self.assertFalse(self._snapshot().is_stale)
+        self.assertFalse(self._snapshot(self.last).is_stale)
+        self.assertEqual(
+            sum(decimal_amounts(self._snapshot().expense_by_category).values()),
+            Decimal("50"),
+        )
+
+    def test_close_interleaved_with_a_backdated_write_stays_stale(self):
+        from finances import closing
+
+        compute = closing.compute_period_totals
+
+        def compute_then_write(branch, month):
+            totals = compute(branch, month)
+            self._transaction(Transaction.TransactionType.RENT, 20, month, day=3)
+            return totals
+
+        with mock.patch.object(
+            closing, "compute_period_totals", side_effect=compute_then_write
+        ):
+            self.assertFalse(close_period(self.branch, self.closed))
+        self.assertTrue(self._snapshot().is_stale)
+
+    def test_writes_to_the_open_month_cost_no_query(self):
+        with self.assertNumQueries(0):
+            invalidate_period(self.business.id, self.branch.id, timezone.now())
+
+    def test_summary_previous_month_reads_snapshot(self):
+        close_period(self.branch, self.last)
+        Transaction.objects.filter(pk=self.last_sale.pk).update(total_paid_amount=999)
+
+        response = self.client.get(
+            reverse("finance-summary"), {"branch_id": self.branch.id}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["previous_month_income"], Decimal("50"))
+        self.assertEqual(response.data["previous_month_total_sales"], Decimal("50"))
+
+    def test_finance_report_comparison_reads_whole_closed_months(self):
+        close_period(self.branch, self.closed)
+        Transaction.objects.filter(pk=self.expense.pk).update(total_paid_amount=999)
+
+        # The previous window spans all of the closed month (from its
+        # snapshot) and the first half of last month (live).
+        start = self.last.replace(day=15)
+        response = self.client.get(
+            reverse("finance-report"),
+            {
+                "branch_id": self.branch.id,
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=60)).isoformat(),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        comparison = response.data["period_comparison"]
+        self.assertEqual(Decimal(comparison["previous_income"]), Decimal("150"))
+        self.assertEqual(Decimal(comparison["previous_expense"]), Decimal("30"))
+
+
+class FinanceReportBreakdownTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="breakdown@example.com", password="password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.business = Business.objects.create(
+            name="Breakdown Business", owner=self.user
+        )
+        self.branch = Branch.objects.get(business=self.business)
+        self.cash = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CASH"
+        )
+        self.credit = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CREDIT"
+        )
+        self.today = timezone.localdate()
+
+        T = Transaction.TransactionType
+        old_order = Order.objects.create(
+            business=self.business, branch=self.branch, total_payable=20
+        )
+        Order.objects.filter(pk=old_order.pk).update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        new_order = Order.objects.create(
+            business=self.business, branch=self.branch, total_payable=50
+        )
+        for type, amount, payment_method, order in [
+            (T.SALE, 100, self.cash, None),
+            (T.SALE, 50, self.cash, new_order),
+            (T.EXPENSE, 30, self.cash, None),
+            (T.REFUND, -5, self.cash, new_order),
+            (T.REFUND, -8, self.cash, old_order),
+            (T.SALE, 70, self.credit, None),
+            (T.DEBT, 40, self.credit, None),
+            (T.SALE, 9, None, None),
+        ]:
+            Transaction.objects.create(
+                type=type,
+                total_paid_amount=amount,
+                payment_method=payment_method,
+                order=order,
+                business=self.business,
+                branch=self.branch,
+            )
+
+    def _report(self, **params):
+        response = self.client.get(
+            reverse("finance-report"),
+            {
+                "branch_id": self.branch.id,
+                "start_date": (self.today - timedelta(days=1)).isoformat(),
+                "end_date": (self.today + timedelta(days=1)).isoformat(),
+                **params,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {
+            row["payment_method_name"]: row
+            for row in response.data["by_payment_method"]
+        }
+
+    def test_breakdown_per_payment_method(self):
+        rows = self._report()
+
+        cash = rows["Cash"]
+        self.assertEqual(Decimal(cash["total_income"]), Decimal("137"))
+        self.assertEqual(Decimal(cash["total_expense"]), Decimal("30"))
+        self.assertEqual(Decimal(cash["total_refunds"]), Decimal("-13"))
+        self.assertEqual(Decimal(cash["total_sales"]), Decimal("150"))
+        self.assertEqual(Decimal(cash["net_sales"]), Decimal("145"))
+        self.assertEqual(Decimal(cash["net_cash"]), Decimal("137"))
+        self.assertEqual(Decimal(cash["period_sales_refunds"]), Decimal("-5"))
+        self.assertEqual(Decimal(cash["outside_period_sales_refunds"]), Decimal("-8"))
+        self.assertEqual(cash["transaction_count"], 5)
+
+        credit = rows["Credit"]
+        self.assertTrue(credit["is_credit"])
+        self.assertEqual(Decimal(credit["pending_receivables"]), Decimal("70"))
+        self.assertEqual(Decimal(credit["pending_payables"]), Decimal("40"))
+        self.assertEqual(Decimal(rows["Unknown"]["total_sales"]), Decimal("9"))
+
+    def test_type_filter_keeps_real_refunds_and_sales(self):
+        cash = self._report(transaction_type="EXPENSE")["Cash"]
+
+        self.assertEqual(Decimal(cash["total_expense"]), Decimal("30"))
+        self.assertEqual(Decimal(cash["total_refunds"]), Decimal("-13"))
+        self.assertEqual(Decimal(cash["total_sales"]), Decimal("150"))
+        self.assertEqual(cash["transaction_count"], 1)
+
+    def test_breakdown_query_count_does_not_grow_with_payment_methods(self):
+        with CaptureQueriesContext(connection) as few:
+            self._report()
+        payment = PaymentMethod.objects.create(name="Bank", short_name="Bank")
+        for n in range(5):
+            BusinessPaymentMethod.objects.create(
+                business=self.business,
+                branch=self.branch,
+                payment=payment,
+                label=f"Bank {n}",
+            )
+        with CaptureQueriesContext(connection) as many:
+            rows = self._report()
+
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+
+
+class CreditSettlementTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="settle@example.com", password="password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.business = Business.objects.create(name="Settle Business", owner=self.user)
+        self.branch = Branch.objects.get(business=self.business)
+        self.cash = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CASH"
+        )
+        self.credit = BusinessPaymentMethod.objects.get(
+            branch=self.branch, identifier="CREDIT"
+        )
+
+    def _transaction(self, type, amount, payment_method, days_ago=0):
+        return Transaction.objects.create(
+            type=type,
+            total_paid_amount=amount,
+            payment_method=payment_method,
+            business=self.business,
+            branch=self.branch,
+            created_at=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def _settle(self, transaction, **data):
+        return self.client.post(
+            reverse("transaction-settle", args=[transaction.pk]),
+            {"payment_method": str(self.cash.pk), **data},
+            format="json",
+        )
+
+    def _aging(self):
+        response = self.client.get(
+            reverse("finance-open-credit-aging"), {"branch_id": self.branch.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_credit_transactions_start_open(self):
+        T = Transaction.TransactionType
+        credit_sale = self._transaction(T.SALE, 50, self.credit)
+        cash_sale = self._transaction(T.SALE, 50, self.cash)
+
+        self.assertEqual(credit_sale.settlement_state, Transaction.SettlementState.OPEN)
+        self.assertIsNone(cash_sale.settlement_state)
+
+    def test_settle_records_state_amount_and_link(self):
+        receivable = self._transaction(
+            Transaction.TransactionType.SALE, 50, self.credit
+        )
+
+        response = self._settle(receivable, amount="30")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        receivable.refresh_from_db()
+        self.assertEqual(
+            receivable.settlement_state, Transaction.SettlementState.SETTLED
+        )
+        self.assertEqual(receivable.settled_amount, Decimal("30"))
+        self.assertEqual(str(receivable.settled_by_id), response.data["id"])
+        self.assertIsNone(receivable.category)
+
+        data = self.client.get(reverse("transaction-detail", args=[receivable.pk])).data
+        self.assertTrue(data["is_settled"])
+        self.assertEqual(data["settled_by"], receivable.settled_by_id)
+
+        self.assertEqual(
+            self._settle(receivable).status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_settled_credit_leaves_pending_totals(self):
+        T = Transaction.TransactionType
+        receivable = self._transaction(T.SALE, 50, self.credit)
+        self._transaction(T.SALE, 20, self.credit)
+        self._transaction(T.PURCHASE, 15, self.credit)
+
+        self._settle(receivable)
+        summary = self.client.get(
+            reverse("finance-summary"), {"branch_id": self.branch.id}
+        ).data
+
+        self.assertEqual(summary["pending_receivables"], Decimal("20.00"))
+        self.assertEqual(summary["pending_payables"], Decimal("15.00"))
+
+    def test_supply_debt_settlement(self):
+        supply = Supply.objects.create(
+            label="On credit",
+            branch=self.branch,
+            business=self.business,
+            payment_method=self.credit,
+            total_cost=80,
+        )
+        debt = Transaction.objects.get(
+            category=f"supply:{supply.pk}", type=Transaction.TransactionType.DEBT
+        )
+        self.assertEqual(debt.settlement_state, Transaction.SettlementState.OPEN)
+
+        url = reverse("supplies-settle-debt", args=[supply.pk])
+        response = self.client.post(
+            url, {"payment_method": str(self.cash.pk)}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        debt.refresh_from_db()
+        self.assertEqual(debt.settlement_state, Transaction.SettlementState.SETTLED)
+        self.assertEqual(debt.settled_amount, Decimal("80"))
+        self.assertEqual(debt.settled_by.category, f"supply:{supply.pk}:paid")
+
+        response = self.client.post(
+            url, {"payment_method": str(self.cash.pk)}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_aging_buckets_open_credit_by_age(self):
+        T = Transaction.TransactionType
+        for days_ago, amount in [(2, 10), (30, 5), (31, 20), (75, 30), (200, 40)]:
+            self._transaction(T.SALE, amount, self.credit, days_ago=days_ago)
+        self._transaction(T.DEBT, 25, self.credit, days_ago=45)
+        self._transaction(T.SALE, 99, self.cash, days_ago=2)
+        self._settle(self._transaction(T.SALE, 60, self.credit, days_ago=3))
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self._aging()
+
+        receivables = {row["bucket"]: row for row in data["receivables"]}
+        self.assertEqual(Decimal(receivables["0-30"]["amount"]), Decimal("15"))
+        self.assertEqual(receivables["0-30"]["count"], 2)
+        self.assertEqual(Decimal(receivables["31-60"]["amount"]), Decimal("20"))
+        self.assertEqual(Decimal(receivables["61-90"]["amount"]), Decimal("30"))
+        self.assertEqual(Decimal(receivables["90+"]["amount"]), Decimal("40"))
+        self.assertEqual(Decimal(data["total_receivables"]), Decimal("105"))
+
+        payables = {row["bucket"]: row for row in data["payables"]}
+        self.assertEqual(Decimal(payables["31-60"]["amount"]), Decimal("25"))
+        self.assertEqual(Decimal(data["total_payables"]), Decimal("25"))
+
+        transaction_queries = [
+            q
+            for q in queries.captured_queries
+            if 'FROM "finances_transaction"' in q["sql"]
+        ]
+        self.assertEqual(len(transaction_queries), 1)
+
+
+TELEBIRR_RECEIPT = """
+<table>
+  <tr><td>Payer Name</td><td>Abebe Kebede</td></tr>
+  <tr><td>Credited Party name</td><td>Shop Owner</td></tr>
+  <tr><td>Credited party account no</td><td>2519****2063</td></tr>
+  <tr><td>transaction status</td><td>Completed</td></tr>
+  <tr>
+    <td class="receipttableTd2">Invoice No.</td><td>Payment date</td>
+    <td>Settled Amount</td>
+  </tr>
+  <tr>
+    <td class="receipttableTd2">{transaction_id}</td>
+    <td>01-10-2026 10:00:00</td><td>100.00 Birr</td>
+  </tr>
+</table>
+"""
+
+
+class _ReceiptStubHandler(BaseHTTPRequestHandler):
+    """Telebirr receipt pages served over keep-alive connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        status_code = self.server.status_code
+        transaction_id = self.path.rsplit("/", 1)[-1]
+        body = (
+            TELEBIRR_RECEIPT.format(transaction_id=transaction_id)
+            if status_code == 200
+            else "unavailable"
+        ).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class PaymentVerificationServiceTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _ReceiptStubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(
+            TELEBIRR_BASE_URL=f"http://127.0.0.1:{cls.server.server_port}/receipt"
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.server.connections = 0
+        self.server.paths = []
+        self.server.status_code = 200
+        close_sessions("payments:")
+        service._breakers.clear()
+
+        self.user = User.objects.create_user(
+            email="verify@example.com", password="password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        business = Business.objects.create(name="Verify Business", owner=self.user)
+        self.telebirr = BusinessPaymentMethod.objects.create(
+            payment=PaymentMethod.objects.create(
+                name="Telebirr", short_name="telebirr"
+            ),
+            business=business,
+            branch=Branch.objects.get(business=business),
+            receiver_name="Shop Owner",
+            identifier="0911222063",
+        )
+
+    def _verify(self, transaction_id, **kwargs):
+        return PaymentVerifier(
+            transaction_id=transaction_id,
+            provider="telebirr",
+            account="0911222063",
+            expected_receiver_name="Shop Owner",
+            **kwargs,
+        ).verify_transaction()
+
+    def test_verifications_share_a_pooled_connection(self):
+        for transaction_id in ("CJ1", "CJ2", "CJ3"):
+            self.assertTrue(self._verify(transaction_id).is_valid)
+
+        self.assertEqual(len(self.server.paths), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_successful_lookup_is_cached(self):
+        first = self._verify("CJ1", expected_amount=Decimal("100"))
+        retried = self._verify("CJ1", expected_amount=Decimal("90"))
+
+        self.assertTrue(first.is_valid)
+        # The cached receipt is still checked against the new expectations.
+        self.assertFalse(retried.is_valid)
+        self.assertEqual(self.server.paths, ["/receipt/CJ1"])
+
+    def test_breaker_opens_after_repeated_provider_failures(self):
+        self.server.status_code = 503
+        for attempt in range(service.BREAKER_FAILURE_THRESHOLD):
+            self.assertFalse(self._verify(f"CJ{attempt}").is_valid)
+
+        result = self._verify("CJ-next")
+
+        self.assertFalse(result.is_valid)
+        self.assertIn("retry_after", result.extra)
+        self.assertEqual(len(self.server.paths), service.BREAKER_FAILURE_THRESHOLD)
+
+        # The hint reaches API clients too.
+        response = self.client.post(
+            reverse("payment-verifications-list"),
+            {
+                "transaction_id": "CJ-api",
+                "business_payment_method": str(self.telebirr.pk),
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.data["is_valid"])
+        self.assertGreaterEqual(response.data["extra"]["retry_after"], 1)
+        self.assertEqual(len(self.server.paths), service.BREAKER_FAILURE_THRESHOLD)
+
+    def test_missing_receipt_does_not_trip_breaker(self):
+        self.server.status_code = 404
+        for attempt in range(service.BREAKER_FAILURE_THRESHOLD + 1):
+            self._verify(f"CJ{attempt}")
+
+        self.assertEqual(len(self.server.paths), service.BREAKER_FAILURE_THRESHOLD + 1)
+
+    def test_asynchronous_verification(self):
+        url = reverse("payment-verifications-list")
+        with mock.patch.object(verify_payment_task, "delay") as delay:
+            response = self.client.post(
+                url,
+                {
+                    "transaction_id": "CJ1",
+                    "business_payment_method": str(self.telebirr.pk),
+                    "expected_amount": "100.00",
+                    "asynchronous": True,
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.server.paths, [])
+        verification_id = response.data["verification_id"]
+        detail_url = reverse("payment-verifications-detail", args=[verification_id])
+        self.assertEqual(self.client.get(detail_url).data["status"], "PENDING")
+
+        verify_payment_task(*delay.call_args.args)
+
+        data = self.client.get(detail_url).data
+        self.assertEqual(data["status"], "DONE")
+        self.assertTrue(data["is_valid"])
+
+        stranger = User.objects.create_user(
+            email="stranger@example.com", password="password123"
+        )
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(
+            self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_asynchronous_verification_runs_inline_when_queueing_fails(self):
+        url = reverse("payment-verifications-list")
+        verification_id = "00000000-0000-0000-0000-000000000001"
+        with (
+            mock.patch.object(
+                verify_payment_task, "delay", side_effect=ConnectionError("broker down")
+            ),
+            mock.patch.object(service.uuid, "uuid4", return_value=verification_id),
+        ):
+            response = self.client.post(
+                url,
+                {
+                    "transaction_id": "CJ1",
+                    "business_payment_method": str(self.telebirr.pk),
+                    "asynchronous": True,
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data["is_valid"])
+        self.assertEqual(response.data["extra"], {})
+        # No PENDING state is left behind for a verification that never ran.
+        self.assertIsNone(cache.get(service.VERIFICATION_KEY.format(verification_id)))
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class CBEReceiptParserTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.verifier = CBEVerifier(receiver_account="1000331456385")
+
+    def test_extracts_fields_from_both_layouts(self):
+        sample = CBE_SAMPLES[0]
+        for columns in (False, True):
+            data = self.verifier.parse_pdf(
+                "FT26115CJJ8J", build_cbe_pdf(sample, columns=columns)
+            )
+
+            self.assertEqual(data.transaction_id, sample["transaction_id"])
+            self.assertEqual(data.amount, Decimal(sample["amount"]))
+            self.assertEqual(data.sender_name, sample["sender_name"])
+            self.assertEqual(data.receiver_name, sample["receiver_name"])
+            self.assertEqual(data.receiver_account, sample["receiver_account"])
+            self.assertEqual(data.timestamp.isoformat(), sample["timestamp"])
+
+    def test_parsed_receipt_is_cached_by_content(self):
+        pdf = build_cbe_pdf(CBE_SAMPLES[0])
+        with mock.patch.object(
+            CBEVerifier, "extract_text", wraps=CBEVerifier.extract_text
+        ) as extract_text:
+            first = self.verifier.parse_pdf("FT26115CJJ8J", pdf)
+            again = self.verifier.parse_pdf("FT26115CJJ8J", pdf)
+            self.verifier.parse_pdf("FT26115CJJ8J", build_cbe_pdf(CBE_SAMPLES[1]))
+
+        self.assertEqual(first, again)
+        self.assertEqual(extract_text.call_count, 2)
+
+    def test_benchmark_parses_synthetic_receipts_exactly(self):
+        out = StringIO()
+        call_command("bench_receipt_parsers", "--strict", "--repeat", "1", stdout=out)
+
+        self.assertIn("cbe: 4 receipt(s)", out.getvalue())
+        self.assertIn("accuracy 6/6 fields", out.getvalue())
@@ -22,4 +22,5 @@ urlpatterns = [
     path("summary/", summary, name="finance-summary"),
     path("reports/", reports, name="finance-reports"),
     path("finance-report/", finance_report, name="finance-report"),
+    path("open-credit-aging/", open_credit_aging, name="finance-open-credit-aging"),
 ] + router.urls
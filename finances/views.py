@@ -1,16 +1,29 @@
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from datetime import timezone as dt_timezone
 from decimal import Decimal
 
 from django.db import transaction as db_transaction
-from django.db.models import Avg, Count, F, Q, Sum
-from django.db.models.functions import Coalesce, TruncDate
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
 from django.utils import timezone
 from guardian.shortcuts import get_objects_for_user
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -26,16 +39,25 @@ from business.permissions import (
 )
 from core.idempotency import idempotent
 from core.utils import is_valid_uuid
+from finances.closing import decimal_amounts, fresh_snapshots, snapshot_window
 from finances.filters import BusinessPaymentMethodFilter, TransactionFilter
+from finances.payments.service import get_verification, queue_verification
 from inventories.models import Item, SuppliedItem
 from orders.models import Order, OrderItem
 
-from .models import BusinessPaymentMethod, PaymentMethod, Transaction
+from .models import (
+    BusinessPaymentMethod,
+    DailyPaymentMethodBalance,
+    PaymentMethod,
+    PaymentMethodBalance,
+    Transaction,
+)
 from .serializers import (
     AccountSerializer,
     BusinessPaymentMethodSerializer,
     FinanceReportSerializer,
     FinanceSummarySerializer,
+    OpenCreditAgingSerializer,
     PaymentMethodSerializer,
     PaymentVerificationSerializer,
     ReportsSerializer,
@@ -43,6 +65,17 @@ from .serializers import (
     TransactionSerializer,
 )
 
+# Upper bound on ``history_months`` in the reports endpoint.
+MAX_HISTORY_MONTHS = 60
+
+# Age buckets of the open-credit aging report: (label, min days, max days).
+AGING_BUCKETS = [
+    ("0-30", 0, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+]
+
 
 class TransactionViewset(
     CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet
@@ -119,10 +152,7 @@ class TransactionViewset(
             )
 
         # Prevent double-settlement.
-        if transaction.category and (
-            transaction.category.endswith(":settled")
-            or transaction.category.endswith(":paid")
-        ):
+        if transaction.settlement_state == Transaction.SettlementState.SETTLED:
             raise ValidationError(
                 {"detail": "This transaction has already been settled."}
             )
@@ -172,23 +202,27 @@ class TransactionViewset(
         else:
             settle_type = Transaction.TransactionType.PURCHASE
 
-        # Mark original transaction as settled (append :settled to category).
-        original_category = transaction.category or ""
-        transaction.category = (
-            f"{original_category}:settled" if original_category else "settled"
-        )
-        transaction.save(update_fields=["category"])
-
-        # Create settlement transaction.
-        settlement = Transaction.objects.create(
-            type=settle_type,
-            total_paid_amount=settle_amount,
-            payment_method=payment_method,
-            business=transaction.business,
-            branch=transaction.branch,
-            category=f"settled:{transaction.id}",
-            created_by=request.user,
-        )
+        with db_transaction.atomic():
+            # Re-check under a row lock so concurrent requests cannot both
+            # settle the same credit.
+            transaction = Transaction.objects.select_for_update().get(pk=transaction.pk)
+            if transaction.settlement_state == Transaction.SettlementState.SETTLED:
+                raise ValidationError(
+                    {"detail": "This transaction has already been settled."}
+                )
+
+            settlement = Transaction.objects.create(
+                type=settle_type,
+                total_paid_amount=settle_amount,
+                payment_method=payment_method,
+                business=transaction.business,
+                branch=transaction.branch,
+                category=f"settled:{transaction.id}",
+                created_by=request.user,
+            )
+            # A partial payment settles the credit too; settled_amount
+            # records how much of it was actually paid.
+            transaction.mark_settled(settlement, settle_amount)
 
         return Response(
             TransactionSerializer(settlement).data, status=status.HTTP_201_CREATED
@@ -226,39 +260,35 @@ class AccountViewset(ListModelMixin, GenericViewSet):
         queryset = filter_queryset_by_branch(
             self.queryset, self.request, "businesspaymentmethod"
         )
-        # Annotate the balance with two conditional sums over the single
-        # ``transactions`` relation instead of running two aggregation queries
-        # per account row in the serializer (was an N+1 of 2*page_size queries).
-        return (
-            queryset.filter(business=self.request.business)
-            .select_related("payment")
-            .annotate(
-                _income_refund_total=Coalesce(
-                    Sum(
-                        "transactions__total_paid_amount",
-                        filter=Q(
-                            transactions__type__in=[
-                                *Transaction.INCOME_TYPES,
-                                Transaction.TransactionType.REFUND,
-                            ]
-                        ),
-                    ),
-                    Decimal("0.00"),
-                ),
-                _expense_debt_total=Coalesce(
-                    Sum(
-                        "transactions__total_paid_amount",
-                        filter=Q(
-                            transactions__type__in=[
-                                *Transaction.EXPENSE_TYPES,
-                                Transaction.TransactionType.DEBT,
-                            ]
-                        ),
+        # Balances come from the per-account ledger row (one join) instead of
+        # summing every transaction the account ever had on each request.
+        queryset = queryset.filter(business=self.request.business).select_related(
+            "payment", "ledger"
+        )
+
+        as_of = self.request.query_params.get("as_of")
+        if as_of:
+            try:
+                as_of = datetime.strptime(as_of, "%Y-%m-%d").date()
+            except ValueError:
+                raise ValidationError(
+                    {"detail": "Invalid as_of format. Use YYYY-MM-DD."}
+                )
+            # Closing balance of the latest day with activity on or before
+            # as_of: one lookup on the (payment_method, date) unique index.
+            queryset = queryset.annotate(
+                _balance_as_of=Coalesce(
+                    Subquery(
+                        DailyPaymentMethodBalance.objects.filter(
+                            payment_method=OuterRef("pk"), date__lte=as_of
+                        )
+                        .order_by("-date")
+                        .values("closing_balance")[:1]
                     ),
                     Decimal("0.00"),
-                ),
+                )
             )
-        )
+        return queryset
 
 
 @api_view(["GET"])
@@ -297,7 +327,7 @@ def summary(request):
         if not is_valid_uuid(branch_id):
             raise ValidationError({"detail": "Invalid branch ID format"})
         try:
-            branch = Branch.objects.get(id=branch_id)
+            branch = Branch.objects.select_related("business").get(id=branch_id)
             if business and branch.business != business:
                 raise ValidationError(
                     {"detail": "Branch does not belong to the specified business"}
@@ -343,88 +373,113 @@ def summary(request):
     previous_month_end = current_month_start - timedelta(seconds=1)
     year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
 
-    # Get all transactions for the business/branch
+    # Every transaction metric below — balances, receivables/payables and
+    # per-period income/expense/sales/refunds — is a filtered SUM in one
+    # aggregate over the branch's transactions.
     transactions = Transaction.objects.filter(transaction_filter)
 
-    # Calculate total assets (sum of all payment method balances)
-    # Assets = SALE + REFUND - EXPENSE - DEBT across all payment methods
+    # Assets = SALE + REFUND - EXPENSE - DEBT across the branch's payment
+    # methods (refunds are stored negative).  With full report access that is
+    # the sum of the accounts' running balances; a plain employee's share of
+    # it is summed from their own transactions below.
     payment_methods_filter = Q(business=business)
     if branch:
         payment_methods_filter &= Q(branch=branch)
     else:
         payment_methods_filter &= Q(branch__isnull=True)
-    payment_methods = BusinessPaymentMethod.objects.filter(payment_methods_filter)
-
-    total_assets = Decimal("0.00")
-    for pm in payment_methods:
-        pm_transactions = transactions.filter(payment_method=pm)
-        income_refund_total = pm_transactions.filter(
-            type__in=[
-                *Transaction.INCOME_TYPES,
-                Transaction.TransactionType.REFUND,
-            ]
-        ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
-        expense_debt_total = pm_transactions.filter(
-            type__in=[
-                *Transaction.EXPENSE_TYPES,
-                Transaction.TransactionType.DEBT,
-            ]
-        ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
-        total_assets += income_refund_total - expense_debt_total
-
-    # Pending receivables/payables: transactions recorded against the CREDIT
-    # payment method that have not yet been settled.
-    credit_pm_filter = Q(payment_method__identifier="CREDIT")
-    not_settled_filter = ~Q(category__endswith=":settled") & ~Q(
-        category__endswith=":paid"
-    )
+    branch_payment_methods = BusinessPaymentMethod.objects.filter(
+        payment_methods_filter
+    ).values("pk")
+    branch_pm = Q(payment_method__in=branch_payment_methods)
+    assets_from_ledger = own_tx_filter == Q()
+
+    # Pending receivables/payables: credit transactions not yet settled.
+    open_credit = Q(settlement_state=Transaction.SettlementState.OPEN)
+
+    income = Q(type__in=Transaction.INCOME_TYPES)
+    expense = Q(type__in=Transaction.EXPENSE_TYPES)
+    sale = Q(type=Transaction.TransactionType.SALE)
+    refund = Q(type=Transaction.TransactionType.REFUND)
+    debt = Q(type=Transaction.TransactionType.DEBT)
+
+    periods = {
+        "monthly": Q(created_at__gte=current_month_start),
+        "previous_month": Q(
+            created_at__gte=previous_month_start, created_at__lte=previous_month_end
+        ),
+        "year_to_date": Q(created_at__gte=year_start),
+    }
 
-    pending_receivables = transactions.filter(
-        credit_pm_filter, type__in=Transaction.INCOME_TYPES
-    ).filter(not_settled_filter).aggregate(total=Sum("total_paid_amount"))[
-        "total"
-    ] or Decimal(
-        "0.00"
-    )
+    def paid(condition):
+        return Sum("total_paid_amount", filter=condition)
 
-    pending_payables = transactions.filter(
-        credit_pm_filter,
-        type__in=[*Transaction.EXPENSE_TYPES, Transaction.TransactionType.DEBT],
-    ).filter(not_settled_filter).aggregate(total=Sum("total_paid_amount"))[
-        "total"
-    ] or Decimal(
-        "0.00"
-    )
+    metrics = {
+        "pending_receivables": paid(open_credit & income),
+        "pending_payables": paid(open_credit & (expense | debt)),
+        "monthly_transactions": Count("pk", filter=periods["monthly"]),
+    }
+    if not assets_from_ledger:
+        metrics["assets_in"] = paid(branch_pm & (income | refund))
+        metrics["assets_out"] = paid(branch_pm & (expense | debt))
+
+    # The closed months of the previous-month and year-to-date windows are
+    # read from monthly-close snapshots (full report access only, as they
+    # hold branch-wide totals); the aggregate covers only the rest.
+    period_kinds = {
+        "income": Transaction.INCOME_TYPES,
+        "expense": Transaction.EXPENSE_TYPES,
+        "sales": [Transaction.TransactionType.SALE],
+        "refunds": [Transaction.TransactionType.REFUND],
+    }
+    frozen = {}
+    if own_tx_filter == Q():
+        for period, start, end in (
+            ("previous_month", previous_month_start, current_month_start),
+            ("year_to_date", year_start, None),
+        ):
+            frozen[period], live = snapshot_window(branch, start, end)
+            if live is None:
+                del periods[period]
+            else:
+                periods[period] = live
+
+    for period, in_period in periods.items():
+        metrics[f"{period}_income"] = paid(in_period & income)
+        metrics[f"{period}_expense"] = paid(in_period & expense)
+        metrics[f"{period}_sales"] = paid(in_period & sale)
+        metrics[f"{period}_refunds"] = paid(in_period & refund)
+
+    totals = defaultdict(
+        lambda: Decimal("0.00"),
+        {
+            name: value if value is not None else Decimal("0.00")
+            for name, value in transactions.aggregate(**metrics).items()
+        },
+    )
+    for period, type_totals in frozen.items():
+        for kind, types in period_kinds.items():
+            totals[f"{period}_{kind}"] += sum(
+                (type_totals.get(type, Decimal("0")) for type in types),
+                Decimal("0.00"),
+            )
 
+    if assets_from_ledger:
+        total_assets = PaymentMethodBalance.objects.filter(
+            payment_method__in=branch_payment_methods
+        ).aggregate(total=Coalesce(Sum("balance"), Decimal("0.00")))["total"]
+    else:
+        total_assets = totals["assets_in"] - totals["assets_out"]
+    pending_receivables = totals["pending_receivables"]
+    pending_payables = totals["pending_payables"]
     total_liabilities = pending_payables
 
     # Net worth
     net_worth = total_assets - total_liabilities
 
-    def _sales_and_refunds(qs):
-        """Return (total_sales, net_sales) for a transaction queryset.
-
-        total_sales is gross SALE revenue; net_sales deducts refunds
-        (refunds are stored negative, so it's an addition).
-        """
-        sales = qs.filter(type=Transaction.TransactionType.SALE).aggregate(
-            total=Sum("total_paid_amount")
-        )["total"] or Decimal("0.00")
-        refunds = qs.filter(type=Transaction.TransactionType.REFUND).aggregate(
-            total=Sum("total_paid_amount")
-        )["total"] or Decimal("0.00")
-        return sales, sales + refunds
-
-    # Current month calculations
-    current_month_transactions = transactions.filter(
-        created_at__gte=current_month_start
-    )
-    monthly_income = current_month_transactions.filter(
-        type__in=Transaction.INCOME_TYPES
-    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
-    monthly_expense = current_month_transactions.filter(
-        type__in=Transaction.EXPENSE_TYPES
-    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
+    # total_sales is gross SALE revenue; net_sales deducts refunds (refunds
+    # are stored negative, so it's an addition).
+    monthly_income = totals["monthly_income"]
+    monthly_expense = totals["monthly_expense"]
     monthly_cash_flow = monthly_income - monthly_expense
     monthly_profit = monthly_cash_flow  # Assuming profit = cash flow for now
     monthly_profit_margin = (
@@ -432,45 +487,35 @@ def summary(request):
         if monthly_income > 0
         else Decimal("0.00")
     )
-    monthly_total_sales, monthly_net_sales = _sales_and_refunds(
-        current_month_transactions
-    )
+    monthly_total_sales = totals["monthly_sales"]
+    monthly_net_sales = monthly_total_sales + totals["monthly_refunds"]
 
     # Previous month calculations
-    previous_month_transactions = transactions.filter(
-        created_at__gte=previous_month_start, created_at__lte=previous_month_end
-    )
-    previous_month_income = previous_month_transactions.filter(
-        type__in=Transaction.INCOME_TYPES
-    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
-    previous_month_expense = previous_month_transactions.filter(
-        type__in=Transaction.EXPENSE_TYPES
-    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
+    previous_month_income = totals["previous_month_income"]
+    previous_month_expense = totals["previous_month_expense"]
     previous_month_profit = previous_month_income - previous_month_expense
-    previous_month_total_sales, previous_month_net_sales = _sales_and_refunds(
-        previous_month_transactions
+    previous_month_total_sales = totals["previous_month_sales"]
+    previous_month_net_sales = (
+        previous_month_total_sales + totals["previous_month_refunds"]
     )
 
     # Year to date calculations
-    ytd_transactions = transactions.filter(created_at__gte=year_start)
-    year_to_date_income = ytd_transactions.filter(
-        type__in=Transaction.INCOME_TYPES
-    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
-    year_to_date_expense = ytd_transactions.filter(
-        type__in=Transaction.EXPENSE_TYPES
-    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0.00")
+    year_to_date_income = totals["year_to_date_income"]
+    year_to_date_expense = totals["year_to_date_expense"]
     year_to_date_profit = year_to_date_income - year_to_date_expense
-    year_to_date_total_sales, year_to_date_net_sales = _sales_and_refunds(
-        ytd_transactions
-    )
+    year_to_date_total_sales = totals["year_to_date_sales"]
+    year_to_date_net_sales = year_to_date_total_sales + totals["year_to_date_refunds"]
 
     # Monthly transactions count
-    monthly_transactions = current_month_transactions.count()
+    monthly_transactions = totals["monthly_transactions"]
 
-    # Orders counts
-    orders = Order.objects.filter(order_filter)
-    completed_orders = orders.filter(status=Order.StatusChoices.COMPLETED).count()
-    pending_orders = orders.filter(status=Order.StatusChoices.PENDING).count()
+    # Orders counts — one conditional aggregate.
+    order_counts = Order.objects.filter(order_filter).aggregate(
+        completed=Count("pk", filter=Q(status=Order.StatusChoices.COMPLETED)),
+        pending=Count("pk", filter=Q(status=Order.StatusChoices.PENDING)),
+    )
+    completed_orders = order_counts["completed"]
+    pending_orders = order_counts["pending"]
 
     # In-store inventory value at selling price (current stock on hand).
     total_inventory_value = _get_inventory_value(request, business, branch)
@@ -895,6 +940,64 @@ def _month_range(year, month):
     return start, end
 
 
+def _shift_month(year, month, months):
+    """(year, month) moved by ``months`` (negative goes back)."""
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def _monthly_income_totals(order_filter):
+    """
+    ``{(year, month): revenue}`` of the order items matching ``order_filter``,
+    grouped by the (UTC) month the order was placed. Line revenue is valued
+    as in _get_income_by_category: the line price, else the batch's selling
+    price.
+    """
+    unit_price = Case(
+        When(Q(price__isnull=False) & ~Q(price=0), then=F("price")),
+        When(
+            Q(supplied_item__selling_price__isnull=False)
+            & ~Q(supplied_item__selling_price=0),
+            then=F("supplied_item__selling_price"),
+        ),
+        default=Value(Decimal("0")),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    rows = (
+        OrderItem.objects.filter(order_filter)
+        .annotate(month=TruncMonth("order__created_at", tzinfo=dt_timezone.utc))
+        .values("month")
+        .annotate(
+            total=Sum(
+                ExpressionWrapper(
+                    F("quantity") * unit_price,
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                )
+            )
+        )
+        .order_by("month")
+    )
+    return {(row["month"].year, row["month"].month): row["total"] for row in rows}
+
+
+def _monthly_expense_totals(transaction_filter):
+    """
+    ``{(year, month): total}`` of expense transactions matching
+    ``transaction_filter`` (the types _get_expense_by_category breaks down),
+    grouped by the (UTC) month they were recorded.
+    """
+    rows = (
+        Transaction.objects.filter(
+            transaction_filter, type__in=Transaction.EXPENSE_TYPES
+        )
+        .annotate(month=TruncMonth("created_at", tzinfo=dt_timezone.utc))
+        .values("month")
+        .annotate(total=Sum("total_paid_amount"))
+        .order_by("month")
+    )
+    return {(row["month"].year, row["month"].month): row["total"] for row in rows}
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def reports(request):
@@ -905,7 +1008,8 @@ def reports(request):
       - business / business_id (required)
       - branch / branch_id (optional)
       - date: YYYY-MM (month to report on, defaults to current month)
-      - history_months: int (number of past months in historical_data, default 12)
+      - history_months: int (number of past months in historical_data, default 12,
+        capped at MAX_HISTORY_MONTHS)
 
     Returns income/expense breakdown by category, profit metrics, and
     historical monthly data for the requested date range.
@@ -939,6 +1043,7 @@ def reports(request):
             history_months = 12
     except ValueError:
         history_months = 12
+    history_months = min(history_months, MAX_HISTORY_MONTHS)
 
     # Date range for the requested month
     period_start, period_end = _month_range(report_year, report_month)
@@ -959,17 +1064,35 @@ def reports(request):
         & own_order_item_filter
     )
 
-    # Monthly income by category (from order items)
+    history = [
+        _shift_month(report_year, report_month, -i)
+        for i in range(history_months - 1, -1, -1)
+    ]
+    # Closed months are read from their monthly-close snapshots. Snapshots
+    # hold branch-wide totals, so only with full report access.
+    snapshots = {}
+    if own_tx_filter == Q():
+        snapshots = fresh_snapshots(
+            branch, [date(year, month, 1) for year, month in history]
+        )
+    report_snapshot = snapshots.get(date(report_year, report_month, 1))
+
     month_order_filter = base_order_filter & Q(
         order__created_at__gte=period_start, order__created_at__lte=period_end
     )
-    monthly_income_by_category = _get_income_by_category(month_order_filter)
-
-    # Monthly expense by category (from expense transactions)
     month_tx_filter = base_tx_filter & Q(
         created_at__gte=period_start, created_at__lte=period_end
     )
-    monthly_expense_by_category = _get_expense_by_category(month_tx_filter)
+    if report_snapshot:
+        monthly_income_by_category = decimal_amounts(report_snapshot.income_by_category)
+        monthly_expense_by_category = decimal_amounts(
+            report_snapshot.expense_by_category
+        )
+    else:
+        # Monthly income by category (from order items)
+        monthly_income_by_category = _get_income_by_category(month_order_filter)
+        # Monthly expense by category (from expense transactions)
+        monthly_expense_by_category = _get_expense_by_category(month_tx_filter)
 
     total_monthly_income = sum(monthly_income_by_category.values(), Decimal("0"))
     total_monthly_expense = sum(monthly_expense_by_category.values(), Decimal("0"))
@@ -1011,32 +1134,42 @@ def reports(request):
         end_inclusive=True,
     )
 
-    # Historical data: last N months ending at the report month
-    historical_data = []
-    for i in range(history_months - 1, -1, -1):
-        # Go back i months from the report month
-        month = report_month - i
-        year = report_year
-        while month <= 0:
-            month += 12
-            year -= 1
-
-        h_start, h_end = _month_range(year, month)
-
-        h_order_filter = base_order_filter & Q(
-            order__created_at__gte=h_start, order__created_at__lte=h_end
+    # Historical data: last N months ending at the report month. Months
+    # without a snapshot are computed live with one query per side, grouped
+    # by month, instead of two queries per month.
+    live_months = [
+        (year, month)
+        for year, month in history
+        if date(year, month, 1) not in snapshots
+    ]
+    monthly_income, monthly_expense = {}, {}
+    if live_months:
+        live_start, _ = _month_range(*live_months[0])
+        _, live_end = _month_range(*live_months[-1])
+        monthly_income = _monthly_income_totals(
+            base_order_filter
+            & Q(order__created_at__gte=live_start, order__created_at__lte=live_end)
+        )
+        monthly_expense = _monthly_expense_totals(
+            base_tx_filter & Q(created_at__gte=live_start, created_at__lte=live_end)
         )
-        h_tx_filter = base_tx_filter & Q(created_at__gte=h_start, created_at__lte=h_end)
-
-        h_income_by_cat = _get_income_by_category(h_order_filter)
-        h_expense_by_cat = _get_expense_by_category(h_tx_filter)
-
-        h_total_income = sum(h_income_by_cat.values(), Decimal("0"))
-        h_total_expense = sum(h_expense_by_cat.values(), Decimal("0"))
 
+    historical_data = []
+    for year, month in history:
+        snapshot = snapshots.get(date(year, month, 1))
+        if snapshot:
+            h_total_income = sum(
+                decimal_amounts(snapshot.income_by_category).values(), Decimal("0")
+            )
+            h_total_expense = sum(
+                decimal_amounts(snapshot.expense_by_category).values(), Decimal("0")
+            )
+        else:
+            h_total_income = monthly_income.get((year, month), Decimal("0"))
+            h_total_expense = monthly_expense.get((year, month), Decimal("0"))
         historical_data.append(
             {
-                "month": h_start,
+                "month": _month_range(year, month)[0],
                 "total_income": h_total_income,
                 "total_expense": h_total_expense,
                 "net_profit": h_total_income - h_total_expense,
@@ -1244,27 +1377,16 @@ def finance_report(request):
         else Decimal("0.00")
     )
 
-    credit_pm_filter = Q(payment_method__identifier="CREDIT")
-    not_settled_filter = ~Q(category__endswith=":settled") & ~Q(
-        category__endswith=":paid"
-    )
+    open_credit = Q(settlement_state=Transaction.SettlementState.OPEN)
 
     pending_receivables = transactions.filter(
-        credit_pm_filter, type__in=Transaction.INCOME_TYPES
-    ).filter(not_settled_filter).aggregate(total=Sum("total_paid_amount"))[
-        "total"
-    ] or Decimal(
-        "0"
-    )
+        open_credit, type__in=Transaction.INCOME_TYPES
+    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0")
 
     pending_payables = transactions.filter(
-        credit_pm_filter,
+        open_credit,
         type__in=[*Transaction.EXPENSE_TYPES, Transaction.TransactionType.DEBT],
-    ).filter(not_settled_filter).aggregate(total=Sum("total_paid_amount"))[
-        "total"
-    ] or Decimal(
-        "0"
-    )
+    ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0")
 
     # --- By transaction type breakdown ----------------------------------
     by_transaction_type = {
@@ -1283,29 +1405,53 @@ def finance_report(request):
         "payment"
     )
 
-    # Refund totals must always reflect real REFUND transactions, independent
-    # of the optional `transaction_type` filter. That filter narrows which
-    # rows count as income/expense in `transactions` above (e.g.
-    # transaction_type=SALE,EXPENSE); without this separate, unfiltered-by-type
-    # queryset, any such filter would silently zero out total_refunds per
-    # payment method even when refunds exist for the period (this mirrors how
-    # the top-level total_refunds is already computed, unaffected by that
-    # filter).
-    refund_scope_filter = Q(business=business, branch=branch) & Q(
+    # Every measure is a conditional sum in one query grouped by payment
+    # method, over the period's transactions before the optional
+    # `transaction_type` filter. That filter narrows which rows count as
+    # income/expense (and towards transaction_count), but refund and sales
+    # totals must always reflect the real REFUND/SALE transactions — as the
+    # top-level total_refunds does — or e.g. transaction_type=SALE,EXPENSE
+    # would silently zero out total_refunds per payment method.
+    pm_scope_filter = Q(business=business, branch=branch) & Q(
         created_at__gte=start_date, created_at__lt=end_date
     )
     if payment_method_ids:
-        refund_scope_filter &= Q(payment_method__in=payment_method_ids)
-    refund_scope_filter &= own_tx_filter
-    refund_transactions = Transaction.objects.filter(
-        refund_scope_filter, type=Transaction.TransactionType.REFUND
-    )
-    # Same reasoning as refund_transactions above: sales totals per payment
-    # method must also stay correct regardless of the optional
-    # `transaction_type` filter.
-    sales_transactions = Transaction.objects.filter(
-        refund_scope_filter, type=Transaction.TransactionType.SALE
-    )
+        pm_scope_filter &= Q(payment_method__in=payment_method_ids)
+    pm_scope_filter &= own_tx_filter
+    type_filter = Q(type__in=transaction_types) if transaction_types else Q()
+    pm_totals = {
+        row["payment_method"]: row
+        for row in Transaction.objects.filter(pm_scope_filter)
+        .values("payment_method")
+        .annotate(
+            income=Sum(
+                "total_paid_amount",
+                filter=type_filter & Q(type__in=Transaction.INCOME_TYPES),
+            ),
+            expense=Sum(
+                "total_paid_amount",
+                filter=type_filter & Q(type__in=Transaction.EXPENSE_TYPES),
+            ),
+            refunds=Sum(
+                "total_paid_amount", filter=Q(type=Transaction.TransactionType.REFUND)
+            ),
+            sales=Sum(
+                "total_paid_amount", filter=Q(type=Transaction.TransactionType.SALE)
+            ),
+            count=Count("pk", filter=type_filter),
+            pending_receivables=Sum(
+                "total_paid_amount",
+                filter=type_filter & open_credit & Q(type__in=Transaction.INCOME_TYPES),
+            ),
+            pending_payables=Sum(
+                "total_paid_amount",
+                filter=type_filter
+                & open_credit
+                & Q(type__in=Transaction.EXPENSE_TYPES),
+            ),
+        )
+        .order_by()
+    }
 
     period_order_ids = Order.objects.filter(
         business=business,
@@ -1314,79 +1460,72 @@ def finance_report(request):
         created_at__lt=end_date,
     ).values_list("id", flat=True)
 
-    # Refunds whose *order* was placed within this period, regardless of
-    # when the refund itself was recorded — grouped by payment method,
-    # mirroring _get_period_sales_refunds' own (order-date-only) scope, used
-    # for each breakdown row's net_sales/period_sales_refunds.
-    order_scoped_refund_filter = Q(
+    # Both splits of the refunds, grouped by payment method in one query:
+    # - period: refunds whose *order* was placed within this period,
+    #   regardless of when the refund itself was recorded (mirrors
+    #   _get_period_sales_refunds' order-date-only scope), for each row's
+    #   net_sales/period_sales_refunds;
+    # - outside period: refunds recorded *in this period* whose order was
+    #   placed outside it, for each row's outside_period_sales_refunds.
+    in_period_order = Q(order_id__in=period_order_ids)
+    recorded_in_period = Q(
+        created_at__gte=start_date, created_at__lt=end_date, order__isnull=False
+    )
+    refund_split_filter = Q(
         business=business, branch=branch, type=Transaction.TransactionType.REFUND
-    )
+    ) & (in_period_order | recorded_in_period)
     if payment_method_ids:
-        order_scoped_refund_filter &= Q(payment_method__in=payment_method_ids)
-    order_scoped_refund_filter &= own_tx_filter
-    period_refunds_by_pm = dict(
-        Transaction.objects.filter(
-            order_scoped_refund_filter, order_id__in=period_order_ids
-        )
+        refund_split_filter &= Q(payment_method__in=payment_method_ids)
+    refund_split_filter &= own_tx_filter
+    refund_splits = {
+        row["payment_method"]: row
+        for row in Transaction.objects.filter(refund_split_filter)
         .values("payment_method")
-        .annotate(total=Sum("total_paid_amount"))
-        .values_list("payment_method", "total")
-    )
+        .annotate(
+            period=Sum("total_paid_amount", filter=in_period_order),
+            outside_period=Sum(
+                "total_paid_amount", filter=recorded_in_period & ~in_period_order
+            ),
+        )
+        .order_by()
+    }
 
-    # Refunds recorded *in this period* (same scope as refund_transactions)
-    # whose order was placed outside it — grouped by payment method, for
-    # each breakdown row's outside_period_sales_refunds/net_cash gap.
-    outside_period_refunds_by_pm = dict(
-        refund_transactions.exclude(order__isnull=True)
-        .exclude(order_id__in=period_order_ids)
-        .values("payment_method")
-        .annotate(total=Sum("total_paid_amount"))
-        .values_list("payment_method", "total")
-    )
+    def _pm_breakdown(payment_method_id):
+        totals = pm_totals.get(payment_method_id, {})
+        splits = refund_splits.get(payment_method_id, {})
+        income = totals.get("income") or Decimal("0")
+        expense = totals.get("expense") or Decimal("0")
+        refunds = totals.get("refunds") or Decimal("0")
+        total_sales = totals.get("sales") or Decimal("0")
+        period_refunds = splits.get("period") or Decimal("0")
+        outside_period_refunds = splits.get("outside_period") or Decimal("0")
+        income += refunds  # Refunds are negative, so add them to income
+        return {
+            "total_income": income,
+            "total_expense": expense,
+            "total_refunds": refunds,
+            "total_sales": total_sales,
+            "net_sales": total_sales + period_refunds,
+            "net_cash": total_sales + refunds,
+            "period_sales_refunds": period_refunds,
+            "outside_period_sales_refunds": outside_period_refunds,
+            "net_balance": income - expense,
+            "transaction_count": totals.get("count") or 0,
+        }
 
     by_payment_method = []
     for pm in payment_methods:
-        pm_txs = transactions.filter(payment_method=pm)
-        pm_income = pm_txs.filter(type__in=Transaction.INCOME_TYPES).aggregate(
-            total=Sum("total_paid_amount")
-        )["total"] or Decimal("0")
-        pm_expense = pm_txs.filter(type__in=Transaction.EXPENSE_TYPES).aggregate(
-            total=Sum("total_paid_amount")
-        )["total"] or Decimal("0")
-        pm_refunds = refund_transactions.filter(payment_method=pm).aggregate(
-            total=Sum("total_paid_amount")
-        )["total"] or Decimal("0")
-        pm_total_sales = sales_transactions.filter(payment_method=pm).aggregate(
-            total=Sum("total_paid_amount")
-        )["total"] or Decimal("0")
-        pm_period_refunds = period_refunds_by_pm.get(pm.id, Decimal("0"))
-        pm_outside_period_refunds = outside_period_refunds_by_pm.get(
-            pm.id, Decimal("0")
-        )
-        pm_net_sales = pm_total_sales + pm_period_refunds
-        pm_net_cash = pm_total_sales + pm_refunds
-
-        pm_income += pm_refunds  # Refunds are negative, so add them to income
-        is_credit_pm = pm.identifier == "CREDIT"
-        pm_pending_receivables = pm_income if is_credit_pm else Decimal("0")
-        pm_pending_payables = pm_expense if is_credit_pm else Decimal("0")
+        breakdown = _pm_breakdown(pm.id)
+        totals = pm_totals.get(pm.id, {})
         by_payment_method.append(
             {
                 "payment_method_id": pm.id,
                 "payment_method_name": pm.display_name,
-                "total_income": pm_income,
-                "total_expense": pm_expense,
-                "total_refunds": pm_refunds,
-                "total_sales": pm_total_sales,
-                "net_sales": pm_net_sales,
-                "net_cash": pm_net_cash,
-                "period_sales_refunds": pm_period_refunds,
-                "outside_period_sales_refunds": pm_outside_period_refunds,
-                "net_balance": pm_income - pm_expense,
-                "transaction_count": pm_txs.count(),
-                "is_credit": is_credit_pm,
-                "pending_receivables": pm_pending_receivables,
-                "pending_payables": pm_pending_payables,
+                **breakdown,
+                "is_credit": pm.identifier == "CREDIT",
+                "pending_receivables": totals.get("pending_receivables")
+                or Decimal("0"),
+                "pending_payables": totals.get("pending_payables") or Decimal("0"),
             }
         )
 
@@ -1394,47 +1533,20 @@ def finance_report(request):
     # are grouped under an "Unknown" entry. Skipped when filtering to specific
     # payment methods, since "unknown" can't match a requested id.
     if not payment_method_ids:
-        unknown_txs = transactions.filter(payment_method__isnull=True)
-        unknown_refunds = refund_transactions.filter(
-            payment_method__isnull=True
-        ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0")
-        unknown_total_sales = sales_transactions.filter(
-            payment_method__isnull=True
-        ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0")
-        unknown_count = unknown_txs.count()
+        unknown = _pm_breakdown(None)
         # Include this bucket if there are matching (possibly type-filtered)
         # transactions, real refunds, or real sales, so neither ever gets
         # silently dropped when transaction_type filters out every other row.
-        if unknown_count or unknown_refunds or unknown_total_sales:
-            unknown_income = unknown_txs.filter(
-                type__in=Transaction.INCOME_TYPES
-            ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0")
-            unknown_expense = unknown_txs.filter(
-                type__in=Transaction.EXPENSE_TYPES
-            ).aggregate(total=Sum("total_paid_amount"))["total"] or Decimal("0")
-            unknown_income += (
-                unknown_refunds  # Refunds are negative, so add them to income
-            )
-            unknown_period_refunds = period_refunds_by_pm.get(None, Decimal("0"))
-            unknown_outside_period_refunds = outside_period_refunds_by_pm.get(
-                None, Decimal("0")
-            )
-            unknown_net_sales = unknown_total_sales + unknown_period_refunds
-            unknown_net_cash = unknown_total_sales + unknown_refunds
+        if (
+            unknown["transaction_count"]
+            or unknown["total_refunds"]
+            or unknown["total_sales"]
+        ):
             by_payment_method.append(
                 {
                     "payment_method_id": None,
                     "payment_method_name": "Unknown",
-                    "total_income": unknown_income,
-                    "total_expense": unknown_expense,
-                    "total_refunds": unknown_refunds,
-                    "total_sales": unknown_total_sales,
-                    "net_sales": unknown_net_sales,
-                    "net_cash": unknown_net_cash,
-                    "period_sales_refunds": unknown_period_refunds,
-                    "outside_period_sales_refunds": unknown_outside_period_refunds,
-                    "net_balance": unknown_income - unknown_expense,
-                    "transaction_count": unknown_count,
+                    **unknown,
                     "is_credit": False,
                     "pending_receivables": Decimal("0"),
                     "pending_payables": Decimal("0"),
@@ -1530,21 +1642,29 @@ def finance_report(request):
     prev_end = start_date
     prev_start = start_date - period_duration
 
-    prev_filter = Q(business=business, branch=branch) & Q(
-        created_at__gte=prev_start, created_at__lt=prev_end
-    )
-    if payment_method_ids:
-        prev_filter &= Q(payment_method__in=payment_method_ids)
-    prev_filter &= own_tx_filter
-
-    prev_type_totals = (
-        Transaction.objects.filter(prev_filter)
-        .values("type")
-        .annotate(total=Sum("total_paid_amount"))
-    )
-    prev_totals_by_type = {
-        row["type"]: row["total"] or Decimal("0") for row in prev_type_totals
-    }
+    # Whole closed months of the previous window are read from their
+    # monthly-close snapshots (full report access only); the rest is live.
+    prev_totals_by_type = defaultdict(Decimal)
+    prev_live = Q(created_at__gte=prev_start, created_at__lt=prev_end)
+    if own_tx_filter == Q():
+        frozen, prev_live = snapshot_window(
+            branch, prev_start, prev_end, payment_method_ids
+        )
+        prev_totals_by_type.update(frozen)
+
+    if prev_live is not None:
+        prev_filter = Q(business=business, branch=branch) & prev_live
+        if payment_method_ids:
+            prev_filter &= Q(payment_method__in=payment_method_ids)
+        prev_filter &= own_tx_filter
+
+        prev_type_totals = (
+            Transaction.objects.filter(prev_filter)
+            .values("type")
+            .annotate(total=Sum("total_paid_amount"))
+        )
+        for row in prev_type_totals:
+            prev_totals_by_type[row["type"]] += row["total"] or Decimal("0")
     previous_income = sum(
         prev_totals_by_type.get(t, Decimal("0")) for t in Transaction.INCOME_TYPES
     )
@@ -1611,6 +1731,109 @@ def finance_report(request):
     return Response(serializer.data)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def open_credit_aging(request):
+    """
+    GET /finances/open-credit-aging/
+
+    Outstanding (unsettled) receivables and payables of a branch, bucketed by
+    how many days old they are.
+
+    Query params:
+      - business / business_id (required)
+      - branch / branch_id (required)
+    """
+    business, branch = _resolve_business_branch(request)
+
+    if not branch:
+        raise ValidationError({"detail": "Branch is required."})
+
+    own_tx_filter, _, _ = _report_transaction_scope(request, business, branch)
+
+    # A transaction is ``n`` days old when it was created on the local day
+    # ``n`` days before today, so buckets split at local midnights.
+    today = timezone.localdate()
+    tz = timezone.get_current_timezone()
+
+    def midnight(days_ago):
+        return datetime.combine(
+            today - timedelta(days=days_ago), datetime.min.time(), tz
+        )
+
+    receivable = Q(type__in=Transaction.INCOME_TYPES)
+    payable = Q(type__in=Transaction.EXPENSE_TYPES)
+    metrics = {}
+    for bucket, (_, min_days, max_days) in enumerate(AGING_BUCKETS):
+        age = Q(created_at__lt=midnight(min_days - 1)) if min_days else Q()
+        if max_days is not None:
+            age &= Q(created_at__gte=midnight(max_days))
+        for side, condition in (("receivables", receivable), ("payables", payable)):
+            metrics[f"{side}_{bucket}_amount"] = Sum(
+                "total_paid_amount", filter=condition & age
+            )
+            metrics[f"{side}_{bucket}_count"] = Count("pk", filter=condition & age)
+
+    # One aggregate over the branch's open credit rows, served by the partial
+    # transaction_open_credit_idx index.
+    totals = Transaction.objects.filter(
+        own_tx_filter,
+        business=business,
+        branch=branch,
+        settlement_state=Transaction.SettlementState.OPEN,
+    ).aggregate(**metrics)
+
+    aging_data = {"as_of": today}
+    for side in ("receivables", "payables"):
+        buckets = [
+            {
+                "bucket": label,
+                "amount": totals[f"{side}_{bucket}_amount"] or Decimal("0"),
+                "count": totals[f"{side}_{bucket}_count"],
+            }
+            for bucket, (label, _, _) in enumerate(AGING_BUCKETS)
+        ]
+        aging_data[side] = buckets
+        aging_data[f"total_{side}"] = sum(
+            (bucket["amount"] for bucket in buckets), Decimal("0")
+        )
+
+    serializer = OpenCreditAgingSerializer(aging_data)
+    return Response(serializer.data)
+
+
 class PaymentVerifyViewset(CreateModelMixin, GenericViewSet):
+    """
+    POST /finances/payments/verifications/ verifies a payment receipt.
+
+    With ``asynchronous: true`` it answers 202 with a ``verification_id``
+    right away and verifies in the background; poll
+    GET /finances/payments/verifications/{verification_id}/ for the result.
+    """
+
     permission_classes = [IsAuthenticated]
     serializer_class = PaymentVerificationSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data.get("asynchronous"):
+            verification_id = queue_verification(
+                request.user.pk, serializer.get_verifier_kwargs()
+            )
+            if verification_id:
+                return Response(
+                    {"verification_id": verification_id, "status": "PENDING"},
+                    status=status.HTTP_202_ACCEPTED,
+                )
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        state = get_verification(pk, request.user.pk)
+        if state is None:
+            raise NotFound()
+        data = {"verification_id": pk, "status": state["status"]}
+        if state["result"] is not None:
+            data.update(PaymentVerificationSerializer(state["result"]).data)
+        return Response(data)
@@ -19,6 +19,7 @@ from django.utils import timezone
 from business.models import Branch
 from inventories.models import Group, Item, ItemVariant, SuppliedItem, Supply
 from inventories.serializers import BULK_IMPORT_COLUMNS
+from notifications.bulk import bulk_inventory_changes
 
 
 def _parse_int(value, default=0):
@@ -280,7 +281,7 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.SUCCESS("Syncing inventory...\n"))
 
-        with transaction.atomic():
+        with bulk_inventory_changes(), transaction.atomic():
             sync_supply = None
             if needs_supply and not dry_run:
                 sync_supply, _ = Supply.objects.get_or_create(
@@ -1,6 +1,7 @@
 import csv
 import io
 import logging
+from decimal import Decimal, InvalidOperation
 
 import openpyxl
 from django.contrib.postgres.search import TrigramSimilarity
@@ -43,6 +44,7 @@ from business.permissions import (
 )
 from core.idempotency import idempotent
 from core.utils import is_valid_uuid
+from notifications.bulk import bulk_inventory_changes
 
 from .filters import (
     GroupFilter,
@@ -279,6 +281,7 @@ class ItemViewset(ModelViewSet):
         url_path="bulk-import",
         permission_classes=[IsAuthenticated, BranchLevelPermission],
     )
+    @bulk_inventory_changes()
     def bulk_import(self, request):
         """
         Upload a CSV or Excel file to bulk-create products.
@@ -719,9 +722,10 @@ class SupplyViewset(
         supply_ref = f"supply:{supply.id}"
 
         # Must have an existing DEBT transaction for this supply.
-        if not Transaction.objects.filter(
+        debt = Transaction.objects.filter(
             category=supply_ref, type=Transaction.TransactionType.DEBT
-        ).exists():
+        ).first()
+        if debt is None:
             return Response(
                 {"detail": "No outstanding debt found for this supply."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -729,7 +733,7 @@ class SupplyViewset(
 
         # Prevent double-settlement.
         settled_ref = f"{supply_ref}:paid"
-        if Transaction.objects.filter(category=settled_ref).exists():
+        if debt.settlement_state == Transaction.SettlementState.SETTLED:
             return Response(
                 {"detail": "This supply debt has already been settled."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -751,20 +755,31 @@ class SupplyViewset(
 
         raw_amount = request.data.get("amount")
         try:
-            amount = float(raw_amount) if raw_amount else float(supply.total_cost)
-        except (ValueError, TypeError):
+            amount = Decimal(str(raw_amount)) if raw_amount else supply.total_cost
+            amount = amount.quantize(Decimal("0.01"))
+        except (InvalidOperation, ValueError, TypeError):
             return Response(
                 {"detail": "Invalid amount."}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        tx = Transaction.objects.create(
-            type=Transaction.TransactionType.PURCHASE,
-            total_paid_amount=round(amount, 2),
-            payment_method=payment_method,
-            business=supply.business,
-            branch=supply.branch,
-            category=settled_ref,
-        )
+        with transaction.atomic():
+            # Re-check under a row lock so concurrent requests cannot both
+            # pay the same debt.
+            debt = Transaction.objects.select_for_update().get(pk=debt.pk)
+            if debt.settlement_state == Transaction.SettlementState.SETTLED:
+                return Response(
+                    {"detail": "This supply debt has already been settled."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            tx = Transaction.objects.create(
+                type=Transaction.TransactionType.PURCHASE,
+                total_paid_amount=amount,
+                payment_method=payment_method,
+                business=supply.business,
+                branch=supply.branch,
+                category=settled_ref,
+            )
+            debt.mark_settled(tx, amount)
 
         from finances.serializers import TransactionSerializer
 
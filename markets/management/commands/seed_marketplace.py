@@ -31,6 +31,7 @@ from markets.models import (
     VariantImage,
     Waitlist,
 )
+from notifications.bulk import bulk_inventory_changes
 
 User = get_user_model()
 
@@ -278,6 +279,7 @@ class Command(BaseCommand):
             fm.save(update_fields=["public_url"])
         return fm
 
+    @bulk_inventory_changes()
     @transaction.atomic
     def handle(self, *args, **options):
         if options["flush"]:
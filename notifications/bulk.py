@@ -0,0 +1,123 @@
+"""
+Coalesced notifications for bulk inventory writes.
+
+An import or sync touches thousands of supplied items and products, and the
+restock, price-change and product-updated receivers would each enqueue a
+notification for every one of them.  Inside ``bulk_inventory_changes()``
+those receivers only ``defer`` what changed; when the outermost scope exits,
+each business gets a single ``inventory_updated`` summary.
+
+The scope is per thread and works as a context manager or a decorator, so
+views, management commands, seeders and admin actions can all use it::
+
+    with bulk_inventory_changes():
+        ...
+
+Changes are counted once their transaction commits, so rows rolled back
+with a failed savepoint are left out of the summary, and nothing is sent if
+the surrounding transaction rolls back.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+
+from django.db import transaction
+
+from .service import enqueue_notification
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+@dataclass
+class InventoryChanges:
+    """What a bulk scope changed in one business."""
+
+    restocked: set = field(default_factory=set)
+    repriced: set = field(default_factory=set)
+    updated: set = field(default_factory=set)
+    units_added: int = 0
+
+    def add(self, kind, key, units=0):
+        getattr(self, kind).add(key)
+        self.units_added += units
+
+    def message(self):
+        parts = []
+        if self.restocked:
+            parts.append(
+                f"{len(self.restocked)} variant(s) restocked "
+                f"with {self.units_added} units"
+            )
+        if self.repriced:
+            parts.append(f"{len(self.repriced)} price change(s)")
+        if self.updated:
+            parts.append(f"{len(self.updated)} product(s) updated")
+        return "Bulk inventory update: " + ", ".join(parts) + "."
+
+    def data(self):
+        return {
+            "restocked_variants": len(self.restocked),
+            "units_added": self.units_added,
+            "price_changes": len(self.repriced),
+            "updated_products": len(self.updated),
+        }
+
+
+def defer(business_id, kind, key, units=0):
+    """
+    Record a ``restocked`` / ``repriced`` / ``updated`` change of ``key`` for
+    the active scope's summary.  Returns False outside a scope, where the
+    caller notifies as usual.
+    """
+    scope = getattr(_state, "scope", None)
+    if scope is None or business_id is None:
+        return False
+    transaction.on_commit(partial(scope[business_id].add, kind, key, units))
+    return True
+
+
+def _summarize(changes):
+    from business.models import Business
+
+    if not changes:
+        return
+    businesses = Business.objects.in_bulk(list(changes))
+    for business_id, business_changes in changes.items():
+        business = businesses.get(business_id)
+        if business is None:
+            continue
+        enqueue_notification(
+            title="Inventory Updated",
+            message=business_changes.message(),
+            event_type="inventory_updated",
+            business=business,
+            notification_type="info",
+            data=business_changes.data(),
+            delivery_methods="platform, push, telegram",
+        )
+    logger.info("Bulk inventory changes summarized for %d business(es)", len(changes))
+
+
+@contextmanager
+def bulk_inventory_changes():
+    """
+    Defer per-row inventory notifications until the scope exits, then send
+    one summary per business.  Nested scopes join the outermost one.
+    """
+    if getattr(_state, "scope", None) is not None:
+        yield
+        return
+
+    changes = _state.scope = defaultdict(InventoryChanges)
+    try:
+        yield
+    finally:
+        _state.scope = None
+        # Runs after the commit callbacks that fill ``changes``.
+        transaction.on_commit(partial(_summarize, changes), robust=True)
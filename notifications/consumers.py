@@ -0,0 +1,57 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .inbox import cached_unread_count, user_business_ids
+from .realtime import business_group, user_group
+
+# Close code for an unauthenticated connection (4000-4999 are app-defined).
+UNAUTHORIZED = 4401
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes new notifications to the signed-in user (see
+    ``notifications.realtime``).
+
+    On connect the client receives ``{"type": "unread_count", ...}``; each new
+    notification then arrives as ``{"type": "notification", "notification":
+    {...}, "unread_count": n}``.  Businesses joined after connecting are
+    picked up on reconnect.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=UNAUTHORIZED)
+            return
+
+        self.joined = [user_group(self.user.pk)] + [
+            business_group(business_id) for business_id in await self._business_ids()
+        ]
+        for group in self.joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+        await self.send_json(
+            {"type": "unread_count", "unread_count": await self._unread_count()}
+        )
+
+    async def disconnect(self, code):
+        for group in getattr(self, "joined", []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send_json(
+            {
+                "type": "notification",
+                "notification": event["notification"],
+                "unread_count": await self._unread_count(),
+            }
+        )
+
+    @database_sync_to_async
+    def _business_ids(self):
+        return [row["business_id"] for row in user_business_ids(self.user)]
+
+    @database_sync_to_async
+    def _unread_count(self):
+        return cached_unread_count(self.user)
@@ -32,7 +32,7 @@ def deep_link_for_notification(event_type: str, data: dict | None) -> str:
             return f"{BITA_APP_BASE}/inventory/{item_id}"
         return f"{BITA_APP_BASE}/inventory"
 
-    if event_type == "inventory_movement":
+    if event_type in ("inventory_movement", "inventory_updated"):
         return f"{BITA_APP_BASE}/inventory"
 
     if event_type == "general":
@@ -1,12 +1,41 @@
 import logging
+import time
+from dataclasses import asdict, dataclass, field
 
 import firebase_admin
-from firebase_admin import messaging
+from firebase_admin import exceptions, messaging
 
 logger = logging.getLogger(__name__)
 
 _firebase_initialized = False
 
+# FCM accepts at most 500 messages per send_each call.
+BATCH_SIZE = 500
+
+
+@dataclass
+class BatchResult:
+    """Metrics of one ``send_each`` call."""
+
+    size: int
+    success_count: int = 0
+    failure_count: int = 0
+    dead_tokens: list = field(default_factory=list)
+    latency_ms: float = 0.0
+
+
+class FCMUnavailableError(Exception):
+    """
+    ``send_each`` itself failed (FCM down or unreachable), so nothing from
+    the failed batch on was sent.  ``results`` holds the batches sent before
+    it and ``unsent`` the messages still to send.
+    """
+
+    def __init__(self, results, unsent):
+        super().__init__(f"FCM unavailable, {len(unsent)} message(s) unsent")
+        self.results = results
+        self.unsent = unsent
+
 
 def _ensure_firebase_initialized():
     global _firebase_initialized
@@ -19,6 +48,91 @@ def _ensure_firebase_initialized():
     _firebase_initialized = True
 
 
+def is_dead_token_error(exc):
+    """True when ``exc`` says the token will never work again."""
+    if isinstance(exc, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+        return True
+    # INVALID_ARGUMENT is also raised for bad payloads; only a malformed
+    # token condemns the device.
+    return isinstance(exc, exceptions.InvalidArgumentError) and (
+        "registration token" in str(exc).lower()
+    )
+
+
+def deactivate_dead_tokens(fcm_tokens):
+    """Stop pushing to devices whose tokens FCM rejected for good."""
+    from accounts.models import UserDevice
+
+    if not fcm_tokens:
+        return 0
+    deactivated = UserDevice.objects.filter(
+        fcm_token__in=fcm_tokens, is_active=True
+    ).update(is_active=False)
+    logger.info("Deactivated %d device(s) with dead FCM tokens", deactivated)
+    return deactivated
+
+
+def build_message(fcm_token, title, body, data=None):
+    return messaging.Message(
+        notification=messaging.Notification(title=title, body=body),
+        token=fcm_token,
+        data=data or {},
+    )
+
+
+def send_messages(messages):
+    """
+    Send ``messages`` in ``send_each`` batches of ``BATCH_SIZE``, deactivate
+    the devices of dead tokens and log each batch's metrics.  Returns the
+    :class:`BatchResult` of every batch.
+
+    Per-message failures are counted in the results; a failure of the
+    ``send_each`` call itself raises :class:`FCMUnavailableError` so the
+    caller can retry the unsent messages.
+    """
+    if not messages:
+        return []
+
+    _ensure_firebase_initialized()
+    results = []
+    for i in range(0, len(messages), BATCH_SIZE):
+        batch = messages[i : i + BATCH_SIZE]
+        result = BatchResult(size=len(batch))
+        started = time.perf_counter()
+        try:
+            response = messaging.send_each(batch)
+        except Exception as e:
+            logger.error("Failed to send FCM batch: %s", e)
+            raise FCMUnavailableError(results, messages[i:]) from e
+        result.success_count = response.success_count
+        result.failure_count = response.failure_count
+        for message, send_response in zip(batch, response.responses):
+            if send_response.exception is None:
+                continue
+            if is_dead_token_error(send_response.exception):
+                result.dead_tokens.append(message.token)
+            else:
+                logger.warning(
+                    "FCM send failed for token %s…: %s",
+                    message.token[:20],
+                    send_response.exception,
+                )
+        result.latency_ms = (time.perf_counter() - started) * 1000
+
+        deactivate_dead_tokens(result.dead_tokens)
+        logger.info(
+            "FCM batch: %d sent, %d failed (%d dead token(s)) of %d in %.0f ms",
+            result.success_count,
+            result.failure_count,
+            len(result.dead_tokens),
+            result.size,
+            result.latency_ms,
+            extra={"fcm_batch": asdict(result)},
+        )
+        results.append(result)
+    return results
+
+
 def send_notification(fcm_token, title, body, data=None):
     """
     Send a push notification to a single device via FCM.
@@ -26,18 +140,14 @@ def send_notification(fcm_token, title, body, data=None):
     """
     _ensure_firebase_initialized()
     try:
-        message = messaging.Message(
-            notification=messaging.Notification(title=title, body=body),
-            token=fcm_token,
-            data=data or {},
-        )
-        messaging.send(message)
+        messaging.send(build_message(fcm_token, title, body, data))
         return True
-    except messaging.UnregisteredError:
-        logger.warning("FCM token is no longer valid: %s…", fcm_token[:20])
-        return False
     except Exception as e:
-        logger.error("Failed to send FCM notification: %s", e)
+        if is_dead_token_error(e):
+            logger.warning("FCM token is no longer valid: %s…", fcm_token[:20])
+            deactivate_dead_tokens([fcm_token])
+        else:
+            logger.error("Failed to send FCM notification: %s", e)
         return False
 
 
@@ -46,32 +156,10 @@ def send_multicast_notification(fcm_tokens, title, body, data=None):
     Send a push notification to multiple devices at once (max 500 per batch).
     Returns the number of successful sends.
     """
-    if not fcm_tokens:
-        return 0
-
-    _ensure_firebase_initialized()
-    success_count = 0
-    batch_size = 500
-
-    for i in range(0, len(fcm_tokens), batch_size):
-        batch_tokens = fcm_tokens[i : i + batch_size]
-        try:
-            message = messaging.MulticastMessage(
-                notification=messaging.Notification(title=title, body=body),
-                tokens=batch_tokens,
-                data=data or {},
-            )
-            response = messaging.send_each_for_multicast(message)
-            success_count += response.success_count
-
-            for idx, send_response in enumerate(response.responses):
-                if send_response.exception:
-                    logger.warning(
-                        "FCM send failed for token %s…: %s",
-                        batch_tokens[idx][:20],
-                        send_response.exception,
-                    )
-        except Exception as e:
-            logger.error("Failed to send multicast FCM notification: %s", e)
-
-    return success_count
+    try:
+        results = send_messages(
+            [build_message(token, title, body, data) for token in fcm_tokens or []]
+        )
+    except FCMUnavailableError as e:
+        results = e.results
+    return sum(result.success_count for result in results)
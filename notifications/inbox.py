@@ -0,0 +1,212 @@
+"""
+Per-user view of notifications.
+
+A targeted notification (``send_to_recipients_only=True``) has one
+NotificationRecipient row per recipient holding its read/deleted state.
+
+A business broadcast (``send_to_recipients_only=False``) is stored once and
+is visible to every employee of its business.  Per-user state stays sparse:
+a NotificationReadWatermark per (user, business) marks every broadcast up to
+``read_up_to`` read, and a NotificationRecipient row exists only as an
+exception — a broadcast read individually past the watermark, or deleted.
+``mark_all_read`` moves the watermarks and drops the exceptions they cover.
+
+``cached_unread_count`` keeps each user's unread count in the cache for the
+real-time consumers: new notifications increment it (``bump_unread_counts``)
+and marking notifications read or deleted drops it, so pushing a count with
+every event costs no query.
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db.models import (
+    BooleanField,
+    Case,
+    Exists,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+
+from .models import Notification, NotificationReadWatermark, NotificationRecipient
+
+logger = logging.getLogger(__name__)
+
+UNREAD_COUNT_KEY = "notifications:unread:{}"
+# Bounds how long a count missed by an increment can stay off.
+UNREAD_COUNT_TTL = 60 * 5
+
+
+def user_business_ids(user):
+    from business.models import Employee
+
+    return Employee.objects.filter(user=user, business__isnull=False).values(
+        "business_id"
+    )
+
+
+def inbox(user):
+    """
+    Notifications visible to ``user``, newest first, annotated with
+    ``is_read_by_user``.
+    """
+    own_rows = NotificationRecipient.objects.filter(recipient=user)
+    states = own_rows.filter(notification=OuterRef("pk"))
+    watermark = NotificationReadWatermark.objects.filter(
+        user=user, business=OuterRef("business")
+    ).values("read_up_to")[:1]
+
+    targeted = Q(
+        send_to_recipients_only=True,
+        pk__in=own_rows.filter(is_deleted=False).values("notification_id"),
+    )
+    broadcast = Q(
+        send_to_recipients_only=False, business__in=user_business_ids(user)
+    ) & ~Q(pk__in=own_rows.filter(is_deleted=True).values("notification_id"))
+    return (
+        Notification.objects.filter(targeted | broadcast)
+        .annotate(
+            is_read_by_user=Case(
+                When(Exists(states.filter(is_read=True)), then=Value(True)),
+                When(
+                    send_to_recipients_only=False,
+                    created_at__lte=Subquery(watermark),
+                    then=Value(True),
+                ),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+        .order_by("-created_at")
+    )
+
+
+def unread_count(user):
+    return inbox(user).filter(is_read_by_user=False).count()
+
+
+def cached_unread_count(user):
+    """``unread_count(user)``, counted at most once per ``UNREAD_COUNT_TTL``."""
+    key = UNREAD_COUNT_KEY.format(user.pk)
+    try:
+        count = cache.get(key)
+    except Exception:
+        logger.warning("cached_unread_count: cache unavailable")
+        return unread_count(user)
+    if count is None:
+        count = unread_count(user)
+        try:
+            cache.add(key, count, UNREAD_COUNT_TTL)
+        except Exception:
+            logger.warning("cached_unread_count: cache unavailable")
+    return count
+
+
+def bump_unread_counts(user_ids):
+    """Count one more unread notification for ``user_ids`` with a cached count."""
+    for user_id in user_ids:
+        try:
+            cache.incr(UNREAD_COUNT_KEY.format(user_id))
+        except ValueError:
+            pass  # Not cached: the next read counts it.
+        except Exception:
+            logger.warning("bump_unread_counts: cache unavailable")
+            return
+
+
+def forget_unread_count(user):
+    try:
+        cache.delete(UNREAD_COUNT_KEY.format(user.pk))
+    except Exception:
+        logger.warning("forget_unread_count: cache unavailable")
+
+
+def _set_state(user, notification_ids, **state):
+    """
+    Apply ``state`` to the user's rows of ``notification_ids``, creating the
+    exception rows of broadcasts that have none.
+    """
+    existing = set(
+        NotificationRecipient.objects.filter(
+            notification_id__in=notification_ids, recipient=user
+        ).values_list("notification_id", flat=True)
+    )
+    NotificationRecipient.objects.filter(
+        notification_id__in=existing, recipient=user
+    ).update(**state)
+    NotificationRecipient.objects.bulk_create(
+        [
+            NotificationRecipient(notification_id=pk, recipient=user, **state)
+            for pk in notification_ids
+            if pk not in existing
+        ]
+    )
+
+
+def mark_read(user, notification_ids):
+    """Mark the user's unread notifications among ``notification_ids`` read."""
+    unread = list(
+        inbox(user)
+        .filter(pk__in=notification_ids, is_read_by_user=False)
+        .values_list("pk", flat=True)
+    )
+    _set_state(user, unread, is_read=True)
+    forget_unread_count(user)
+    return len(unread)
+
+
+def mark_deleted(user, notification_ids):
+    """Hide ``notification_ids`` from the user; returns how many were visible."""
+    visible = list(
+        inbox(user).filter(pk__in=notification_ids).values_list("pk", flat=True)
+    )
+    _set_state(user, visible, is_deleted=True)
+    forget_unread_count(user)
+    return len(visible)
+
+
+def mark_all_read(user):
+    NotificationRecipient.objects.filter(
+        recipient=user, is_read=False, notification__send_to_recipients_only=True
+    ).update(is_read=True)
+    # Each watermark is the newest broadcast the user can see, not the clock:
+    # a broadcast stamped earlier whose transaction commits after this read
+    # was never seen and must stay unread.
+    latest = dict(
+        Notification.objects.filter(
+            send_to_recipients_only=False, business__in=user_business_ids(user)
+        )
+        .order_by()
+        .values_list("business_id")
+        .annotate(latest=Max("created_at"))
+    )
+    if latest:
+        NotificationReadWatermark.objects.bulk_create(
+            [
+                NotificationReadWatermark(
+                    user=user, business_id=business_id, read_up_to=read_up_to
+                )
+                for business_id, read_up_to in latest.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["user", "business"],
+            update_fields=["read_up_to", "updated_at"],
+        )
+        # Read exceptions the watermarks now cover carry no information.
+        covered = Q()
+        for business_id, read_up_to in latest.items():
+            covered |= Q(
+                notification__business_id=business_id,
+                notification__created_at__lte=read_up_to,
+            )
+        NotificationRecipient.objects.filter(
+            covered,
+            recipient=user,
+            is_deleted=False,
+            notification__send_to_recipients_only=False,
+        ).delete()
+    forget_unread_count(user)
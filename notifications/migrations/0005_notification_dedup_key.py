@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:44
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Deduplicated events and the data key they are deduplicated on.
+DEDUPLICATED_EVENTS = {"low_stock": "variant_id", "product_updated": "item_id"}
+
+
+def backfill_dedup_key(apps, schema_editor):
+    """Key the last day's deduplicated notifications, so windows carry over."""
+    Notification = apps.get_model("notifications", "Notification")
+    cutoff = timezone.now() - timedelta(days=1)
+    for event_type, key in DEDUPLICATED_EVENTS.items():
+        notifications = list(
+            Notification.objects.filter(
+                event_type=event_type, created_at__gte=cutoff
+            ).only("business_id", "data")
+        )
+        for notification in notifications:
+            notification.dedup_key = (
+                f"{event_type}:{notification.business_id}:{key}:"
+                f"{notification.data.get(key)}"
+            )
+        Notification.objects.bulk_update(notifications, ["dedup_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0016_employeeinvitation_telegram_username"),
+        ("notifications", "0004_alter_notification_delivery_method"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="dedup_key",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("dedup_key__isnull", False)),
+                fields=["dedup_key", "created_at"],
+                name="notification_dedup_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_dedup_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:48
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0016_employeeinvitation_telegram_username"),
+        ("notifications", "0005_notification_dedup_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationReadWatermark",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("read_up_to", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["created_at", "-updated_at"],
+                "get_latest_by": "created_at",
+                "abstract": False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("send_to_recipients_only", False)),
+                fields=["business", "-created_at"],
+                name="notification_broadcast_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notificationreadwatermark",
+            name="business",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="notification_watermarks",
+                to="business.business",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notificationreadwatermark",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="notification_watermarks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notificationreadwatermark",
+            constraint=models.UniqueConstraint(
+                fields=("user", "business"), name="unique_notification_watermark"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0007_low_stock_alert"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notification",
+            name="event_type",
+            field=models.CharField(
+                choices=[
+                    ("low_stock", "Low Stock Alert"),
+                    ("price_change", "Price Change"),
+                    ("product_updated", "Product Updated"),
+                    ("restocked", "Restocked"),
+                    ("order_completed", "Order Completed"),
+                    ("inventory_movement", "Inventory Movement"),
+                    ("inventory_updated", "Inventory Updated"),
+                    ("general", "General"),
+                ],
+                default="general",
+                max_length=50,
+            ),
+        ),
+    ]
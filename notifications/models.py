@@ -31,6 +31,7 @@ NOTIFICATION_EVENT_CHOICES = [
     ("restocked", "Restocked"),
     ("order_completed", "Order Completed"),
     ("inventory_movement", "Inventory Movement"),
+    ("inventory_updated", "Inventory Updated"),
     ("general", "General"),
 ]
 
@@ -60,13 +61,37 @@ class Notification(BaseModel):
     delivery_method = models.CharField(
         max_length=255, choices=MESSAGE_DELIVERY_CHOICES, default="push"
     )
+    # False for a business broadcast: visible to every employee of the
+    # business without recipient rows (see notifications.inbox).
     send_to_recipients_only = models.BooleanField(default=True)
+    # "<event_type>:<business_id>:<key>:<value>" for deduplicated notifications.
+    dedup_key = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta(BaseModel.Meta):
+        indexes = [
+            models.Index(
+                fields=["dedup_key", "created_at"],
+                name="notification_dedup_idx",
+                condition=models.Q(dedup_key__isnull=False),
+            ),
+            models.Index(
+                fields=["business", "-created_at"],
+                name="notification_broadcast_idx",
+                condition=models.Q(send_to_recipients_only=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
 class NotificationRecipient(models.Model):
+    """
+    A user's read/deleted state of a notification.  Every recipient of a
+    targeted notification has one; for a broadcast it only exists as an
+    exception to the user's read watermark (read individually, or deleted).
+    """
+
     notification = models.ForeignKey(
         Notification, on_delete=models.CASCADE, related_name="recipients"
     )
@@ -81,3 +106,46 @@ class NotificationRecipient(models.Model):
 
     def __str__(self):
         return f"{self.recipient.email}: {self.recipient.phone_number} - {self.notification.title}"
+
+
+class NotificationReadWatermark(BaseModel):
+    """Every broadcast of ``business`` up to ``read_up_to`` is read by ``user``."""
+
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="notification_watermarks",
+    )
+    business = models.ForeignKey(
+        "business.Business",
+        on_delete=models.CASCADE,
+        related_name="notification_watermarks",
+    )
+    read_up_to = models.DateTimeField()
+
+    class Meta(BaseModel.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "business"], name="unique_notification_watermark"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} read {self.business_id} up to {self.read_up_to}"
+
+
+class LowStockAlert(models.Model):
+    """When ``variant`` was last included in a low-stock digest."""
+
+    variant = models.OneToOneField(
+        "inventories.ItemVariant",
+        on_delete=models.CASCADE,
+        related_name="low_stock_alert",
+    )
+    business = models.ForeignKey(
+        "business.Business", on_delete=models.CASCADE, related_name="+"
+    )
+    alerted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.variant_id} alerted at {self.alerted_at}"
@@ -0,0 +1,154 @@
+"""
+Coalesced push delivery.
+
+Notifications are not pushed one FCM call each.  ``queue_push`` appends the
+notification to a Redis list and, unless a flush is already scheduled,
+schedules ``flush_push_notifications_task`` ``COALESCE_SECONDS`` later.  The
+flush pushes everything queued in the meantime through ``push_notifications``:
+one device lookup for all recipients, and as few ``send_each`` batches as the
+messages need, with notifications bound for the same set of devices side by
+side.  Without Redis each notification is pushed on its own, as before.
+
+A flush that FCM failed retries with the entries it could not send.  A flush that could not be
+scheduled leaves its entries queued; the periodic ``flush-push-notifications``
+run picks them up.
+"""
+
+import json
+import logging
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .firebase import FCMUnavailableError, build_message, send_messages
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "notifications:push:pending"
+SCHEDULED_KEY = "notifications:push:flush-scheduled"
+COALESCE_SECONDS = 2
+# A scheduled flag outliving this means its flush was lost; the next push
+# then schedules another.
+SCHEDULED_TTL = 60
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def queue_push(notification_id, user_ids):
+    """Push ``notification_id`` to ``user_ids`` with the next coalesced flush."""
+    from .tasks import flush_push_notifications_task, send_push_notification_task
+
+    try:
+        redis = _redis()
+        redis.rpush(
+            cache.make_key(PENDING_KEY), json.dumps([notification_id, user_ids])
+        )
+        schedule = redis.set(
+            cache.make_key(SCHEDULED_KEY), 1, nx=True, ex=SCHEDULED_TTL
+        )
+    except Exception:
+        logger.warning("queue_push: Redis unavailable, pushing %s now", notification_id)
+        send_push_notification_task.delay(notification_id, user_ids)
+        return
+
+    if not schedule:
+        return
+    try:
+        flush_push_notifications_task.apply_async(countdown=COALESCE_SECONDS)
+    except Exception:
+        logger.warning("queue_push: could not schedule a flush for %s", notification_id)
+        # Let the next push schedule one; until then the periodic flush
+        # covers the queued entries.
+        try:
+            redis.delete(cache.make_key(SCHEDULED_KEY))
+        except Exception:
+            pass
+
+
+def take_pending():
+    """Atomically take the queued ``[notification_id, user_ids]`` entries."""
+    pipeline = _redis().pipeline(transaction=True)
+    pipeline.lrange(cache.make_key(PENDING_KEY), 0, -1)
+    pipeline.delete(cache.make_key(PENDING_KEY))
+    pipeline.delete(cache.make_key(SCHEDULED_KEY))
+    entries, _, _ = pipeline.execute()
+    return [json.loads(entry) for entry in entries]
+
+
+def _push_data(notification):
+    data = {k: str(v) for k, v in (notification.data or {}).items()}
+    data["event_type"] = notification.event_type
+    data["notification_id"] = str(notification.id)
+    return data
+
+
+def push_notifications(entries):
+    """
+    Push every ``(notification_id, user_ids)`` entry to the users' active
+    devices.  Returns the :class:`~notifications.firebase.BatchResult` of
+    each FCM batch.
+
+    When FCM is unavailable the :class:`~notifications.firebase.FCMUnavailableError`
+    propagates with ``entries`` set to what is left to push: each entry with
+    an unsent message, narrowed to the users those messages were for.
+    """
+    from accounts.models import UserDevice
+
+    from .models import Notification
+
+    notifications = {
+        str(pk): notification
+        for pk, notification in Notification.objects.in_bulk(
+            [notification_id for notification_id, _ in entries]
+        ).items()
+    }
+    user_ids = {str(user_id) for _, ids in entries for user_id in ids}
+    tokens_by_user = defaultdict(set)
+    for user_id, token in UserDevice.objects.filter(
+        user_id__in=user_ids, is_active=True
+    ).values_list("user_id", "fcm_token"):
+        tokens_by_user[str(user_id)].add(token)
+
+    by_devices = defaultdict(list)
+    for notification_id, ids in entries:
+        notification = notifications.get(str(notification_id))
+        if notification is None:
+            logger.error("Notification %s not found, skipping push", notification_id)
+            continue
+        tokens = frozenset().union(*(tokens_by_user[str(uid)] for uid in ids))
+        if not tokens:
+            logger.info("No FCM tokens found for notification %s", notification_id)
+            continue
+        by_devices[tokens].append(notification)
+
+    messages = [
+        build_message(
+            token, notification.title, notification.message, _push_data(notification)
+        )
+        for tokens, group in by_devices.items()
+        for notification in group
+        for token in sorted(tokens)
+    ]
+    try:
+        return send_messages(messages)
+    except FCMUnavailableError as exc:
+        unsent = {
+            (message.data["notification_id"], message.token) for message in exc.unsent
+        }
+        exc.entries = []
+        for notification_id, ids in entries:
+            ids = [
+                user_id
+                for user_id in ids
+                if any(
+                    (str(notification_id), token) in unsent
+                    for token in tokens_by_user[str(user_id)]
+                )
+            ]
+            if ids:
+                exc.entries.append([notification_id, ids])
+        raise
@@ -0,0 +1,65 @@
+"""
+Real-time notification delivery over the channel layer.
+
+Every open ``NotificationConsumer`` joins its user's group and the group of
+each business the user works for.  Once a notification commits,
+``publish_notification`` sends it to the recipients' user groups, or to the
+business group once for a broadcast.  The recipients' cached unread counts
+are incremented first, so each consumer sends its user's new count without
+a query, and the apps no longer poll the list and unread-count endpoints.
+"""
+
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .inbox import bump_unread_counts
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_EVENT = "notification.created"
+
+
+def user_group(user_id):
+    return f"notifications.user.{user_id}"
+
+
+def business_group(business_id):
+    return f"notifications.business.{business_id}"
+
+
+def _payload(notification):
+    from .serializers import NotificationSerializer
+
+    # A new notification is unread by everyone it reaches.
+    notification.is_read_by_user = False
+    data = NotificationSerializer(notification).data
+    # Channel layers carry plain JSON types only (no UUIDs or datetimes).
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+def publish_notification(notification, user_ids, broadcast):
+    """
+    Send ``notification`` to the open connections of ``user_ids``, or of its
+    whole business when ``broadcast``.  Failures are logged, never raised:
+    connected apps catch up through the REST endpoints.
+    """
+    bump_unread_counts(user_ids)
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        event = {"type": NOTIFICATION_EVENT, "notification": _payload(notification)}
+        if broadcast:
+            groups = [business_group(notification.business_id)]
+        else:
+            groups = [user_group(user_id) for user_id in user_ids]
+        for group in groups:
+            async_to_sync(channel_layer.group_send)(group, event)
+    except Exception:
+        logger.warning(
+            "publish_notification: could not publish %s", notification.id, exc_info=True
+        )
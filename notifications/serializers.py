@@ -14,6 +14,8 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ["event_type", "data", "business"]
 
     def get_is_read(self, obj):
+        if hasattr(obj, "is_read_by_user"):
+            return obj.is_read_by_user
         return obj.recipients.filter(
             recipient=self.context["request"].user, is_read=True
         ).exists()
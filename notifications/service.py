@@ -2,6 +2,7 @@ import logging
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import IntegrityError, transaction
 from django.utils import timezone
 
@@ -10,6 +11,11 @@ from .models import Notification, NotificationRecipient
 
 logger = logging.getLogger(__name__)
 
+NOTIFICATION_OUTBOX_TOPIC = "notification.create"
+STOCK_CHECK_OUTBOX_TOPIC = "stock.check"
+
+DEDUP_CACHE_KEY = "notifications:dedup:{}"
+
 
 def send_email_notification(subject, message, recipients, html_message=None):
     """Send an email, asynchronously via Celery when enabled.
@@ -129,6 +135,33 @@ def _get_business_user_ids(business):
     )
 
 
+def notification_dedup_key(event_type, business, deduplicate_key, value):
+    """The ``Notification.dedup_key`` of a notification deduplicated on ``value``."""
+    business_id = business.pk if business else None
+    return f"{event_type}:{business_id}:{deduplicate_key}:{value}"
+
+
+def _claim_dedup_key(dedup_key, window_seconds):
+    """
+    Atomically claim ``dedup_key`` for the window (``SET NX EX``).  Returns
+    False when it is already claimed, None when the cache is unavailable.
+    """
+    try:
+        return cache.add(DEDUP_CACHE_KEY.format(dedup_key), 1, window_seconds)
+    except Exception:
+        logger.warning("create_notification: cache unavailable, deduplicating in DB")
+        return None
+
+
+def _release_dedup_key(dedup_key):
+    try:
+        cache.delete(DEDUP_CACHE_KEY.format(dedup_key))
+    except Exception:
+        logger.warning(
+            "create_notification: cache unavailable, not releasing %s", dedup_key
+        )
+
+
 def create_notification(
     *,
     title,
@@ -138,12 +171,13 @@ def create_notification(
     notification_type="info",
     data=None,
     recipient_user_ids=None,
+    broadcast=None,
     deduplicate_key=None,
     deduplicate_window_hours=24,
     delivery_methods="platform, push, telegram",
 ):
     """
-    Create a Notification + NotificationRecipient rows and dispatch push via Celery.
+    Create a Notification (+ NotificationRecipient rows) and dispatch push via Celery.
 
     Args:
         title: Notification title.
@@ -153,26 +187,38 @@ def create_notification(
         notification_type: info / warning / error / success.
         data: Dict of extra context (item_id, variant_id, etc.).
         recipient_user_ids: Explicit list of user IDs. If None, all business employees.
+        broadcast: Store one row for the whole business instead of a recipient
+                   row per employee (see notifications.inbox).  Defaults to
+                   True when recipient_user_ids is None.
         deduplicate_key: If set, skip creation when a notification with the same
-                         event_type and this key in data was created within the window.
+                         event_type and this key in data was created within the window
+                         (checked on ``Notification.dedup_key``).
         deduplicate_window_hours: Hours to look back for deduplication.
         delivery_methods: Comma-separated string of delivery methods (e.g., "platform, push, telegram").
     """
-    from .tasks import send_push_notification_task, send_telegram_notification_task
+    from .push import queue_push
+    from .realtime import publish_notification
+    from .tasks import send_telegram_notification_task
+
+    if broadcast is None:
+        broadcast = recipient_user_ids is None and business is not None
 
+    dedup_key = None
     if deduplicate_key:
-        cutoff = timezone.now() - timedelta(hours=deduplicate_window_hours)
-        if Notification.objects.filter(
-            event_type=event_type,
-            business=business,
-            data__contains={deduplicate_key: data.get(deduplicate_key)},
-            created_at__gte=cutoff,
-        ).exists():
-            logger.debug(
-                "Skipping duplicate %s notification for %s",
-                event_type,
-                data.get(deduplicate_key),
-            )
+        dedup_key = notification_dedup_key(
+            event_type, business, deduplicate_key, (data or {}).get(deduplicate_key)
+        )
+        window = timedelta(hours=deduplicate_window_hours)
+        # The cache claim settles nearly every duplicate in one round-trip;
+        # the indexed DB probe covers a cold, flushed or unreachable cache.
+        claimed = _claim_dedup_key(dedup_key, int(window.total_seconds()))
+        if (
+            claimed is False
+            or Notification.objects.filter(
+                dedup_key=dedup_key, created_at__gte=timezone.now() - window
+            ).exists()
+        ):
+            logger.debug("Skipping duplicate notification %s", dedup_key)
             return None
 
     payload = dict(data or {})
@@ -197,6 +243,8 @@ def create_notification(
                 business=business,
                 data=payload,
                 delivery_method="push",
+                send_to_recipients_only=not broadcast,
+                dedup_key=dedup_key,
             )
 
             notification.data = {
@@ -210,18 +258,24 @@ def create_notification(
 
             user_id_strings = [str(uid) for uid in recipient_user_ids]
 
-            NotificationRecipient.objects.bulk_create(
-                [
-                    NotificationRecipient(notification=notification, recipient_id=uid)
-                    for uid in recipient_user_ids
-                ]
-            )
+            if not broadcast:
+                NotificationRecipient.objects.bulk_create(
+                    [
+                        NotificationRecipient(
+                            notification=notification, recipient_id=uid
+                        )
+                        for uid in recipient_user_ids
+                    ]
+                )
 
+            # Open app connections get every notification, whatever its
+            # delivery methods; it is in their inbox either way.
+            transaction.on_commit(
+                lambda: publish_notification(notification, user_id_strings, broadcast)
+            )
             if "push" in delivery_methods:
                 transaction.on_commit(
-                    lambda: send_push_notification_task.delay(
-                        str(notification.id), user_id_strings
-                    )
+                    lambda: queue_push(str(notification.id), user_id_strings)
                 )
             if "telegram" in delivery_methods:
                 transaction.on_commit(
@@ -231,6 +285,9 @@ def create_notification(
                 )
 
     except Exception:
+        if dedup_key:
+            # Let a retry of this notification through.
+            _release_dedup_key(dedup_key)
         logger.warning(
             "create_notification: failed to create '%s' notification for business %s",
             event_type,
@@ -240,3 +297,29 @@ def create_notification(
         return None
 
     return notification
+
+
+def enqueue_notification(*, business, **kwargs):
+    """
+    Outbox-backed variant of ``create_notification`` for signal receivers.
+
+    Writes one outbox row in the caller's transaction instead of creating the
+    Notification and recipient rows inline; ``create_notification_task``
+    performs the fan-out after commit.  Accepts the same keyword arguments as
+    ``create_notification``; ``data`` must be JSON serialisable.
+    """
+    from core.outbox import publish
+
+    try:
+        with transaction.atomic():
+            publish(
+                NOTIFICATION_OUTBOX_TOPIC,
+                {"business_id": str(business.pk), **kwargs},
+            )
+    except Exception:
+        logger.warning(
+            "enqueue_notification: failed to record '%s' notification for business %s",
+            kwargs.get("event_type"),
+            business.pk if business else None,
+            exc_info=True,
+        )
@@ -1,15 +1,16 @@
 import logging
+from decimal import Decimal
 
-from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from core.outbox import publish
 from inventories.models import Item, SuppliedItem
 from inventories.signals import item_variant_price_changed
-from orders.signals import order_completed
+from orders.signals import order_completed, orders_synced
 
-from .service import create_notification
-from .tasks import check_low_stock_task
+from .bulk import defer
+from .service import STOCK_CHECK_OUTBOX_TOPIC, enqueue_notification
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +25,10 @@ def on_restocked(sender, instance, created, **kwargs):
     variant = instance.variant
     if not item:
         return
+    if defer(instance.business_id, "restocked", variant.id, units=instance.quantity):
+        return
 
-    create_notification(
+    enqueue_notification(
         title="Restocked",
         message=(
             f"{item.name} ({variant.name}) has been restocked "
@@ -53,8 +56,10 @@ def on_price_changed(sender, instance, **kwargs):
     supplied_item = instance
     item = supplied_item.item
     variant = supplied_item.variant
+    if defer(supplied_item.business_id, "repriced", variant.id):
+        return
 
-    create_notification(
+    enqueue_notification(
         title="Price Change",
         message=(
             f"The price for {item.name} ({variant.name}) "
@@ -79,10 +84,10 @@ def on_price_changed(sender, instance, **kwargs):
 @receiver(order_completed)
 def on_order_completed_check_stock(sender, instance, **kwargs):
     """
-    After an order is completed, schedule an async check to see if any
-    of the sold variants have dropped below their low-stock threshold.
-    The Celery task runs after the DB transaction commits so all quantity
-    decrements are already persisted.
+    After an order is completed, record an outbox event for an async check
+    of whether any of the sold variants dropped below their low-stock
+    threshold.  The event is only dispatched once the checkout transaction
+    commits, so all quantity decrements are already persisted.
     """
     order = instance
     variant_ids = list(order.items.values_list("variant_id", flat=True))
@@ -91,15 +96,18 @@ def on_order_completed_check_stock(sender, instance, **kwargs):
 
     id_strings = [str(vid) for vid in variant_ids]
     business_id = str(order.business_id)
-    transaction.on_commit(lambda: check_low_stock_task.delay(id_strings, business_id))
+    publish(
+        STOCK_CHECK_OUTBOX_TOPIC,
+        {"variant_ids": id_strings, "business_id": business_id},
+    )
 
 
 # ── Order Completed → Notification ──────────────────────────────────────────
 @receiver(order_completed)
 def on_order_completed_notify(sender, instance, **kwargs):
-    """Create a notification when an order is completed."""
+    """Queue a notification when an order is completed."""
     order = instance
-    create_notification(
+    enqueue_notification(
         title="Order Completed",
         message=f"Order #{str(order.id)[:8]} has been completed — total: {order.total_payable}.",
         event_type="order_completed",
@@ -113,6 +121,41 @@ def on_order_completed_notify(sender, instance, **kwargs):
     )
 
 
+# ── Offline Orders Synced → Stock check + one summary notification ─────────
+@receiver(orders_synced)
+def on_orders_synced(sender, orders, order_items, **kwargs):
+    """
+    Offline batch sync completes many orders at once; check stock for the
+    union of sold variants in one task and post a single summary notification
+    instead of one per order.
+    """
+    if not orders:
+        return
+
+    business = orders[0].business
+    id_strings = sorted({str(item.variant_id) for item in order_items})
+    business_id = str(business.pk)
+    if id_strings:
+        publish(
+            STOCK_CHECK_OUTBOX_TOPIC,
+            {"variant_ids": id_strings, "business_id": business_id},
+        )
+
+    total = sum((order.total_payable for order in orders), Decimal("0"))
+    enqueue_notification(
+        title="Offline Orders Synced",
+        message=f"{len(orders)} offline order(s) have been completed — total: {total}.",
+        event_type="order_completed",
+        business=business,
+        notification_type="success",
+        data={
+            "order_count": len(orders),
+            "total_payable": str(total),
+        },
+        delivery_methods="platform, telegram",
+    )
+
+
 # ── Product Updated ─────────────────────────────────────────────────────────
 @receiver(post_save, sender=Item)
 def on_product_updated(sender, instance, created, **kwargs):
@@ -122,8 +165,10 @@ def on_product_updated(sender, instance, created, **kwargs):
     """
     if created:
         return
+    if defer(instance.business_id, "updated", instance.id):
+        return
 
-    create_notification(
+    enqueue_notification(
         title="Product Updated",
         message=f"{instance.name} has been updated.",
         event_type="product_updated",
@@ -155,7 +200,7 @@ def on_inventory_movement_status_changed(sender, instance, created, **kwargs):
     else:
         return
 
-    create_notification(
+    enqueue_notification(
         title="Inventory Movement",
         message=msg,
         event_type="inventory_movement",
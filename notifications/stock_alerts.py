@@ -0,0 +1,139 @@
+"""
+Low-stock digests.
+
+``evaluate_low_stock`` checks a set of variants (the ones a checkout sold,
+or every variant of a branch or of the platform for the periodic sweep) in
+a fixed number of queries:
+
+- one query finds the variants at or below their item's ``notify_below``
+  that no digest included within ``ALERT_WINDOW`` (``LowStockAlert``);
+- each business gets a single ``low_stock`` notification listing them;
+- one upsert records them as alerted.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LowStockAlert
+
+logger = logging.getLogger(__name__)
+
+ALERT_WINDOW = timedelta(hours=24)
+# Variants named in a digest's message; the data carries all of them.
+DIGEST_LISTED_VARIANTS = 5
+
+
+def _digest(variants):
+    """``(message, data)`` of the digest for one business's ``variants``."""
+    entries = [
+        {
+            "item_id": str(variant["item_id"]),
+            "variant_id": str(variant["id"]),
+            "item_name": variant["item__name"],
+            "variant_name": variant["name"],
+            "current_quantity": variant["quantity"],
+            "threshold": variant["item__notify_below"],
+        }
+        for variant in variants
+    ]
+    if len(entries) == 1:
+        entry = entries[0]
+        message = (
+            f"{entry['item_name']} ({entry['variant_name']}) is running low — "
+            f"only {entry['current_quantity']} units remaining "
+            f"(threshold: {entry['threshold']})."
+        )
+    else:
+        listed = ", ".join(
+            f"{entry['item_name']} ({entry['variant_name']}): "
+            f"{entry['current_quantity']} left"
+            for entry in entries[:DIGEST_LISTED_VARIANTS]
+        )
+        more = len(entries) - DIGEST_LISTED_VARIANTS
+        message = f"{len(entries)} items are running low — {listed}"
+        message += f" and {more} more." if more > 0 else "."
+
+    data = {"variants": entries, "variant_ids": [e["variant_id"] for e in entries]}
+    item_ids = {entry["item_id"] for entry in entries}
+    if len(item_ids) == 1:
+        # Lets the deep link open the item itself.
+        data["item_id"] = item_ids.pop()
+    if len(entries) == 1:
+        data.update(entries[0])
+    return message, data
+
+
+def evaluate_low_stock(*, variant_ids=None, business_id=None, branch_id=None):
+    """
+    Send one low-stock digest per business for the breaching variants among
+    ``variant_ids`` (every variant when None) of ``business_id`` /
+    ``branch_id``.  Returns the number of digests sent.
+    """
+    from business.models import Business
+    from inventories.models import ItemVariant
+
+    from .service import create_notification
+
+    now = timezone.now()
+    breaching = ItemVariant.objects.filter(
+        item__is_active=True, quantity__lte=F("item__notify_below")
+    ).exclude(
+        pk__in=LowStockAlert.objects.filter(alerted_at__gt=now - ALERT_WINDOW).values(
+            "variant_id"
+        )
+    )
+    if variant_ids is not None:
+        breaching = breaching.filter(pk__in=variant_ids)
+    if business_id is not None:
+        breaching = breaching.filter(item__business_id=business_id)
+    if branch_id is not None:
+        breaching = breaching.filter(item__branch_id=branch_id)
+
+    by_business = defaultdict(list)
+    for variant in breaching.values(
+        "id",
+        "name",
+        "quantity",
+        "item_id",
+        "item__name",
+        "item__notify_below",
+        "item__business_id",
+    ).order_by("item__business_id", "quantity", "item__name"):
+        by_business[variant["item__business_id"]].append(variant)
+    if not by_business:
+        return 0
+
+    businesses = Business.objects.in_bulk(list(by_business))
+    sent = 0
+    alerted = []
+    for business_id, variants in by_business.items():
+        message, data = _digest(variants)
+        notification = create_notification(
+            title="Low Stock Alert",
+            message=message,
+            event_type="low_stock",
+            business=businesses[business_id],
+            notification_type="warning",
+            data=data,
+        )
+        if notification is not None:
+            sent += 1
+            alerted += [
+                LowStockAlert(
+                    variant_id=variant["id"], business_id=business_id, alerted_at=now
+                )
+                for variant in variants
+            ]
+
+    LowStockAlert.objects.bulk_create(
+        alerted,
+        update_conflicts=True,
+        unique_fields=["variant"],
+        update_fields=["alerted_at"],
+    )
+    logger.info("Low stock: %d variant(s) alerted in %d digest(s)", len(alerted), sent)
+    return sent
@@ -3,6 +3,9 @@ import logging
 from celery import shared_task
 
 from core.celery.queues import CeleryQueue
+from core.outbox import register_handler
+
+from .service import NOTIFICATION_OUTBOX_TOPIC, STOCK_CHECK_OUTBOX_TOPIC
 
 logger = logging.getLogger(__name__)
 
@@ -13,42 +16,66 @@ def send_push_notification_task(notification_id, user_ids):
     Fetch the Notification from DB, look up FCM tokens for the given users,
     and deliver via Firebase Cloud Messaging.
     """
-    from accounts.models import UserDevice
-
-    from .firebase import send_multicast_notification
-    from .models import Notification
+    from .firebase import FCMUnavailableError
+    from .push import push_notifications
 
     try:
-        notification = Notification.objects.get(id=notification_id)
-    except Notification.DoesNotExist:
-        logger.error("Notification %s not found, skipping push", notification_id)
+        results = push_notifications([(notification_id, user_ids)])
+    except FCMUnavailableError as exc:
+        logger.error("Push notification %s not delivered: %s", notification_id, exc)
         return
+    if results:
+        logger.info(
+            "Push notification %s delivered to %d/%d devices",
+            notification_id,
+            sum(result.success_count for result in results),
+            sum(result.size for result in results),
+        )
 
-    tokens = list(
-        UserDevice.objects.filter(user_id__in=user_ids, is_active=True)
-        .values_list("fcm_token", flat=True)
-        .distinct()
-    )
-
-    if not tokens:
-        logger.info("No FCM tokens found for notification %s", notification_id)
-        return
 
-    data = {k: str(v) for k, v in (notification.data or {}).items()}
-    data["event_type"] = notification.event_type
-    data["notification_id"] = str(notification.id)
+@shared_task(
+    queue=CeleryQueue.Definitions.REAL_TIME_NOTIFICATIONS,
+    bind=True,
+    max_retries=3,
+    default_retry_delay=30,
+)
+def flush_push_notifications_task(self, entries=None):
+    """
+    Push every notification ``push.queue_push`` coalesced since the last flush.
 
-    sent = send_multicast_notification(
-        fcm_tokens=tokens,
-        title=notification.title,
-        body=notification.message,
-        data=data,
-    )
+    The entries taken from the queue travel with the retries, so a failed
+    push loses none of them, and one FCM failed part-way retries only what
+    it did not send.  Also runs periodically to pick up entries whose
+    scheduled flush never ran.
+    """
+    from .firebase import FCMUnavailableError
+    from .push import push_notifications, take_pending
+
+    if entries is None:
+        try:
+            entries = take_pending()
+        except Exception:
+            logger.warning("flush_push_notifications_task: Redis unavailable")
+            return
+    if not entries:
+        return
+    try:
+        results = push_notifications(entries)
+    except Exception as exc:
+        if isinstance(exc, FCMUnavailableError):
+            entries = exc.entries
+        logger.warning(
+            "Pushing %d coalesced notification(s) failed (attempt %d/%d): %s",
+            len(entries),
+            self.request.retries + 1,
+            self.max_retries + 1,
+            exc,
+        )
+        raise self.retry(exc=exc, kwargs={"entries": entries})
     logger.info(
-        "Push notification %s delivered to %d/%d devices",
-        notification_id,
-        sent,
-        len(tokens),
+        "Pushed %d coalesced notification(s) in %d FCM batch(es)",
+        len(entries),
+        len(results),
     )
 
 
@@ -111,12 +138,15 @@ def send_telegram_notification_task(notification_id, user_ids):
 
     Runs alongside the FCM push task; users without a ``telegram_id`` are simply
     skipped, so this is effectively opt-in by virtue of having linked Telegram.
+    Delivery is concurrent and rate limited (see ``telegram_delivery.deliver``);
+    returns the number of chats per outcome status.
     """
+    from collections import Counter
+
     from django.contrib.auth import get_user_model
 
     from .models import Notification
-    from .telegram_bot import _send_bot_message_sync
-    from .telegram_delivery import format_notification
+    from .telegram_delivery import deliver, format_notification
 
     try:
         notification = Notification.objects.get(id=notification_id)
@@ -136,17 +166,28 @@ def send_telegram_notification_task(notification_id, user_ids):
         return
 
     text, reply_markup = format_notification(notification)
-    sent = 0
-    for tg_id in telegram_ids:
-        if _send_bot_message_sync(tg_id, text, reply_markup=reply_markup)["ok"]:
-            sent += 1
-
+    outcomes = deliver(telegram_ids, text, reply_markup)
+    for tg_id, outcome in outcomes.items():
+        if outcome.status != "sent":
+            logger.warning(
+                "Telegram notification %s not delivered to %s (%s after %d "
+                "attempt(s), error_code=%s): %s",
+                notification_id,
+                tg_id,
+                outcome.status,
+                outcome.attempts,
+                outcome.error_code,
+                outcome.description,
+            )
+
+    summary = Counter(outcome.status for outcome in outcomes.values())
     logger.info(
         "Telegram notification %s delivered to %d/%d users",
         notification_id,
-        sent,
+        summary["sent"],
         len(telegram_ids),
     )
+    return dict(summary)
 
 
 @shared_task(
@@ -197,13 +238,12 @@ def send_bot_message_task(self, telegram_id, text, reply_markup=None):
 def check_low_stock_task(variant_ids, business_id):
     """
     After an order is completed, check whether any of the sold variants
-    have dropped below their item's notify_below threshold.
-    Creates a low-stock notification for each one (deduplicated over 24 h).
+    have dropped below their item's notify_below threshold and send the
+    business one digest of them (each variant at most once per 24 h).
     """
     from business.models import Business
-    from inventories.models import ItemVariant
 
-    from .service import create_notification
+    from .stock_alerts import evaluate_low_stock
 
     # The business may have been hard-deleted between when the order completed
     # and when this async task runs. Skip silently rather than raise an FK error.
@@ -213,33 +253,36 @@ def check_low_stock_task(variant_ids, business_id):
         )
         return
 
-    variants = ItemVariant.objects.filter(id__in=variant_ids).select_related(
-        "item", "item__business"
-    )
+    evaluate_low_stock(variant_ids=variant_ids, business_id=business_id)
 
-    for variant in variants:
-        item = variant.item
-        if variant.quantity > item.notify_below:
-            continue
-
-        create_notification(
-            title="Low Stock Alert",
-            message=(
-                f"{item.name} ({variant.name}) is running low — "
-                f"only {variant.quantity} units remaining "
-                f"(threshold: {item.notify_below})."
-            ),
-            event_type="low_stock",
-            business=item.business,
-            notification_type="warning",
-            data={
-                "item_id": str(item.id),
-                "variant_id": str(variant.id),
-                "item_name": item.name,
-                "variant_name": variant.name,
-                "current_quantity": variant.quantity,
-                "threshold": item.notify_below,
-            },
-            deduplicate_key="variant_id",
-            deduplicate_window_hours=24,
+
+@shared_task(queue=CeleryQueue.Definitions.INVENTORY_ALERTS)
+def sweep_low_stock_task(branch_id=None):
+    """
+    Periodic sweep for stock changed outside checkout (adjustments, imports,
+    movements): evaluate every variant of ``branch_id``, or of every branch.
+    """
+    from .stock_alerts import evaluate_low_stock
+
+    return evaluate_low_stock(branch_id=branch_id)
+
+
+@shared_task(queue=CeleryQueue.Definitions.REAL_TIME_NOTIFICATIONS)
+def create_notification_task(business_id, **kwargs):
+    """Outbox handler: create a notification recorded by ``enqueue_notification``."""
+    from business.models import Business
+
+    from .service import create_notification
+
+    business = Business.objects.filter(pk=business_id).first()
+    if business is None:
+        logger.warning(
+            "create_notification_task: business %s no longer exists, skipping",
+            business_id,
         )
+        return
+    create_notification(business=business, **kwargs)
+
+
+register_handler(NOTIFICATION_OUTBOX_TOPIC, create_notification_task)
+register_handler(STOCK_CHECK_OUTBOX_TOPIC, check_low_stock_task)
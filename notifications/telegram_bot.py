@@ -13,14 +13,21 @@ Two responsibilities:
 
 import logging
 
-import requests
 from django.conf import settings
 
+from core.http import pooled_session
+
 logger = logging.getLogger(__name__)
 
 _API_BASE = "https://api.telegram.org"
 _TIMEOUT = 10
 
+# Connections kept open to the Bot API; at least the delivery concurrency
+# (see notifications.telegram_delivery) so concurrent sends never queue for one.
+_POOL_MAXSIZE = 16
+
+SESSION_NAME = "telegram"
+
 # The update types we care about — keeps Telegram from sending us everything.
 ALLOWED_UPDATES = ["message", "edited_message", "callback_query"]
 
@@ -32,14 +39,21 @@ def _bot_token():
     return token
 
 
+def _get_session():
+    """The process-wide pooled session for Bot API calls, created on first use."""
+    return pooled_session(SESSION_NAME, _POOL_MAXSIZE)
+
+
 def _request(method, payload=None, *, timeout=_TIMEOUT):
     """Low-level Bot API call. Never raises; returns a result dict::
 
-        {ok, result, status_code, error_code, description, transient}
+        {ok, result, status_code, error_code, description, transient,
+         retry_after}
 
     ``transient`` marks failures worth retrying (network errors, 429 rate
     limits, 5xx). 4xx errors (bad token, chat not found, bot blocked / can't
-    initiate) are permanent and must not be retried.
+    initiate) are permanent and must not be retried.  ``retry_after`` is the
+    wait in seconds Telegram asks for on a 429.
     """
     token = _bot_token()
     if not token:
@@ -50,11 +64,13 @@ def _request(method, payload=None, *, timeout=_TIMEOUT):
             "error_code": None,
             "description": "TELEGRAM_BOT_TOKEN not configured",
             "transient": False,
+            "retry_after": None,
         }
 
+    api_base = getattr(settings, "TELEGRAM_API_BASE", _API_BASE)
     try:
-        resp = requests.post(
-            f"{_API_BASE}/bot{token}/{method}",
+        resp = _get_session().post(
+            f"{api_base}/bot{token}/{method}",
             json=payload or {},
             timeout=timeout,
         )
@@ -67,6 +83,7 @@ def _request(method, payload=None, *, timeout=_TIMEOUT):
             "error_code": None,
             "description": str(exc),
             "transient": True,
+            "retry_after": None,
         }
 
     try:
@@ -82,6 +99,7 @@ def _request(method, payload=None, *, timeout=_TIMEOUT):
             "error_code": None,
             "description": None,
             "transient": False,
+            "retry_after": None,
         }
 
     error_code = data.get("error_code", resp.status_code)
@@ -101,6 +119,7 @@ def _request(method, payload=None, *, timeout=_TIMEOUT):
         "error_code": error_code,
         "description": description,
         "transient": transient,
+        "retry_after": (data.get("parameters") or {}).get("retry_after"),
     }
 
 
@@ -1,18 +1,48 @@
-"""Render Notifications for delivery as Telegram bot messages.
+"""Render and deliver Notifications as Telegram bot messages.
 
-Turns a :class:`~notifications.models.Notification` into the HTML text and
-inline keyboard used by :func:`notifications.tasks.send_telegram_notification_task`.
+:func:`format_notification` turns a :class:`~notifications.models.Notification`
+into the HTML text and inline keyboard used by
+:func:`notifications.tasks.send_telegram_notification_task`, and
+:func:`deliver` sends it to many chats at once:
+
+* up to ``DELIVERY_CONCURRENCY`` sends in flight over the bot's pooled
+  session (:func:`notifications.telegram_bot._get_session`);
+* every send first takes a token from a :class:`TokenBucket` shared by all
+  workers through Redis, keeping the bot under Telegram's ~30 messages per
+  second;
+* a 429 pauses the bucket for everyone for its ``retry_after`` before the
+  message is retried;
+* each chat gets an :class:`Outcome`.
 """
 
 import html
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 from django.conf import settings
+from django.core.cache import cache
 
+from . import telegram_bot
 from .deep_links import deep_link_for_notification
 
 logger = logging.getLogger(__name__)
 
+DELIVERY_CONCURRENCY = 8
+# Telegram allows about 30 messages per second per bot.  A full bucket plus
+# a second of refill is the most any one-second window sees, so keep
+# BURST + RATE_PER_SECOND under it.
+RATE_PER_SECOND = 25
+BURST = 5
+MAX_ATTEMPTS = 3
+# A 429 asking for a longer wait than this is not slept through inside a task.
+MAX_RETRY_AFTER = 30
+RETRY_BACKOFF_SECONDS = 0.5
+# How long to stay on the per-process bucket after Redis failed.
+REDIS_RETRY_SECONDS = 30
+
 _TYPE_EMOJI = {
     "info": "ℹ️",
     "warning": "⚠️",
@@ -56,3 +86,183 @@ def _app_markup(notification):
 
     url = base.rstrip("/") + path
     return {"inline_keyboard": [[{"text": "Open in app", "web_app": {"url": url}}]]}
+
+
+# Takes one token (or records a pause) and returns the seconds to wait
+# before trying again, 0 when a token was taken.  Refill is computed from
+# the server clock so every worker agrees on it.
+_TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local pause = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at', 'until')
+local tokens = tonumber(state[1]) or capacity
+local at = tonumber(state[2]) or now
+local blocked = tonumber(state[3]) or 0
+if pause > 0 then
+  blocked = math.max(blocked, now + pause)
+  tokens = 0
+end
+tokens = math.min(capacity, tokens + math.max(0, now - math.max(at, blocked)) * rate)
+local wait = 0
+if now < blocked then
+  wait = blocked - now
+elseif tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now), 'until', tostring(blocked))
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """
+    ``rate`` tokens per second up to ``capacity``, shared by every worker
+    through Redis when ``shared``.  While Redis is unreachable each process
+    falls back to its own bucket.
+    """
+
+    def __init__(self, key, rate=RATE_PER_SECOND, capacity=BURST, shared=True):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.shared = shared
+        self._script = None
+        self._redis_down_until = 0
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._at = time.monotonic()
+        self._blocked = 0
+
+    def acquire(self):
+        """Block until a token is taken."""
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hand out no tokens for ``seconds`` (a 429's ``retry_after``)."""
+        self._take(pause=seconds)
+
+    def _take(self, pause=0):
+        if self.shared and time.monotonic() >= self._redis_down_until:
+            try:
+                return self._take_shared(pause)
+            except Exception:
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+                logger.warning(
+                    "TokenBucket %s: Redis unavailable, limiting per process",
+                    self.key,
+                )
+        return self._take_local(pause)
+
+    def _take_shared(self, pause):
+        if self._script is None:
+            from django_redis import get_redis_connection
+
+            self._script = get_redis_connection("default").register_script(
+                _TAKE_TOKEN_SCRIPT
+            )
+        wait = self._script(
+            keys=[cache.make_key(self.key)], args=[self.rate, self.capacity, pause]
+        )
+        return float(wait)
+
+    def _take_local(self, pause):
+        with self._lock:
+            now = time.monotonic()
+            if pause > 0:
+                self._blocked = max(self._blocked, now + pause)
+                self._tokens = 0
+            refill_from = max(self._at, self._blocked)
+            self._tokens = min(
+                self.capacity,
+                self._tokens + max(0, now - refill_from) * self.rate,
+            )
+            self._at = now
+            if now < self._blocked:
+                return self._blocked - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+def get_bucket():
+    """The bot's shared send bucket."""
+    global _bucket
+    with _bucket_lock:
+        if _bucket is None:
+            _bucket = TokenBucket("telegram:send-rate")
+        return _bucket
+
+
+@dataclass
+class Outcome:
+    """How delivery to one chat ended: ``sent``, ``failed`` or ``rate_limited``."""
+
+    status: str
+    attempts: int
+    error_code: int | None = None
+    description: str | None = None
+
+
+def _deliver_one(telegram_id, text, reply_markup, bucket):
+    outcome = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        bucket.acquire()
+        result = telegram_bot._send_bot_message_sync(
+            telegram_id, text, reply_markup=reply_markup
+        )
+        if result["ok"]:
+            return Outcome("sent", attempt)
+
+        outcome = Outcome(
+            "failed", attempt, result.get("error_code"), result.get("description")
+        )
+        if not result.get("transient"):
+            return outcome
+        retry_after = result.get("retry_after")
+        if retry_after:
+            if retry_after > MAX_RETRY_AFTER:
+                outcome.status = "rate_limited"
+                return outcome
+            bucket.pause(retry_after)
+        elif attempt < MAX_ATTEMPTS:
+            time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+    return outcome
+
+
+def deliver(
+    telegram_ids,
+    text,
+    reply_markup=None,
+    *,
+    concurrency=DELIVERY_CONCURRENCY,
+    bucket=None,
+):
+    """Send one message to every chat in ``telegram_ids``: ``{telegram_id: Outcome}``."""
+    telegram_ids = list(telegram_ids)
+    if not telegram_ids:
+        return {}
+    bucket = bucket or get_bucket()
+    with ThreadPoolExecutor(
+        max_workers=min(concurrency, len(telegram_ids)),
+        thread_name_prefix="telegram-delivery",
+    ) as pool:
+        outcomes = pool.map(
+            lambda telegram_id: _deliver_one(telegram_id, text, reply_markup, bucket),
+            telegram_ids,
+        )
+        return dict(zip(telegram_ids, outcomes))
@@ -0,0 +1,103 @@
+"""
+A local stand-in for the Bot API's ``sendMessage``, for benchmarking
+Telegram delivery without a bot or real chats.
+
+Each message is answered after ``latency`` seconds.  Like Telegram, the stub
+refuses messages beyond ``rate_limit`` per second with a 429 that carries
+``retry_after``.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.stub.record_connection()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        status_code, body = self.server.stub.answer()
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubBotAPI:
+    def __init__(self, latency=0.05, rate_limit=30, retry_after=1):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._accepted = deque()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._accepted.clear()
+            self.sent = 0
+            self.rejected = 0
+            self.connections = 0
+            self.peak_per_second = 0
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def answer(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._accepted and self._accepted[0] <= now - 1:
+                self._accepted.popleft()
+            rejected = len(self._accepted) >= self.rate_limit
+            if rejected:
+                self.rejected += 1
+            else:
+                self._accepted.append(now)
+                self.sent += 1
+                self.peak_per_second = max(self.peak_per_second, len(self._accepted))
+                message_id = self.sent
+        time.sleep(self.latency)
+        if rejected:
+            return 429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }
+        return 200, {"ok": True, "result": {"message_id": message_id}}
+
+    def start(self):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.stub = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,7 +1,11 @@
 import unittest
+from datetime import timedelta
 from unittest import mock
 
-from django.test import override_settings
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
 from rest_framework.test import APITestCase
 
 from notifications.deep_links import deep_link_for_notification
@@ -236,3 +240,889 @@ class TelegramWebhookViewTests(APITestCase):
         ):
             res = self.client.post(self.URL, self.UPDATE, format="json")
         self.assertEqual(res.status_code, 200)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class NotificationDeduplicationTests(APITestCase):
+    """``create_notification(deduplicate_key=...)``: cache claim, then DB probe."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from accounts.models import User
+        from business.models import Business
+
+        cache.clear()
+        self.owner = User.objects.create(
+            email="dedup@example.com", phone_number="933333333"
+        )
+        self.business = Business.objects.create(name="Dedup Shop", owner=self.owner)
+
+    def _notify(self, variant_id="v-1", **kwargs):
+        from notifications.service import create_notification
+
+        return create_notification(
+            title="Low Stock Alert",
+            message="Sugar is running low.",
+            event_type="low_stock",
+            business=self.business,
+            data={"variant_id": variant_id},
+            recipient_user_ids=[self.owner.id],
+            deduplicate_key="variant_id",
+            delivery_methods="platform",
+            **kwargs,
+        )
+
+    def test_duplicate_is_settled_by_the_cache_without_queries(self):
+        first = self._notify()
+        self.assertEqual(
+            first.dedup_key, f"low_stock:{self.business.pk}:variant_id:v-1"
+        )
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(self._notify())
+        self.assertIsNotNone(self._notify(variant_id="v-2"))
+
+    def test_cold_cache_falls_back_to_the_dedup_index(self):
+        from django.core.cache import cache
+
+        from notifications.models import Notification
+
+        self._notify()
+        cache.clear()
+        self.assertIsNone(self._notify())
+
+        # Outside the window the key no longer suppresses anything.
+        Notification.objects.update(created_at=timezone.now() - timedelta(hours=25))
+        cache.clear()
+        self.assertIsNotNone(self._notify())
+
+    def test_unreachable_cache_still_deduplicates(self):
+        with mock.patch("notifications.service.cache.add", side_effect=ConnectionError):
+            self.assertIsNotNone(self._notify())
+            self.assertIsNone(self._notify())
+
+    def test_failed_creation_releases_the_claim(self):
+        with mock.patch(
+            "notifications.service.NotificationRecipient.objects.bulk_create",
+            side_effect=RuntimeError,
+        ):
+            self.assertIsNone(self._notify())
+        self.assertIsNotNone(self._notify())
+
+
+class NotificationInboxTests(APITestCase):
+    """Broadcast and targeted notifications merged per user."""
+
+    def setUp(self):
+        from accounts.models import User
+        from business.models import Business, Employee
+
+        self.owner = User.objects.create(
+            email="owner@example.com", phone_number="944444444"
+        )
+        self.colleague = User.objects.create(
+            email="colleague@example.com", phone_number="955555555"
+        )
+        self.outsider = User.objects.create(
+            email="outsider@example.com", phone_number="966666666"
+        )
+        self.business = Business.objects.create(name="Inbox Shop", owner=self.owner)
+        Employee.objects.create(user=self.colleague, business=self.business)
+        Business.objects.create(name="Other Shop", owner=self.outsider)
+
+    def _notify(self, title, **kwargs):
+        from notifications.service import create_notification
+
+        return create_notification(
+            title=title,
+            message=f"{title} happened.",
+            event_type="general",
+            business=self.business,
+            delivery_methods="platform",
+            **kwargs,
+        )
+
+    def _titles(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(reverse("notification-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row["title"]: row["is_read"] for row in response.data["results"]}
+
+    def _unread(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.get(reverse("notification-unread-count")).data[
+            "unread_count"
+        ]
+
+    def test_broadcast_is_one_row_seen_by_every_employee(self):
+        from notifications.models import NotificationRecipient
+
+        broadcast = self._notify("Broadcast")
+        self._notify("Targeted", recipient_user_ids=[self.owner.id])
+
+        self.assertFalse(broadcast.send_to_recipients_only)
+        self.assertFalse(
+            NotificationRecipient.objects.filter(notification=broadcast).exists()
+        )
+        self.assertEqual(
+            self._titles(self.owner), {"Broadcast": False, "Targeted": False}
+        )
+        self.assertEqual(self._titles(self.colleague), {"Broadcast": False})
+        self.assertEqual(self._titles(self.outsider), {})
+
+    def test_read_state_is_a_watermark_plus_exceptions(self):
+        from notifications.models import NotificationRecipient
+
+        first = self._notify("First")
+        self._notify("Second")
+        self._notify("Targeted", recipient_user_ids=[self.owner.id])
+        self.assertEqual(self._unread(self.owner), 3)
+
+        self.client.force_authenticate(user=self.owner)
+        self.client.post(
+            reverse("notification-mark-as-read"),
+            {"notification_ids": [str(first.id)]},
+            format="json",
+        )
+        self.assertEqual(self._unread(self.owner), 2)
+        self.assertTrue(
+            NotificationRecipient.objects.get(
+                notification=first, recipient=self.owner
+            ).is_read
+        )
+
+        self.client.post(reverse("notification-mark-all-as-read"))
+        self.assertEqual(self._unread(self.owner), 0)
+        # The watermark covers the exception row, which is dropped.
+        self.assertFalse(
+            NotificationRecipient.objects.filter(notification=first).exists()
+        )
+        self.assertEqual(self._unread(self.colleague), 2)
+
+        self._notify("Later")
+        self.assertEqual(self._unread(self.owner), 1)
+        self.assertEqual(self._titles(self.owner)["Later"], False)
+
+    def test_mark_all_read_spares_broadcasts_committed_after_it(self):
+        from notifications.models import Notification
+
+        seen = self._notify("Seen")
+        marked_at = timezone.now()
+        self.client.force_authenticate(user=self.owner)
+        self.client.post(reverse("notification-mark-all-as-read"))
+
+        # Stamped before the read, but its transaction committed after it.
+        late = self._notify("Late")
+        Notification.objects.filter(pk=late.pk).update(created_at=marked_at)
+
+        self.assertEqual(self._titles(self.owner), {"Seen": True, "Late": False})
+
+    def test_deleting_a_broadcast_hides_it_for_that_user_only(self):
+        broadcast = self._notify("Broadcast")
+
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.delete(
+            reverse("notification-detail", args=[broadcast.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._titles(self.owner), {})
+        self.assertEqual(self._unread(self.owner), 0)
+        self.assertEqual(self._titles(self.colleague), {"Broadcast": False})
+
+    def test_retrieve_marks_a_broadcast_read(self):
+        broadcast = self._notify("Broadcast")
+
+        self.client.force_authenticate(user=self.colleague)
+        response = self.client.get(reverse("notification-detail", args=[broadcast.id]))
+        self.assertTrue(response.data["is_read"])
+        self.assertEqual(self._titles(self.colleague), {"Broadcast": True})
+        self.assertEqual(self._titles(self.owner), {"Broadcast": False})
+
+
+class _RecordingBucket:
+    def __init__(self):
+        self.acquired = 0
+        self.pauses = []
+
+    def acquire(self):
+        self.acquired += 1
+
+    def pause(self, seconds):
+        self.pauses.append(seconds)
+
+
+class TelegramDeliveryEngineTests(unittest.TestCase):
+    """Retries, rate limiting and outcomes of ``telegram_delivery.deliver``."""
+
+    RATE_LIMITED = {
+        "ok": False,
+        "transient": True,
+        "error_code": 429,
+        "description": "Too Many Requests: retry after 2",
+        "retry_after": 2,
+    }
+
+    def _deliver(self, results):
+        from notifications.telegram_delivery import deliver
+
+        bucket = _RecordingBucket()
+        with mock.patch(
+            "notifications.telegram_bot._send_bot_message_sync", side_effect=results
+        ):
+            outcomes = deliver([7], "hi", bucket=bucket)
+        return outcomes[7], bucket
+
+    def test_retry_after_pauses_the_bucket_then_retries(self):
+        outcome, bucket = self._deliver([self.RATE_LIMITED, {"ok": True}])
+        self.assertEqual((outcome.status, outcome.attempts), ("sent", 2))
+        self.assertEqual(bucket.pauses, [2])
+        self.assertEqual(bucket.acquired, 2)
+
+    def test_long_retry_after_is_not_slept_through(self):
+        outcome, bucket = self._deliver([{**self.RATE_LIMITED, "retry_after": 120}])
+        self.assertEqual(outcome.status, "rate_limited")
+        self.assertEqual(bucket.pauses, [])
+
+    def test_permanent_failure_is_recorded_without_retry(self):
+        outcome, bucket = self._deliver(
+            [
+                {
+                    "ok": False,
+                    "transient": False,
+                    "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user",
+                }
+            ]
+        )
+        self.assertEqual((outcome.status, outcome.attempts), ("failed", 1))
+        self.assertEqual(outcome.error_code, 403)
+        self.assertEqual(bucket.acquired, 1)
+
+    def test_token_bucket_limits_the_rate(self):
+        import time
+
+        from notifications.telegram_delivery import TokenBucket
+
+        bucket = TokenBucket("telegram:test", rate=50, capacity=5, shared=False)
+        started = time.monotonic()
+        for _ in range(15):
+            bucket.acquire()
+        # The burst of 5 is free, the other 10 take a fiftieth of a second each.
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+        bucket.pause(0.2)
+        started = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+
+class TelegramDeliveryStubTests(unittest.TestCase):
+    """The engine against a local stub Bot API enforcing Telegram's limit."""
+
+    def test_delivers_under_the_limit_over_pooled_connections(self):
+        from notifications.telegram_delivery import TokenBucket, deliver
+        from notifications.telegram_stub import StubBotAPI
+
+        with (
+            StubBotAPI(latency=0.01, rate_limit=30) as stub,
+            override_settings(TELEGRAM_BOT_TOKEN="test", TELEGRAM_API_BASE=stub.url),
+        ):
+            outcomes = deliver(
+                range(1, 41),
+                "hi",
+                concurrency=4,
+                bucket=TokenBucket("telegram:test", rate=25, capacity=5, shared=False),
+            )
+
+        self.assertEqual({outcome.status for outcome in outcomes.values()}, {"sent"})
+        self.assertEqual((stub.sent, stub.rejected), (40, 0))
+        self.assertLessEqual(stub.connections, 4)
+
+
+class PushDeliveryTests(APITestCase):
+    """Coalesced FCM delivery and dead token hygiene (FCM itself is stubbed)."""
+
+    def setUp(self):
+        from accounts.models import User, UserDevice
+
+        self.alice = User.objects.create(
+            email="alice@example.com", phone_number="977777777"
+        )
+        self.bob = User.objects.create(
+            email="bob@example.com", phone_number="988888888"
+        )
+        self.devices = {
+            token: UserDevice.objects.create(
+                user=user, fcm_token=token, label=token, device_id=token
+            )
+            for user, token in (
+                (self.alice, "alice-phone"),
+                (self.alice, "alice-tablet"),
+                (self.bob, "bob-phone"),
+            )
+        }
+
+    def _notification(self, title):
+        from notifications.models import Notification
+
+        return Notification.objects.create(title=title, message=f"{title}.")
+
+    def _send_each(self, errors=None):
+        """A ``messaging.send_each`` stand-in failing the tokens in ``errors``."""
+        from firebase_admin import messaging
+
+        errors = errors or {}
+        calls = []
+
+        def send_each(messages):
+            calls.append([message.token for message in messages])
+            responses = [
+                messaging.SendResponse(
+                    None if message.token in errors else {"name": "sent"},
+                    errors.get(message.token),
+                )
+                for message in messages
+            ]
+            return messaging.BatchResponse(responses)
+
+        return calls, send_each
+
+    def test_coalesced_notifications_share_one_batch_grouped_by_devices(self):
+        from notifications.push import push_notifications
+
+        first, second, third = (self._notification(t) for t in ("A", "B", "C"))
+        calls, send_each = self._send_each()
+        with mock.patch("firebase_admin.messaging.send_each", side_effect=send_each):
+            results = push_notifications(
+                [
+                    (str(first.id), [str(self.alice.id)]),
+                    (str(second.id), [str(self.bob.id)]),
+                    (str(third.id), [str(self.alice.id)]),
+                ]
+            )
+
+        self.assertEqual(len(calls), 1)
+        # Alice's two notifications go out together, then Bob's.
+        self.assertEqual(
+            calls[0],
+            ["alice-phone", "alice-tablet"] * 2 + ["bob-phone"],
+        )
+        self.assertEqual(
+            (results[0].size, results[0].success_count, results[0].failure_count),
+            (5, 5, 0),
+        )
+
+    def test_dead_tokens_deactivate_their_devices(self):
+        from firebase_admin import exceptions, messaging
+
+        from notifications.push import push_notifications
+
+        notification = self._notification("A")
+        calls, send_each = self._send_each(
+            {
+                "alice-phone": messaging.UnregisteredError("unregistered"),
+                "alice-tablet": exceptions.InvalidArgumentError(
+                    "Invalid JSON payload received."
+                ),
+            }
+        )
+        with mock.patch("firebase_admin.messaging.send_each", side_effect=send_each):
+            results = push_notifications(
+                [(str(notification.id), [str(self.alice.id), str(self.bob.id)])]
+            )
+
+        self.assertEqual(results[0].dead_tokens, ["alice-phone"])
+        for device in self.devices.values():
+            device.refresh_from_db()
+        # A bad payload says nothing about the token.
+        self.assertFalse(self.devices["alice-phone"].is_active)
+        self.assertTrue(self.devices["alice-tablet"].is_active)
+
+        # The dead token is no longer part of any batch.
+        calls.clear()
+        with mock.patch("firebase_admin.messaging.send_each", side_effect=send_each):
+            push_notifications([(str(notification.id), [str(self.alice.id)])])
+        self.assertEqual(calls, [["alice-tablet"]])
+
+    def test_queue_push_without_redis_pushes_immediately(self):
+        from notifications.push import queue_push
+
+        with (
+            mock.patch("notifications.push._redis", side_effect=ConnectionError),
+            mock.patch(
+                "notifications.tasks.send_push_notification_task.delay"
+            ) as delay,
+            mock.patch(
+                "notifications.tasks.flush_push_notifications_task.apply_async"
+            ) as flush,
+        ):
+            queue_push("n-1", ["u-1"])
+        delay.assert_called_once_with("n-1", ["u-1"])
+        flush.assert_not_called()
+
+    def _flush(self, entries, send_each):
+        """Run the flush over ``entries``; returns the entries it retries with."""
+        from notifications.tasks import flush_push_notifications_task
+
+        with (
+            mock.patch("notifications.push.take_pending", return_value=entries),
+            mock.patch("firebase_admin.messaging.send_each", side_effect=send_each),
+            mock.patch.object(
+                flush_push_notifications_task,
+                "retry",
+                side_effect=RuntimeError("retried"),
+            ) as retry,
+        ):
+            with self.assertRaises(RuntimeError):
+                flush_push_notifications_task.run()
+        return retry.call_args.kwargs["kwargs"]["entries"]
+
+    def test_flush_retries_the_entries_it_took_when_fcm_is_down(self):
+        first, second = self._notification("A"), self._notification("B")
+        entries = [
+            [str(first.id), [str(self.alice.id)]],
+            [str(second.id), [str(self.bob.id)]],
+        ]
+
+        retried = self._flush(entries, ConnectionError("FCM unreachable"))
+
+        self.assertEqual(retried, entries)
+
+    def test_flush_retries_only_what_fcm_did_not_send(self):
+        first, second = self._notification("A"), self._notification("B")
+        calls, send_each = self._send_each()
+        sent_then_down = [send_each, ConnectionError("FCM unreachable")]
+
+        def flaky_send_each(messages):
+            outcome = sent_then_down.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome(messages)
+
+        with mock.patch("notifications.firebase.BATCH_SIZE", 2):
+            retried = self._flush(
+                [
+                    [str(first.id), [str(self.alice.id)]],
+                    [str(second.id), [str(self.bob.id)]],
+                ],
+                flaky_send_each,
+            )
+
+        self.assertEqual(calls, [["alice-phone", "alice-tablet"]])
+        self.assertEqual(retried, [[str(second.id), [str(self.bob.id)]]])
+
+    def test_unscheduled_flush_lets_the_next_push_schedule_one(self):
+        from django.core.cache import cache
+
+        from notifications.push import SCHEDULED_KEY, queue_push
+
+        redis = mock.Mock()
+        redis.set.return_value = True
+        with (
+            mock.patch("notifications.push._redis", return_value=redis),
+            mock.patch(
+                "notifications.tasks.flush_push_notifications_task.apply_async",
+                side_effect=ConnectionError("broker down"),
+            ),
+            mock.patch(
+                "notifications.tasks.send_push_notification_task.delay"
+            ) as delay,
+        ):
+            queue_push("n-1", ["u-1"])
+        # The entry stays queued for the periodic flush.
+        redis.rpush.assert_called_once()
+        redis.delete.assert_called_once_with(cache.make_key(SCHEDULED_KEY))
+        delay.assert_not_called()
+
+
+class LowStockDigestTests(APITestCase):
+    """Set-based low-stock evaluation with one digest per business."""
+
+    def setUp(self):
+        from accounts.models import User
+        from business.models import Branch, Business
+
+        self.owner = User.objects.create(
+            email="stock@example.com", phone_number="999999991"
+        )
+        self.business = Business.objects.create(name="Stock Shop", owner=self.owner)
+        self.branch = Branch.objects.get(business=self.business)
+
+    def _variant(self, name, quantity, notify_below=5, business=None, branch=None):
+        from inventories.models import Item, ItemVariant
+
+        item = Item.objects.create(
+            name=name,
+            inventory_unit="pcs",
+            business=business or self.business,
+            branch=branch or self.branch,
+            notify_below=notify_below,
+        )
+        return ItemVariant.objects.create(item=item, name="Default", quantity=quantity)
+
+    def _digests(self):
+        from notifications.models import Notification
+
+        return list(Notification.objects.filter(event_type="low_stock"))
+
+    def test_checkout_sends_one_digest_of_the_breaching_variants(self):
+        from notifications.tasks import check_low_stock_task
+
+        sugar = self._variant("Sugar", 2)
+        salt = self._variant("Salt", 0)
+        flour = self._variant("Flour", 40)
+
+        check_low_stock_task(
+            [str(v.id) for v in (sugar, salt, flour)], str(self.business.id)
+        )
+
+        [digest] = self._digests()
+        self.assertEqual(set(digest.data["variant_ids"]), {str(sugar.id), str(salt.id)})
+        self.assertIn("2 items are running low", digest.message)
+        self.assertFalse(digest.send_to_recipients_only)
+
+    def test_alerted_variants_are_skipped_in_bulk_within_the_window(self):
+        from notifications.stock_alerts import evaluate_low_stock
+
+        sugar = self._variant("Sugar", 2)
+        salt = self._variant("Salt", 10)
+        evaluate_low_stock(variant_ids=[sugar.id, salt.id])
+
+        # Re-checking costs one query, whatever the number of variants.
+        with self.assertNumQueries(1):
+            self.assertEqual(evaluate_low_stock(variant_ids=[sugar.id, salt.id]), 0)
+
+        salt.quantity = 1
+        salt.save()
+        evaluate_low_stock(variant_ids=[sugar.id, salt.id])
+        latest = self._digests()[-1]
+        self.assertEqual(latest.data["variant_ids"], [str(salt.id)])
+        self.assertEqual(latest.data["item_id"], str(salt.item_id))
+        self.assertIn("only 1 units remaining", latest.message)
+
+    def test_sweep_covers_every_business_with_one_digest_each(self):
+        from accounts.models import User
+        from business.models import Branch, Business
+        from notifications.tasks import sweep_low_stock_task
+
+        other_owner = User.objects.create(
+            email="other-stock@example.com", phone_number="999999992"
+        )
+        other = Business.objects.create(name="Other Stock", owner=other_owner)
+        other_branch = Branch.objects.get(business=other)
+        self._variant("Sugar", 2)
+        self._variant("Salt", 1)
+        self._variant("Rice", 0, business=other, branch=other_branch)
+
+        self.assertEqual(sweep_low_stock_task(branch_id=str(other_branch.id)), 1)
+        self.assertEqual(sweep_low_stock_task(), 1)
+        self.assertEqual(
+            sorted(len(d.data["variants"]) for d in self._digests()), [1, 2]
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class BulkInventoryChangesTests(APITestCase):
+    """``bulk_inventory_changes``: one summary per business for bulk writes."""
+
+    def setUp(self):
+        from accounts.models import User
+        from business.models import Branch, Business
+
+        self.owner = User.objects.create(
+            email="bulk@example.com", phone_number="999999981"
+        )
+        self.business = Business.objects.create(name="Bulk Shop", owner=self.owner)
+        self.branch = Branch.objects.get(business=self.business)
+
+    def _notification_events(self):
+        from core.models import OutboxEvent
+        from notifications.service import NOTIFICATION_OUTBOX_TOPIC
+
+        return list(OutboxEvent.objects.filter(topic=NOTIFICATION_OUTBOX_TOPIC))
+
+    def _restock(self, variant, quantity, supply):
+        from inventories.models import SuppliedItem
+
+        return SuppliedItem.objects.create(
+            supply=supply,
+            item=variant.item,
+            variant=variant,
+            quantity=quantity,
+            initial_quantity=quantity,
+            selling_price=10,
+            business=self.business,
+        )
+
+    def _variants(self, count):
+        from inventories.models import Item, ItemVariant, Supply
+
+        supply = Supply.objects.create(
+            branch=self.branch, business=self.business, label="bulk-test"
+        )
+        item = Item.objects.create(
+            name="Tea", inventory_unit="pcs", business=self.business, branch=self.branch
+        )
+        variants = [
+            ItemVariant.objects.create(item=item, name=f"Tea {n}", quantity=0)
+            for n in range(count)
+        ]
+        return supply, variants
+
+    def test_5k_row_import_sends_one_summary_and_a_bounded_number_of_tasks(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from core.outbox import dispatch_pending
+        from notifications.models import Notification
+        from notifications.tasks import create_notification_task
+
+        lines = ["name,variant_name,inventory_unit,selling_price,quantity"]
+        lines += [f"Product {n // 5},Size {n % 5},pcs,12.50,3" for n in range(5000)]
+        upload = SimpleUploadedFile(
+            "import.csv", "\n".join(lines).encode(), content_type="text/csv"
+        )
+        self.client.force_authenticate(user=self.owner)
+
+        with mock.patch("celery.app.task.Task.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("items-bulk-import")
+                    + f"?business_id={self.business.id}&branch_id={self.branch.id}",
+                    {"file": upload},
+                    format="multipart",
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["variants_processed"], 5000)
+
+            [event] = self._notification_events()
+            self.assertEqual(
+                event.payload["data"],
+                {
+                    "restocked_variants": 5000,
+                    "units_added": 15000,
+                    "price_changes": 0,
+                    "updated_products": 0,
+                },
+            )
+            # What a worker would run: the outbox hands the event to its
+            # handler, which creates the notification and queues delivery.
+            with self.captureOnCommitCallbacks(execute=True):
+                dispatch_pending()
+                create_notification_task(**event.payload)
+
+        self.assertEqual(Notification.objects.count(), 1)
+        # The outbox kick, the handler, and one push and one Telegram task.
+        self.assertLessEqual(apply_async.call_count, 4)
+
+    def test_summary_counts_committed_changes_only(self):
+        from django.db import transaction
+
+        from notifications.bulk import bulk_inventory_changes
+
+        supply, (tea, coffee, milk) = self._variants(3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with bulk_inventory_changes():
+                self._restock(tea, 4, supply)
+                with bulk_inventory_changes():
+                    restocked = self._restock(coffee, 6, supply)
+                try:
+                    with transaction.atomic():
+                        self._restock(milk, 100, supply)
+                        raise ValueError("row rejected")
+                except ValueError:
+                    pass
+                restocked.selling_price = 15
+                restocked.save()
+                tea.item.description = "Loose leaf"
+                tea.item.save()
+
+        [event] = self._notification_events()
+        self.assertEqual(event.payload["event_type"], "inventory_updated")
+        self.assertEqual(
+            event.payload["data"],
+            {
+                "restocked_variants": 2,
+                "units_added": 10,
+                "price_changes": 1,
+                "updated_products": 1,
+            },
+        )
+        self.assertEqual(
+            event.payload["message"],
+            "Bulk inventory update: 2 variant(s) restocked with 10 units, "
+            "1 price change(s), 1 product(s) updated.",
+        )
+
+    def test_outside_a_scope_each_restock_notifies(self):
+        supply, variants = self._variants(2)
+        for variant in variants:
+            self._restock(variant, 1, supply)
+
+        self.assertEqual(
+            [event.payload["event_type"] for event in self._notification_events()],
+            ["restocked", "restocked"],
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class NotificationConsumerTests(TransactionTestCase):
+    """JWT-authenticated WebSocket delivery through ``core.asgi``."""
+
+    FANOUT_USERS = 50
+    CONNECTIONS_PER_USER = 2
+
+    def setUp(self):
+        from accounts.models import User
+        from business.models import Business
+
+        self.owner = User.objects.create(
+            email="live@example.com", phone_number="999999971"
+        )
+        self.business = Business.objects.create(name="Live Shop", owner=self.owner)
+
+    async def _connect(self, user=None, token=None):
+        from channels.testing import WebsocketCommunicator
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from core.asgi import app
+
+        if token is None:
+            token = str(AccessToken.for_user(user))
+        communicator = WebsocketCommunicator(
+            app,
+            f"/ws/notifications/?token={token}",
+            headers=[(b"origin", b"http://localhost")],
+        )
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def _notify(self, **kwargs):
+        from channels.db import database_sync_to_async
+
+        from notifications.service import create_notification
+
+        return await database_sync_to_async(create_notification)(
+            title="Order Completed",
+            message="Order #1 has been completed.",
+            event_type="order_completed",
+            business=self.business,
+            delivery_methods="platform",
+            **kwargs,
+        )
+
+    async def test_connection_without_a_valid_token_is_refused(self):
+        communicator, connected, code = await self._connect(token="not-a-jwt")
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_targeted_notification_reaches_its_recipient_with_unread_count(self):
+        from accounts.models import User
+
+        outsider = await User.objects.acreate(
+            email="outsider@example.com", phone_number="999999972"
+        )
+        owner, _, _ = await self._connect(self.owner)
+        other, _, _ = await self._connect(outsider)
+        self.assertEqual(
+            await owner.receive_json_from(), {"type": "unread_count", "unread_count": 0}
+        )
+        await other.receive_json_from()
+
+        notification = await self._notify(recipient_user_ids=[self.owner.id])
+
+        event = await owner.receive_json_from()
+        self.assertEqual(event["type"], "notification")
+        self.assertEqual(event["notification"]["id"], str(notification.id))
+        self.assertFalse(event["notification"]["is_read"])
+        self.assertEqual(event["unread_count"], 1)
+        self.assertTrue(await other.receive_nothing())
+
+        await owner.disconnect()
+        await other.disconnect()
+
+    def test_cached_unread_count_follows_new_and_read_notifications(self):
+        from notifications import inbox
+        from notifications.service import create_notification
+
+        self.assertEqual(inbox.cached_unread_count(self.owner), 0)
+        create_notification(
+            title="Order Completed",
+            message="Order #1 has been completed.",
+            event_type="order_completed",
+            business=self.business,
+            delivery_methods="platform",
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(inbox.cached_unread_count(self.owner), 1)
+
+        inbox.mark_all_read(self.owner)
+        self.assertEqual(inbox.cached_unread_count(self.owner), 0)
+
+    async def test_broadcast_fan_out_latency(self):
+        import asyncio
+        import time
+
+        from asgiref.sync import sync_to_async
+        from django.db import connections
+
+        from accounts.models import User
+        from business.models import Employee
+
+        users = [self.owner]
+        for n in range(1, self.FANOUT_USERS):
+            user = await User.objects.acreate(
+                email=f"staff{n}@example.com", phone_number=f"98{n:07d}"
+            )
+            await Employee.objects.acreate(user=user, business=self.business)
+            users.append(user)
+        communicators = []
+        for user in users:
+            for _ in range(self.CONNECTIONS_PER_USER):
+                communicator, connected, _ = await self._connect(user)
+                self.assertTrue(connected)
+                await communicator.receive_json_from()
+                communicators.append(communicator)
+
+        async def arrival(communicator):
+            event = await communicator.receive_json_from(timeout=10)
+            return time.perf_counter(), event
+
+        # Every query of the fan-out, whichever consumer or thread runs it.
+        executed = []
+
+        def record(execute, sql, params, many, context):
+            executed.append(sql)
+            return execute(sql, params, many, context)
+
+        database = await sync_to_async(lambda: connections["default"])()
+        waiting = [asyncio.ensure_future(arrival(c)) for c in communicators]
+        with database.execute_wrapper(record):
+            started = time.perf_counter()
+            notification = await self._notify()
+            arrivals = await asyncio.gather(*waiting)
+
+        # Creating the notification costs a fixed number of queries; the
+        # consumers add none, however many of them are connected.
+        self.assertLessEqual(len(executed), 10, executed)
+        latencies = sorted(arrived - started for arrived, _ in arrivals)
+        for _, event in arrivals:
+            self.assertEqual(event["notification"]["id"], str(notification.id))
+            self.assertEqual(event["unread_count"], 1)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.assertLess(
+            p95,
+            5,
+            f"{len(communicators)} connections: p50 "
+            f"{latencies[len(latencies) // 2] * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms",
+        )
+
+        for communicator in communicators:
+            await communicator.disconnect()
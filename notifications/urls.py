@@ -1,8 +1,17 @@
+from channels.routing import URLRouter
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from accounts.websocket_auth import JWTAuthMiddleware
+
+from .consumers import NotificationConsumer
 from .views import NotificationViewSet, TelegramWebhookView
 
+# Mounted under ws/ in core/asgi.py.
+websocket_router = URLRouter(
+    [path("notifications/", JWTAuthMiddleware(NotificationConsumer.as_asgi()))]
+)
+
 router = DefaultRouter()
 router.register(r"", NotificationViewSet, basename="notification")
 
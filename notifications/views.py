@@ -12,8 +12,9 @@ from rest_framework.viewsets import GenericViewSet
 
 logger = logging.getLogger(__name__)
 
+from . import inbox
 from .filters import NotificationFilter
-from .models import Notification, NotificationRecipient
+from .models import Notification
 from .serializers import (
     DeviceListSerializer,
     NotificationDeleteSerializer,
@@ -32,25 +33,21 @@ class NotificationViewSet(
     filterset_class = NotificationFilter
 
     def get_queryset(self):
-        return self.queryset.filter(
-            recipients__recipient=self.request.user,
-            recipients__is_deleted=False,
-        ).order_by("-created_at")
+        """Targeted and business-broadcast notifications of the user, merged."""
+        return inbox.inbox(self.request.user)
 
     def retrieve(self, request, *args, **kwargs):
         """Return notification detail and auto-mark it as read for the requesting user."""
         instance = self.get_object()
-        NotificationRecipient.objects.filter(
-            notification=instance, recipient=request.user
-        ).update(is_read=True)
+        if not instance.is_read_by_user:
+            inbox.mark_read(request.user, [instance.pk])
+            instance.is_read_by_user = True
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
     def perform_destroy(self, instance):
-        """Soft-delete: mark the recipient record as deleted instead of removing the row."""
-        NotificationRecipient.objects.filter(
-            notification=instance, recipient=self.request.user
-        ).update(is_deleted=True)
+        """Soft-delete: mark the user's state deleted instead of removing the row."""
+        inbox.mark_deleted(self.request.user, [instance.pk])
 
     @action(
         detail=False,
@@ -62,11 +59,24 @@ class NotificationViewSet(
         notification_ids = request.data.get("notification_ids", [])
         if not notification_ids:
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        NotificationRecipient.objects.filter(
-            notification_id__in=notification_ids, recipient=request.user
-        ).update(is_read=True)
+        inbox.mark_read(request.user, notification_ids)
         return Response({"detail": "Notifications marked as read"})
 
+    @action(detail=False, methods=["post"], url_path="mark-all-as-read")
+    def mark_all_as_read(self, request):
+        inbox.mark_all_read(request.user)
+        return Response({"detail": "Notifications marked as read"})
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        """Unread notifications of the user, honouring the list filters."""
+        count = (
+            self.filter_queryset(self.get_queryset())
+            .filter(is_read_by_user=False)
+            .count()
+        )
+        return Response({"unread_count": count})
+
     @action(
         detail=False,
         methods=["post"],
@@ -78,11 +88,7 @@ class NotificationViewSet(
         serializer = NotificationDeleteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         notification_ids = serializer.validated_data["notification_ids"]
-        updated = NotificationRecipient.objects.filter(
-            notification_id__in=notification_ids,
-            recipient=request.user,
-            is_deleted=False,
-        ).update(is_deleted=True)
+        updated = inbox.mark_deleted(request.user, notification_ids)
         return Response({"detail": f"{updated} notification(s) deleted."})
 
     @action(detail=False, methods=["get"], serializer_class=DeviceListSerializer)
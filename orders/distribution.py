@@ -0,0 +1,120 @@
+"""
+Bucketed sales series for the home dashboard's sales distribution.
+
+A source queryset yields one ``(date, amount)`` row per local calendar date.
+``plan_buckets`` picks day, week or month buckets for the range and widens
+them so no series exceeds ``MAX_BUCKETS``; ``bucket_totals`` folds the source
+into those buckets and returns a dense list with zeros for empty buckets.
+
+On PostgreSQL the folding runs as one statement, joining the source to a
+``generate_series`` of bucket starts.  Other backends (SQLite in tests and
+local development) fold the per-date rows in Python.
+"""
+
+import bisect
+import math
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db import connection
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+
+# Upper bound on points per series, whatever the requested range.
+MAX_BUCKETS = 62
+# Automatic granularity: daily up to two months, weekly up to a year,
+# monthly beyond that.
+DAILY_MAX_DAYS = 62
+WEEKLY_MAX_DAYS = 366
+
+
+@dataclass
+class BucketPlan:
+    granularity: str
+    # Bucket width in days (DAY/WEEK) or months (MONTH).
+    step: int
+    starts: list[date]
+
+    @property
+    def interval(self):
+        unit = "months" if self.granularity == MONTH else "days"
+        return f"{self.step} {unit}"
+
+
+def _add_months(day, months):
+    index = day.month - 1 + months
+    return date(day.year + index // 12, index % 12 + 1, 1)
+
+
+def plan_buckets(first, last, granularity=None):
+    """
+    Buckets covering local dates ``first``..``last``.  ``granularity`` is
+    chosen from the range length unless given; buckets are widened to
+    several days or months when the series would exceed ``MAX_BUCKETS``.
+    """
+    span = (last - first).days + 1
+    if granularity is None:
+        if span <= DAILY_MAX_DAYS:
+            granularity = DAY
+        elif span <= WEEKLY_MAX_DAYS:
+            granularity = WEEK
+        else:
+            granularity = MONTH
+
+    if granularity == MONTH:
+        first = first.replace(day=1)
+        months = (last.year - first.year) * 12 + last.month - first.month + 1
+        step = math.ceil(months / MAX_BUCKETS)
+        starts = [_add_months(first, offset) for offset in range(0, months, step)]
+    else:
+        unit = 1 if granularity == DAY else 7
+        step = unit * math.ceil(math.ceil(span / unit) / MAX_BUCKETS)
+        starts = [first + timedelta(days=offset) for offset in range(0, span, step)]
+
+    return BucketPlan(granularity=granularity, step=step, starts=starts)
+
+
+def bucket_totals(source, plan):
+    """
+    Sum ``source`` (a queryset of ``date``/``amount`` rows) into the buckets
+    of ``plan``.  Returns one float per bucket, in order.
+    """
+    if not plan.starts:
+        return []
+    if connection.vendor == "postgresql":
+        return _bucket_totals_sql(source, plan)
+    return _bucket_totals_python(source, plan)
+
+
+def _bucket_totals_sql(source, plan):
+    source_sql, source_params = source.query.sql_with_params()
+    query = f"""
+        SELECT COALESCE(SUM(source.amount), 0)
+        FROM generate_series(%s::date, %s::date, %s::interval) AS series(bucket)
+        LEFT JOIN ({source_sql}) AS source
+            ON source."date" >= series.bucket
+            AND source."date" < series.bucket + %s::interval
+        GROUP BY series.bucket
+        ORDER BY series.bucket
+    """
+    params = [
+        plan.starts[0],
+        plan.starts[-1],
+        plan.interval,
+        *source_params,
+        plan.interval,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return [float(total) for (total,) in cursor.fetchall()]
+
+
+def _bucket_totals_python(source, plan):
+    totals = [0.0] * len(plan.starts)
+    for row in source:
+        index = bisect.bisect_right(plan.starts, row["date"]) - 1
+        if index >= 0:
+            totals[index] += float(row["amount"] or 0)
+    return totals
@@ -1,6 +1,8 @@
 from django_filters import CharFilter, DateFilter, FilterSet, NumberFilter
+from rest_framework.filters import SearchFilter
 
 from orders.models import Order
+from orders.search import search_orders
 
 
 class OrderFilter(FilterSet):
@@ -22,3 +24,14 @@ class OrderFilter(FilterSet):
     class Meta:
         model = Order
         fields = ["status"]
+
+
+class OrderSearchFilter(SearchFilter):
+    """
+    ``?search=`` over the denormalised ``Order.search_text`` /
+    ``search_document`` columns rather than OR-ed ``icontains`` across
+    customer, employee and item joins, so the list needs no DISTINCT.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return search_orders(queryset, self.get_search_terms(request))
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.receipt import RECEIPT_LAYOUT_VERSION, receipt_hash, render_receipt
+
+
+def _sample_context(index, lines):
+    return {
+        "layout_version": RECEIPT_LAYOUT_VERSION,
+        "business_name": "Benchmark Trading PLC",
+        "address": "Bole, Addis Ababa, Addis Ababa, Ethiopia",
+        "branch_name": "Main Branch",
+        "meta": [
+            ["Receipt #:", f"{index:08X}"],
+            ["Date:", "01 Jan 2026  10:00"],
+            ["Status:", "COMPLETED"],
+            ["Customer:", "Walk-in Customer"],
+            ["Served by:", "Bench Cashier"],
+            ["Payment:", "Cash"],
+        ],
+        "lines": [
+            [f"Item {n} — Variant {n}", "2", "125.00", "250.00"] for n in range(lines)
+        ],
+        "subtotal": f"{250 * lines:,.2f}",
+        "vat_label": "VAT (0%)",
+        "vat_amount": "0.00",
+        "total_payable": f"{250 * lines:,.2f}",
+        "is_returned": False,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure receipt throughput of a single worker process: full PDF renders "
+        "per second, and hash checks per second for the unchanged-receipt path "
+        "the receipt task takes when nothing printed has changed. Runs offline "
+        "against synthetic receipts; no database rows are touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--receipts",
+            type=int,
+            default=200,
+            help="Number of receipts to render (default: 200).",
+        )
+        parser.add_argument(
+            "--lines",
+            type=int,
+            default=10,
+            help="Line items per receipt (default: 10).",
+        )
+
+    def handle(self, *args, **options):
+        count = options["receipts"]
+        lines = options["lines"]
+        contexts = [_sample_context(i, lines) for i in range(count)]
+
+        # Warm up fonts and styles so the first render is not counted.
+        render_receipt(contexts[0])
+
+        started = time.perf_counter()
+        total_bytes = sum(len(render_receipt(context)) for context in contexts)
+        render_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for context in contexts:
+            receipt_hash(context)
+        hash_elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Rendered {count} receipt(s) × {lines} line(s) in {render_elapsed:.2f}s "
+            f"(avg {total_bytes // count} bytes)"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Render:     {count / render_elapsed:,.1f} receipts/s per worker\n"
+                f"Hash check: {count / hash_elapsed:,.1f} receipts/s per worker"
+            )
+        )
@@ -0,0 +1,119 @@
+import time
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from business.models import Branch, Business
+from inventories.models import Item, ItemVariant, SuppliedItem, Supply
+from orders.models import Order, OrderItem
+from orders.returns import process_return
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure a wholesale return through the set-based return engine: "
+        "wall time and query count for one return of --lines order lines. "
+        "Builds a throwaway business, order and stock in a transaction that is "
+        "rolled back afterwards; nothing is left in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lines",
+            type=int,
+            default=200,
+            help="Order lines returned in one request (default: 200).",
+        )
+        parser.add_argument(
+            "--variants",
+            type=int,
+            default=50,
+            help="Distinct variants the lines are spread over (default: 50).",
+        )
+
+    def handle(self, *args, **options):
+        lines = options["lines"]
+        variant_count = max(1, min(options["variants"], lines))
+
+        try:
+            with transaction.atomic():
+                order, items = self._build(lines, variant_count)
+
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    order_return = process_return(order, items)
+                    elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"Returned {lines} line(s) over {variant_count} variant(s): "
+                    f"{order_return.status}, refund {order_return.total_refund_amount}"
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Elapsed: {elapsed * 1000:,.1f} ms\n"
+                        f"Queries: {len(queries.captured_queries)}"
+                    )
+                )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _build(self, lines, variant_count):
+        owner = get_user_model().objects.create_user(
+            email=f"bench-{uuid4().hex}@example.com", password=uuid4().hex
+        )
+        business = Business.objects.create(name="Bench Returns", owner=owner)
+        branch = Branch.objects.filter(business=business).first()
+        supply = Supply.objects.create(label="Bench", branch=branch, business=business)
+
+        batches = []
+        for n in range(variant_count):
+            item = Item.objects.create(
+                name=f"Bench item {n}",
+                inventory_unit="pcs",
+                business=business,
+                branch=branch,
+            )
+            variant = ItemVariant.objects.create(
+                item=item, name=f"Variant {n}", quantity=0, sku=f"BENCH-{n}"
+            )
+            batches.append(
+                SuppliedItem.objects.create(
+                    quantity=lines,
+                    item=item,
+                    purchase_price=5,
+                    selling_price=8,
+                    business=business,
+                    supply=supply,
+                    variant=variant,
+                )
+            )
+
+        order = Order.objects.create(
+            business=business,
+            branch=branch,
+            total_payable=8 * lines,
+            status=Order.StatusChoices.COMPLETED,
+        )
+        order_items = OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                variant_id=batches[n % variant_count].variant_id,
+                supplied_item=batches[n % variant_count],
+                quantity=1,
+                price=8,
+            )
+            for n in range(lines)
+        )
+        items = [
+            {"order_item_id": order_item.id, "quantity_returned": 1}
+            for order_item in order_items
+        ]
+        return order, items
@@ -0,0 +1,77 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from business.models import Branch
+from orders.models import Order
+from orders.rollups import local_date, rebuild_sales_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild DailySalesRollup from the raw order and return rows. Run once "
+        "after deploying the rollup table, and whenever the rollup is suspected "
+        "to have drifted from the orders it summarises."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            help="Only rebuild branches of this business id.",
+        )
+        parser.add_argument(
+            "--branch",
+            help="Only rebuild this branch id.",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="First local date to rebuild (YYYY-MM-DD). Default: earliest order.",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Last local date to rebuild (YYYY-MM-DD). Default: today.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Preview changes without saving to the database.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        branches = Branch.objects.all()
+        if options["business"]:
+            branches = branches.filter(business_id=options["business"])
+        if options["branch"]:
+            branches = branches.filter(pk=options["branch"])
+        branches = list(branches)
+
+        until = options["until"] or timezone.localdate()
+        since = options["since"]
+        if since is None:
+            first = Order.objects.filter(branch__in=branches).aggregate(
+                first=Min("created_at")
+            )["first"]
+            since = local_date(first) if first else until
+        if since > until:
+            raise CommandError("--since must not be after --until.")
+
+        with transaction.atomic():
+            cells = rebuild_sales_rollup(branches, since, until)
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        label = "Would write" if dry_run else "Wrote"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label} {cells} rollup row(s) for {len(branches)} branch(es) "
+                f"from {since} to {until}."
+            )
+        )
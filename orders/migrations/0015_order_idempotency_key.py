@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0016_employeeinvitation_telegram_username"),
+        ("crms", "0003_alter_customer_email"),
+        ("finances", "0017_backfill_sale_transaction_created_at"),
+        ("orders", "0014_order_receipt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="idempotency_key",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="order",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("idempotency_key__isnull", False)),
+                fields=("business", "idempotency_key"),
+                name="unique_order_idempotency_key_per_business",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0015_order_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="receipt_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:47
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+BACKFILL_CHUNK_SIZE = 500
+
+
+def backfill_search_text(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    orders = (
+        Order.objects.order_by("pk")
+        .select_related("customer", "employee__user")
+        .prefetch_related("items__variant__item")
+    )
+    batch = []
+    for order in orders.iterator(chunk_size=BACKFILL_CHUNK_SIZE):
+        parts = [str(order.id)]
+        if order.customer:
+            customer = order.customer
+            parts += [customer.full_name, customer.phone_number, customer.email]
+        if order.employee and order.employee.user:
+            user = order.employee.user
+            parts += [user.first_name, user.last_name, user.email]
+        parts += [item.variant.item.name for item in order.items.all() if item.variant]
+        order.search_text = " ".join(str(part) for part in parts if part)
+        batch.append(order)
+        if len(batch) >= BACKFILL_CHUNK_SIZE:
+            Order.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    if batch:
+        Order.objects.bulk_update(batch, ["search_text"])
+
+
+def create_search_indexes(apps, schema_editor):
+    # tsvector and trigram GIN indexes only exist on PostgreSQL; SQLite
+    # (tests, local development) searches search_text unindexed.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "UPDATE orders_order SET search_document = to_tsvector('simple', search_text)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS order_search_document_gin "
+        "ON orders_order USING gin (search_document)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS order_search_text_trgm "
+        "ON orders_order USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS order_search_text_trgm")
+    schema_editor.execute("DROP INDEX IF EXISTS order_search_document_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0017_daily_sales_rollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="search_document",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0018_order_search_document"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["branch", "-created_at"], name="order_branch_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["branch", "status", "created_at"],
+                name="order_branch_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["business", "status", "created_at"],
+                name="order_business_status_idx",
+            ),
+        ),
+    ]
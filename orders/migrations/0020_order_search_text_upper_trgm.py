@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def index_upper_search_text(apps, schema_editor):
+    # ``search_text__icontains`` compiles to ``UPPER(search_text) LIKE
+    # UPPER(%s)`` on PostgreSQL, so the trigram index must be on that
+    # expression to serve substring search.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS order_search_text_trgm")
+    schema_editor.execute(
+        "CREATE INDEX order_search_text_trgm "
+        "ON orders_order USING gin (UPPER(search_text) gin_trgm_ops)"
+    )
+
+
+def index_raw_search_text(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS order_search_text_trgm")
+    schema_editor.execute(
+        "CREATE INDEX order_search_text_trgm "
+        "ON orders_order USING gin (search_text gin_trgm_ops)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0019_order_report_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(index_upper_search_text, index_raw_search_text),
+    ]
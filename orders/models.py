@@ -1,5 +1,6 @@
 from uuid import uuid4
 
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
@@ -47,15 +48,89 @@ class Order(BaseModel):
     transaction_id = models.CharField(max_length=100, null=True, blank=True)
 
     receipt = models.FileField(upload_to="receipts/", null=True, blank=True)
+    # SHA-256 of the printable state the stored receipt was rendered from;
+    # lets the receipt task skip re-rendering when nothing printed changed.
+    receipt_hash = models.CharField(max_length=64, null=True, blank=True)
 
     additional_info = models.JSONField(default=dict, blank=True, null=True)
 
+    # Client-supplied key for orders pushed through the offline batch sync
+    # endpoint; lets a replayed batch resolve to the orders it already created.
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+
+    # Denormalised search fields maintained by orders.search: the order id,
+    # customer, employee and item names as plain text (trigram-indexed for
+    # partial ids and phone numbers) and as a tsvector (GIN-indexed).
+    search_text = models.TextField(blank=True, default="", editable=False)
+    search_document = SearchVectorField(null=True, editable=False)
+
+    # Fields diffed into OrderHistory on every save (see orders.signals).
+    HISTORY_TRACKED_FIELDS = (
+        "status",
+        "total_payable",
+        "customer",
+        "employee",
+        "payment_method",
+        "business",
+        "branch",
+    )
+
     def __str__(self):
         return f"Order {self.id} - {self.status}"
 
+    @classmethod
+    def _history_attnames(cls):
+        return [
+            (name, cls._meta.get_field(name).attname)
+            for name in cls.HISTORY_TRACKED_FIELDS
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the tracked columns as loaded so history can be diffed in
+        # memory on save instead of re-reading the row first. Deferred fields
+        # are left out rather than fetched.
+        loaded = dict(zip(field_names, values))
+        instance._history_snapshot = {
+            name: loaded[attname]
+            for name, attname in cls._history_attnames()
+            if attname in loaded
+        }
+        return instance
+
+    def history_snapshot(self):
+        """Current values of ``HISTORY_TRACKED_FIELDS`` keyed by field name."""
+        return {
+            name: getattr(self, attname) for name, attname in self._history_attnames()
+        }
+
     class Meta:
         ordering = ["-created_at"]
         unique_together = ("payment_method", "transaction_id")
+        indexes = [
+            # Branch order lists (newest first) and period order lookups.
+            models.Index(
+                fields=["branch", "-created_at"], name="order_branch_created_idx"
+            ),
+            # Status-filtered period aggregates: dashboards, reports, summary.
+            models.Index(
+                fields=["branch", "status", "created_at"],
+                name="order_branch_status_idx",
+            ),
+            # The same across every branch, for business-wide dashboards.
+            models.Index(
+                fields=["business", "status", "created_at"],
+                name="order_business_status_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business", "idempotency_key"],
+                condition=models.Q(idempotency_key__isnull=False),
+                name="unique_order_idempotency_key_per_business",
+            )
+        ]
 
 
 class OrderItem(BaseModel):
@@ -199,3 +274,48 @@ class OrderReturnItem(BaseModel):
             f"Return {self.quantity_returned}× {self.order_item.variant.name} "
             f"(Order {self.order_item.order_id})"
         )
+
+
+class DailySalesRollup(BaseModel):
+    """
+    Completed sales per (branch, local date, variant), maintained from order
+    completions and returns by ``orders.rollups``.  Dashboards and best-seller
+    queries read these rows instead of re-aggregating raw order items.
+
+    Only orders currently in COMPLETED status contribute, matching the raw
+    queries they replace: a fully returned order drops out entirely, while
+    partial returns of completed orders are tracked in the ``returned_*``
+    columns against the original sale date.
+    """
+
+    business = models.ForeignKey(
+        "business.Business", on_delete=models.CASCADE, related_name="+"
+    )
+    branch = models.ForeignKey(
+        "business.Branch", on_delete=models.CASCADE, related_name="+"
+    )
+    date = models.DateField(help_text="Sale date in the business's local time")
+    variant = models.ForeignKey(
+        "inventories.ItemVariant", on_delete=models.CASCADE, related_name="+"
+    )
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    returned_quantity = models.PositiveIntegerField(default=0)
+    returned_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "order_daily_sales_rollup"
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["branch", "date", "variant"],
+                name="unique_daily_sales_rollup_cell",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["business", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.variant_id}: {self.quantity} sold"
@@ -1,4 +1,6 @@
+import hashlib
 import io
+import json
 from decimal import Decimal
 
 from django.utils import timezone
@@ -22,6 +24,93 @@ BITA_TAGLINE = "Smart business & inventory management"
 BITA_WEBSITE = "www.bita.et"
 BITA_SUPPORT = "support@bita.et"
 
+VAT_RATE = Decimal("0.00")  # 0% — update when VAT is applicable
+
+# Bump whenever the layout below changes so every stored receipt hash is
+# invalidated and receipts re-render with the new layout.
+RECEIPT_LAYOUT_VERSION = 1
+
+# ── Styles ────────────────────────────────────────────────────────────────────
+# Built once per process; ReportLab styles are immutable once handed to
+# flowables, so sharing them across renders is safe.
+_SAMPLE_STYLES = getSampleStyleSheet()
+
+HEADING_STYLE = ParagraphStyle(
+    "Heading",
+    parent=_SAMPLE_STYLES["Normal"],
+    fontSize=18,
+    fontName="Helvetica-Bold",
+    spaceAfter=2 * mm,
+)
+SUBHEADING_STYLE = ParagraphStyle(
+    "SubHeading",
+    parent=_SAMPLE_STYLES["Normal"],
+    fontSize=11,
+    fontName="Helvetica-Bold",
+    spaceAfter=1 * mm,
+)
+BODY_STYLE = ParagraphStyle(
+    "Body",
+    parent=_SAMPLE_STYLES["Normal"],
+    fontSize=9,
+    leading=13,
+)
+SMALL_STYLE = ParagraphStyle(
+    "Small",
+    parent=_SAMPLE_STYLES["Normal"],
+    fontSize=8,
+    textColor=colors.grey,
+    leading=12,
+)
+RIGHT_ALIGN_STYLE = ParagraphStyle(
+    "Right",
+    parent=_SAMPLE_STYLES["Normal"],
+    fontSize=9,
+    alignment=2,
+)
+
+META_TABLE_STYLE = TableStyle(
+    [
+        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#555555")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("TOPPADDING", (0, 0), (-1, -1), 1.5),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 1.5),
+    ]
+)
+ITEMS_TABLE_STYLE = TableStyle(
+    [
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f0f0f0")),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.grey),
+        (
+            "ROWBACKGROUNDS",
+            (0, 1),
+            (-1, -1),
+            [colors.white, colors.HexColor("#fafafa")],
+        ),
+        ("TOPPADDING", (0, 0), (-1, -1), 3),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LINEBELOW", (0, -1), (-1, -1), 0.5, colors.grey),
+    ]
+)
+TOTALS_TABLE_STYLE = TableStyle(
+    [
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("TOPPADDING", (0, 0), (-1, -1), 3),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+        ("LINEABOVE", (0, 0), (-1, 0), 0.5, colors.grey),
+        ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black),
+        ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+        ("FONTSIZE", (0, -1), (-1, -1), 10),
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+    ]
+)
+
 
 def _draw_returned_watermark(canvas, doc):
     canvas.saveState()
@@ -71,66 +160,19 @@ def _draw_footer_with_watermark(canvas, doc):
     _draw_footer(canvas, doc)
 
 
-def generate_order_receipt(order) -> bytes:
-    """Return PDF bytes for a given Order instance."""
-    buffer = io.BytesIO()
-
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=15 * mm,
-        leftMargin=15 * mm,
-        topMargin=15 * mm,
-        bottomMargin=22 * mm,  # leave room for the pinned branding footer
-    )
-
-    styles = getSampleStyleSheet()
-
-    heading = ParagraphStyle(
-        "Heading",
-        parent=styles["Normal"],
-        fontSize=18,
-        fontName="Helvetica-Bold",
-        spaceAfter=2 * mm,
-    )
-    subheading = ParagraphStyle(
-        "SubHeading",
-        parent=styles["Normal"],
-        fontSize=11,
-        fontName="Helvetica-Bold",
-        spaceAfter=1 * mm,
-    )
-    normal = ParagraphStyle(
-        "Body",
-        parent=styles["Normal"],
-        fontSize=9,
-        leading=13,
-    )
-    small = ParagraphStyle(
-        "Small",
-        parent=styles["Normal"],
-        fontSize=8,
-        textColor=colors.grey,
-        leading=12,
-    )
-    right_align = ParagraphStyle(
-        "Right",
-        parent=styles["Normal"],
-        fontSize=9,
-        alignment=2,
-    )
-
-    story = []
-
-    # ── Business header ──────────────────────────────────────────────────────
+def receipt_context(order) -> dict:
+    """
+    Collect everything printed on the receipt as plain, JSON-serialisable
+    values.  Expects ``items__variant__item`` to be prefetched (or accepts
+    the extra queries) and never touches the database otherwise.
+    """
     business = order.business
     branch = order.branch
 
-    story.append(Paragraph(business.name, heading))
-
+    address_line = None
     address = getattr(business, "address", None)
     if address:
-        addr_parts = [
+        address_line = ", ".join(
             p
             for p in [
                 address.sublocality,
@@ -139,53 +181,100 @@ def generate_order_receipt(order) -> bytes:
                 address.country,
             ]
             if p
-        ]
-        story.append(Paragraph(", ".join(addr_parts), small))
-
-    if branch:
-        story.append(Paragraph(f"Branch: {branch.name}", small))
-
-    story.append(Spacer(1, 4 * mm))
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
-    story.append(Spacer(1, 3 * mm))
-
-    # ── Receipt title + meta ─────────────────────────────────────────────────
-    story.append(Paragraph("SALES RECEIPT", subheading))
+        )
 
     receipt_date = order.created_at
     if timezone.is_aware(receipt_date):
         receipt_date = timezone.localtime(receipt_date)
 
-    meta_data = [
+    meta = [
         ["Receipt #:", str(order.id)[:8].upper()],
         ["Date:", receipt_date.strftime("%d %b %Y  %H:%M")],
         ["Status:", order.status],
     ]
-
     if order.customer:
-        meta_data.append(["Customer:", order.customer.full_name or "—"])
+        meta.append(["Customer:", order.customer.full_name or "—"])
         if getattr(order.customer, "phone_number", None):
-            meta_data.append(["Phone:", order.customer.phone_number])
-
+            meta.append(["Phone:", order.customer.phone_number])
     if order.employee:
-        meta_data.append(["Served by:", order.employee.full_name])
-
+        meta.append(["Served by:", order.employee.full_name])
     if order.payment_method:
-        meta_data.append(["Payment:", order.payment_method.display_name])
+        meta.append(["Payment:", order.payment_method.display_name])
 
-    meta_table = Table(meta_data, colWidths=[35 * mm, None])
-    meta_table.setStyle(
-        TableStyle(
+    lines = []
+    items = sorted(order.items.all(), key=lambda item: (item.created_at, str(item.pk)))
+    for item in items:
+        unit_price = item.price or Decimal("0")
+        line_total = unit_price * item.quantity
+        item_name = item.variant.item.name
+        variant_name = item.variant.name
+        display_name = (
+            item_name if item_name == variant_name else f"{item_name} — {variant_name}"
+        )
+        lines.append(
             [
-                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#555555")),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("TOPPADDING", (0, 0), (-1, -1), 1.5),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 1.5),
+                display_name,
+                str(item.quantity),
+                f"{unit_price:,.2f}",
+                f"{line_total:,.2f}",
             ]
         )
+
+    subtotal = order.total_payable or Decimal("0")
+    vat_amount = (subtotal * VAT_RATE).quantize(Decimal("0.01"))
+
+    return {
+        "layout_version": RECEIPT_LAYOUT_VERSION,
+        "business_name": business.name,
+        "address": address_line,
+        "branch_name": branch.name if branch else None,
+        "meta": meta,
+        "lines": lines,
+        "subtotal": f"{subtotal:,.2f}",
+        "vat_label": f"VAT ({int(VAT_RATE * 100)}%)",
+        "vat_amount": f"{vat_amount:,.2f}",
+        "total_payable": f"{subtotal + vat_amount:,.2f}",
+        "is_returned": order.status == "RETURNED",
+    }
+
+
+def receipt_hash(context: dict) -> str:
+    """Stable SHA-256 of a receipt context; equal hashes print identically."""
+    encoded = json.dumps(context, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def render_receipt(context: dict) -> bytes:
+    """Return PDF bytes for a context built by ``receipt_context``."""
+    buffer = io.BytesIO()
+
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=15 * mm,
+        leftMargin=15 * mm,
+        topMargin=15 * mm,
+        bottomMargin=22 * mm,  # leave room for the pinned branding footer
     )
+
+    story = []
+
+    # ── Business header ──────────────────────────────────────────────────────
+    story.append(Paragraph(context["business_name"], HEADING_STYLE))
+    if context["address"]:
+        story.append(Paragraph(context["address"], SMALL_STYLE))
+    if context["branch_name"]:
+        story.append(Paragraph(f"Branch: {context['branch_name']}", SMALL_STYLE))
+
+    story.append(Spacer(1, 4 * mm))
+    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
+    story.append(Spacer(1, 3 * mm))
+
+    # ── Receipt title + meta ─────────────────────────────────────────────────
+    story.append(Paragraph("SALES RECEIPT", SUBHEADING_STYLE))
+
+    meta_table = Table(context["meta"], colWidths=[35 * mm, None])
+    meta_table.setStyle(META_TABLE_STYLE)
     story.append(meta_table)
 
     story.append(Spacer(1, 4 * mm))
@@ -193,105 +282,52 @@ def generate_order_receipt(order) -> bytes:
     story.append(Spacer(1, 3 * mm))
 
     # ── Order items table ────────────────────────────────────────────────────
-    story.append(Paragraph("Items", subheading))
+    story.append(Paragraph("Items", SUBHEADING_STYLE))
     story.append(Spacer(1, 2 * mm))
 
     col_widths = [None, 20 * mm, 30 * mm, 30 * mm]
     header_row = [
-        Paragraph("<b>Item</b>", normal),
-        Paragraph("<b>Qty</b>", normal),
-        Paragraph("<b>Unit Price</b>", normal),
-        Paragraph("<b>Total</b>", normal),
+        Paragraph("<b>Item</b>", BODY_STYLE),
+        Paragraph("<b>Qty</b>", BODY_STYLE),
+        Paragraph("<b>Unit Price</b>", BODY_STYLE),
+        Paragraph("<b>Total</b>", BODY_STYLE),
     ]
     rows = [header_row]
-
-    items = order.items.select_related("variant__item").all()
-    for item in items:
-        unit_price = item.price or Decimal("0")
-        line_total = unit_price * item.quantity
-        item_name = item.variant.item.name
-        variant_name = item.variant.name
-        display_name = (
-            item_name if item_name == variant_name else f"{item_name} — {variant_name}"
-        )
-        rows.append(
-            [
-                Paragraph(display_name, normal),
-                Paragraph(str(item.quantity), normal),
-                Paragraph(f"{unit_price:,.2f}", normal),
-                Paragraph(f"{line_total:,.2f}", normal),
-            ]
-        )
+    for line in context["lines"]:
+        rows.append([Paragraph(cell, BODY_STYLE) for cell in line])
 
     items_table = Table(rows, colWidths=col_widths, repeatRows=1)
-    items_table.setStyle(
-        TableStyle(
-            [
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f0f0f0")),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.grey),
-                (
-                    "ROWBACKGROUNDS",
-                    (0, 1),
-                    (-1, -1),
-                    [colors.white, colors.HexColor("#fafafa")],
-                ),
-                ("TOPPADDING", (0, 0), (-1, -1), 3),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
-                ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("LINEBELOW", (0, -1), (-1, -1), 0.5, colors.grey),
-            ]
-        )
-    )
+    items_table.setStyle(ITEMS_TABLE_STYLE)
     story.append(items_table)
 
     story.append(Spacer(1, 3 * mm))
 
     # ── Totals ───────────────────────────────────────────────────────────────
-    VAT_RATE = Decimal("0.00")  # 0% — update when VAT is applicable
-
-    subtotal = order.total_payable or Decimal("0")
-    vat_amount = (subtotal * VAT_RATE).quantize(Decimal("0.01"))
-    total_payable = subtotal + vat_amount
-
     totals_data = [
-        [Paragraph("Subtotal", normal), Paragraph(f"{subtotal:,.2f} ETB", right_align)],
         [
-            Paragraph(f"VAT ({int(VAT_RATE * 100)}%)", normal),
-            Paragraph(f"{vat_amount:,.2f} ETB", right_align),
+            Paragraph("Subtotal", BODY_STYLE),
+            Paragraph(f"{context['subtotal']} ETB", RIGHT_ALIGN_STYLE),
         ],
         [
-            Paragraph("<b>Total Payable</b>", normal),
-            Paragraph(f"<b>{total_payable:,.2f} ETB</b>", right_align),
+            Paragraph(context["vat_label"], BODY_STYLE),
+            Paragraph(f"{context['vat_amount']} ETB", RIGHT_ALIGN_STYLE),
+        ],
+        [
+            Paragraph("<b>Total Payable</b>", BODY_STYLE),
+            Paragraph(f"<b>{context['total_payable']} ETB</b>", RIGHT_ALIGN_STYLE),
         ],
     ]
     totals_table = Table(totals_data, colWidths=[None, 50 * mm])
-    totals_table.setStyle(
-        TableStyle(
-            [
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("TOPPADDING", (0, 0), (-1, -1), 3),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
-                ("LINEABOVE", (0, 0), (-1, 0), 0.5, colors.grey),
-                ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black),
-                ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-                ("FONTSIZE", (0, -1), (-1, -1), 10),
-                ("ALIGN", (1, 0), (1, -1), "RIGHT"),
-            ]
-        )
-    )
+    totals_table.setStyle(TOTALS_TABLE_STYLE)
     story.append(totals_table)
 
     story.append(Spacer(1, 6 * mm))
     story.append(HRFlowable(width="100%", thickness=0.5, color=colors.grey))
     story.append(Spacer(1, 3 * mm))
 
-    story.append(Paragraph("Thank you for your business!", small))
+    story.append(Paragraph("Thank you for your business!", SMALL_STYLE))
 
-    is_returned = order.status == "RETURNED"
-    if is_returned:
+    if context["is_returned"]:
         doc.build(
             story,
             onFirstPage=_draw_footer_with_watermark,
@@ -300,3 +336,8 @@ def generate_order_receipt(order) -> bytes:
     else:
         doc.build(story, onFirstPage=_draw_footer, onLaterPages=_draw_footer)
     return buffer.getvalue()
+
+
+def generate_order_receipt(order) -> bytes:
+    """Return PDF bytes for a given Order instance."""
+    return render_receipt(receipt_context(order))
@@ -0,0 +1,152 @@
+"""
+Set-based processing of order returns.
+
+A return request may list hundreds of lines for wholesale orders.  Rather
+than validating, restocking and recording each line in turn, the engine:
+
+* locks the order row, so concurrent returns of one order are serialised and
+  validated against what the other already returned;
+* reads every order item with its already-returned quantity in one query and
+  validates all lines against that map (lines naming the same item are
+  merged first);
+* restocks variants and supplied batches with one relative UPDATE per table;
+* bulk-creates the return items and records a single REFUND transaction.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from finances.models import Transaction
+from inventories.models import ItemVariant, SuppliedItem
+from orders.models import Order, OrderItem, OrderReturn, OrderReturnItem
+from orders.signals import order_returned
+
+
+def _restock(model, quantities):
+    """Add ``quantities`` ({pk: qty}) to ``model.quantity`` in one UPDATE."""
+    if not quantities:
+        return
+    model.objects.filter(pk__in=quantities).update(
+        quantity=F("quantity")
+        + Case(
+            *(When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def process_return(
+    order, lines, *, reason="", refund_method=None, processed_by=None, user=None
+):
+    """
+    Return ``lines`` (``order_item_id``/``quantity_returned`` dicts) of a
+    completed ``order``.  Raises ``ValidationError`` with every invalid line
+    when any line cannot be returned; otherwise returns the OrderReturn.
+    """
+    requested = defaultdict(int)
+    for line in lines:
+        requested[str(line["order_item_id"])] += line["quantity_returned"]
+
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order.pk)
+        if order.status != Order.StatusChoices.COMPLETED:
+            raise ValidationError({"error": "Only completed orders can be returned."})
+
+        order_items = {
+            str(order_item.id): order_item
+            for order_item in OrderItem.objects.filter(order=order)
+            .select_related("variant")
+            .annotate(
+                already_returned=Coalesce(Sum("return_items__quantity_returned"), 0)
+            )
+        }
+
+        errors = []
+        for order_item_id, qty in requested.items():
+            order_item = order_items.get(order_item_id)
+            if order_item is None:
+                errors.append(
+                    f"order_item {order_item_id} does not belong to this order."
+                )
+                continue
+            available = order_item.quantity - order_item.already_returned
+            if qty > available:
+                errors.append(
+                    f"'{order_item.variant.name}': requested {qty}, "
+                    f"but only {available} eligible for return."
+                )
+        if errors:
+            raise ValidationError({"errors": errors})
+
+        total_ordered = sum(oi.quantity for oi in order_items.values())
+        total_returned = sum(oi.already_returned for oi in order_items.values())
+        return_status = (
+            OrderReturn.StatusChoices.FULL
+            if total_returned + sum(requested.values()) >= total_ordered
+            else OrderReturn.StatusChoices.PARTIAL
+        )
+
+        variant_restock = defaultdict(int)
+        batch_restock = defaultdict(int)
+        return_items = []
+        total_refund = Decimal("0")
+        for order_item_id, qty in requested.items():
+            order_item = order_items[order_item_id]
+            line_refund = (order_item.price or Decimal("0")) * qty
+            total_refund += line_refund
+            variant_restock[order_item.variant_id] += qty
+            if order_item.supplied_item_id:
+                batch_restock[order_item.supplied_item_id] += qty
+            return_items.append(
+                OrderReturnItem(
+                    order_item=order_item,
+                    quantity_returned=qty,
+                    is_restocked=True,
+                    refund_amount=line_refund,
+                )
+            )
+
+        _restock(ItemVariant, variant_restock)
+        _restock(SuppliedItem, batch_restock)
+
+        order_return = OrderReturn.objects.create(
+            order=order,
+            reason=reason,
+            refund_method=refund_method,
+            total_refund_amount=total_refund,
+            status=return_status,
+            processed_by=processed_by,
+        )
+        for return_item in return_items:
+            return_item.order_return = order_return
+        OrderReturnItem.objects.bulk_create(return_items)
+
+        # Record a REFUND transaction. Refunds are money paid back to the
+        # customer, so the amount is stored negative — it reduces account
+        # balances/assets and net profit in the finance reports.
+        Transaction.objects.create(
+            order=order,
+            branch_id=order.branch_id,
+            business_id=order.business_id,
+            payment_method=refund_method,
+            type=Transaction.TransactionType.REFUND,
+            total_paid_amount=-total_refund,
+            created_by=user,
+        )
+
+        # Update order status only on a full return
+        if return_status == OrderReturn.StatusChoices.FULL:
+            order.status = Order.StatusChoices.RETURNED
+            order.save(update_fields=["status", "updated_at"])
+
+        order_returned.send(sender=Order, instance=order, order_return=order_return)
+
+    return order_return
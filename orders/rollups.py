@@ -0,0 +1,207 @@
+"""
+Maintenance of ``DailySalesRollup``.
+
+Rather than applying +/- deltas (which drift whenever a code path forgets
+one), every change re-derives the affected cells — (branch, local date,
+variant) — from the raw order and return rows.  A cell covers one branch's
+sales of one variant on one day, so a refresh reads a handful of rows.
+
+Refreshes run from the outbox (``SALES_ROLLUP_OUTBOX_TOPIC``) after the
+change commits, serialised per branch with a row lock on the branch so a
+refresh can never overwrite a newer one with stale totals.  Each refresh
+bumps the home stats version once it commits, so cached dashboards computed
+from the cells it replaced are recomputed.
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from business.models import Branch
+from orders.models import DailySalesRollup, Order, OrderItem, OrderReturnItem
+from orders.stats_cache import bump_home_stats_version
+
+SALES_ROLLUP_OUTBOX_TOPIC = "orders.sales_rollup.refresh"
+
+
+def local_date(value):
+    """Local calendar date of an aware datetime."""
+    return timezone.localtime(value).date()
+
+
+def local_day_bounds(first, last):
+    """Aware [start, end) datetimes covering local dates ``first``..``last``."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first, time.min), tz)
+    end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def publish_rollup_refresh(branch_id, dates, variant_ids=None):
+    """
+    Record an outbox event refreshing cells of one branch on ``dates``:
+    only ``variant_ids`` when given, otherwise every variant sold that day.
+    """
+    from core.outbox import publish
+
+    if not dates or variant_ids is not None and not variant_ids:
+        return
+    publish(
+        SALES_ROLLUP_OUTBOX_TOPIC,
+        {
+            "branch_id": str(branch_id),
+            "dates": sorted({d.isoformat() for d in dates}),
+            "variant_ids": (
+                sorted({str(v) for v in variant_ids})
+                if variant_ids is not None
+                else None
+            ),
+        },
+    )
+
+
+def line_revenue():
+    """
+    Sales value of order lines (``quantity × price``), summed over
+    ``OrderItem`` rows.  The rollup and the employee-scope fallbacks in the
+    home stats both use it, so every caller sees the same totals.
+    """
+    return Sum(
+        F("quantity") * Coalesce(F("price"), Value(Decimal("0"))),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def _aggregate(branch_ids, first, last, variant_ids=None):
+    """
+    Raw per-cell totals for completed orders of ``branch_ids`` sold between
+    local dates ``first`` and ``last``.  Returns ``{(branch, date, variant):
+    row}``.
+    """
+    start, end = local_day_bounds(first, last)
+    tz = timezone.get_current_timezone()
+
+    sales = OrderItem.objects.filter(
+        order__branch_id__in=branch_ids,
+        order__status=Order.StatusChoices.COMPLETED,
+        order__created_at__gte=start,
+        order__created_at__lt=end,
+    )
+    returns = OrderReturnItem.objects.filter(
+        order_item__order__branch_id__in=branch_ids,
+        order_item__order__status=Order.StatusChoices.COMPLETED,
+        order_item__order__created_at__gte=start,
+        order_item__order__created_at__lt=end,
+    )
+    if variant_ids is not None:
+        sales = sales.filter(variant_id__in=variant_ids)
+        returns = returns.filter(order_item__variant_id__in=variant_ids)
+
+    cells = {}
+    for row in (
+        sales.annotate(day=TruncDate("order__created_at", tzinfo=tz))
+        .values("order__business_id", "order__branch_id", "day", "variant_id")
+        .annotate(
+            sold_quantity=Sum("quantity"),
+            sold_revenue=line_revenue(),
+            sold_orders=Count("order_id", distinct=True),
+        )
+    ):
+        key = (row["order__branch_id"], row["day"], row["variant_id"])
+        cells[key] = {
+            "business_id": row["order__business_id"],
+            "quantity": row["sold_quantity"] or 0,
+            "revenue": row["sold_revenue"] or Decimal("0"),
+            "order_count": row["sold_orders"],
+            "returned_quantity": 0,
+            "returned_amount": Decimal("0"),
+        }
+
+    for row in (
+        returns.annotate(day=TruncDate("order_item__order__created_at", tzinfo=tz))
+        .values("order_item__order__branch_id", "day", "order_item__variant_id")
+        .annotate(
+            total_returned=Sum("quantity_returned"),
+            total_refunded=Sum("refund_amount"),
+        )
+    ):
+        key = (
+            row["order_item__order__branch_id"],
+            row["day"],
+            row["order_item__variant_id"],
+        )
+        if key in cells:
+            cells[key]["returned_quantity"] = row["total_returned"] or 0
+            cells[key]["returned_amount"] = row["total_refunded"] or Decimal("0")
+
+    return cells
+
+
+def _rows(cells):
+    return [
+        DailySalesRollup(
+            branch_id=branch_id,
+            date=day,
+            variant_id=variant_id,
+            business_id=values.pop("business_id"),
+            **values,
+        )
+        for (branch_id, day, variant_id), values in cells.items()
+    ]
+
+
+def refresh_sales_rollup(branch_id, dates, variant_ids=None):
+    """
+    Re-derive cells of one branch on ``dates`` from raw orders and returns;
+    only ``variant_ids`` when given, otherwise the whole day.
+    """
+    dates = sorted({date.fromisoformat(d) if isinstance(d, str) else d for d in dates})
+    if not dates or variant_ids is not None and not variant_ids:
+        return 0
+
+    with transaction.atomic():
+        # Serialise refreshes per branch. NO KEY UPDATE does not block the
+        # key-share locks taken by inserts that reference the branch.
+        locked = list(
+            Branch.objects.select_for_update(no_key=True)
+            .filter(pk=branch_id)
+            .values_list("business_id", flat=True)
+        )
+        if not locked:
+            return 0
+
+        cells = _aggregate([branch_id], dates[0], dates[-1], variant_ids)
+        cells = {key: values for key, values in cells.items() if key[1] in dates}
+
+        stale = DailySalesRollup.objects.filter(branch_id=branch_id, date__in=dates)
+        if variant_ids is not None:
+            stale = stale.filter(variant_id__in=variant_ids)
+        stale.delete()
+        DailySalesRollup.objects.bulk_create(_rows(cells))
+        # Dashboards cached since the order committed were computed from the
+        # cells just replaced.
+        bump_home_stats_version(locked[0], branch_id)
+    return len(cells)
+
+
+def rebuild_sales_rollup(branches, first, last):
+    """Replace every rollup row of ``branches`` between ``first`` and ``last``."""
+    branch_ids = [branch.pk for branch in branches]
+    with transaction.atomic():
+        list(
+            Branch.objects.select_for_update(no_key=True)
+            .filter(pk__in=branch_ids)
+            .order_by("pk")
+        )
+        cells = _aggregate(branch_ids, first, last)
+        DailySalesRollup.objects.filter(
+            branch_id__in=branch_ids, date__gte=first, date__lte=last
+        ).delete()
+        DailySalesRollup.objects.bulk_create(_rows(cells), batch_size=1000)
+        for branch in branches:
+            bump_home_stats_version(branch.business_id, branch.pk)
+    return len(cells)
@@ -0,0 +1,104 @@
+"""
+Maintenance of the denormalised ``Order.search_text`` / ``search_document``
+columns that order search filters on.
+
+Each order's searchable text — its id, customer name/phone/email, employee
+name/email and item names — is rebuilt whole whenever one of those inputs
+changes.  Refreshes are collected per thread and run once after the writing
+transaction commits, so creating an order with ten items costs one refresh,
+not eleven.  Customer edits can touch many orders and go through the outbox
+instead (``SEARCH_OUTBOX_TOPIC``).
+
+``search_document`` is a PostgreSQL tsvector; on other backends it stays
+NULL and search falls back to ``search_text`` alone.
+"""
+
+import threading
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection, transaction
+from django.db.models import Q, Value
+
+from orders.models import Order
+
+SEARCH_OUTBOX_TOPIC = "orders.search.refresh"
+SEARCH_CONFIG = "simple"
+REFRESH_CHUNK_SIZE = 500
+
+_pending = threading.local()
+
+
+def order_search_text(order):
+    """Searchable text of an order with customer, employee and items loaded."""
+    parts = [str(order.id)]
+    if order.customer:
+        customer = order.customer
+        parts += [customer.full_name, customer.phone_number, customer.email]
+    if order.employee and order.employee.user:
+        user = order.employee.user
+        parts += [user.first_name, user.last_name, user.email]
+    parts += [item.variant.item.name for item in order.items.all() if item.variant]
+    return " ".join(str(part) for part in parts if part)
+
+
+def refresh_order_search(order_ids):
+    """Rebuild the search columns of ``order_ids``."""
+    order_ids = list(order_ids)
+    for start in range(0, len(order_ids), REFRESH_CHUNK_SIZE):
+        chunk = order_ids[start : start + REFRESH_CHUNK_SIZE]
+        orders = list(
+            Order.objects.filter(pk__in=chunk)
+            .order_by()
+            .select_related("customer", "employee__user")
+            .prefetch_related("items__variant__item")
+        )
+        fields = ["search_text"]
+        for order in orders:
+            order.search_text = order_search_text(order)
+        if connection.vendor == "postgresql":
+            fields.append("search_document")
+            for order in orders:
+                order.search_document = SearchVector(
+                    Value(order.search_text), config=SEARCH_CONFIG
+                )
+        Order.objects.bulk_update(orders, fields)
+
+
+def _flush():
+    order_ids = getattr(_pending, "order_ids", None)
+    _pending.order_ids = set()
+    if order_ids:
+        refresh_order_search(order_ids)
+
+
+def queue_order_search_refresh(*order_ids):
+    """
+    Refresh the search columns of ``order_ids`` once the current transaction
+    commits.  Ids queued by a transaction that rolls back are picked up by
+    the next flush, which just rebuilds them again.
+    """
+    if not hasattr(_pending, "order_ids"):
+        _pending.order_ids = set()
+    _pending.order_ids.update(order_ids)
+    transaction.on_commit(_flush)
+
+
+def search_orders(queryset, terms):
+    """
+    Filter ``queryset`` to orders matching every search term: a substring of
+    ``search_text`` (trigram-indexed) or, on PostgreSQL, a tsvector match of
+    the whole query.  Both are predicates on the order row itself, so the
+    result needs no joins or DISTINCT.
+    """
+    if not terms:
+        return queryset
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_text__icontains=term)
+    if connection.vendor == "postgresql":
+        condition |= Q(
+            search_document=SearchQuery(
+                " ".join(terms), config=SEARCH_CONFIG, search_type="websearch"
+            )
+        )
+    return queryset.filter(condition)
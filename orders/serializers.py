@@ -59,7 +59,7 @@ class OrderSerializer(ModelSerializer):
 
     class Meta:
         model = Order
-        fields = "__all__"
+        exclude = ["search_text", "search_document"]
 
     def validate(self, attrs):
         business = self.context["request"].business
@@ -256,3 +256,40 @@ class OrderReturnReadSerializer(ModelSerializer):
             "items",
             "created_at",
         ]
+
+
+class OrderSyncItemSerializer(serializers.Serializer):
+    variant = serializers.UUIDField()
+    supplied_item = serializers.UUIDField(required=False, allow_null=True)
+    quantity = serializers.IntegerField(min_value=1)
+    price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, required=False, allow_null=True
+    )
+
+
+class OrderSyncEntrySerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    idempotency_key = serializers.CharField(max_length=255)
+    customer = serializers.UUIDField(required=False, allow_null=True)
+    payment_method = serializers.UUIDField(required=False, allow_null=True)
+    transaction_id = serializers.CharField(
+        max_length=100, required=False, allow_null=True, allow_blank=True
+    )
+    created_at = serializers.DateTimeField(
+        required=False,
+        allow_null=True,
+        help_text="When the sale happened on the device. Defaults to now.",
+    )
+    additional_info = serializers.JSONField(required=False, allow_null=True)
+    item_variants = OrderSyncItemSerializer(many=True, min_length=1)
+
+
+class OrderSyncSerializer(serializers.Serializer):
+    """
+    Envelope for the offline batch sync endpoint.  Entries are validated one
+    by one by the sync engine so a malformed sale only fails itself.
+    """
+
+    orders = serializers.ListField(
+        child=serializers.DictField(), min_length=1, max_length=1000
+    )
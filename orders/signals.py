@@ -1,42 +1,146 @@
 # Signal for creating a transaction when an order is completed
-from django.db.models.signals import Signal, post_save, pre_save
+from django.db.models.signals import Signal, post_delete, post_save
 from django.dispatch import receiver
 
-from orders.models import Order, OrderHistory
+from crms.models import Customer
+from finances.closing import invalidate_period
+from finances.models import Transaction
+from inventories.models import Item, SuppliedItem
+from orders.models import Order, OrderHistory, OrderItem
+from orders.search import SEARCH_OUTBOX_TOPIC, queue_order_search_refresh
+from orders.stats_cache import bump_home_stats_version
 
 order_completed = Signal()
+# Sent once per chunk of orders created and completed by the offline batch
+# sync, with ``orders`` and ``order_items``; receivers handle them set-based.
+orders_synced = Signal()
+# Sent inside the return transaction with ``instance`` (the order) and
+# ``order_return`` once its return items exist.
+order_returned = Signal()
 
 
 @receiver(order_completed)
 def on_order_completed_receipt(sender, instance, **kwargs):
-    from django.db import transaction
+    from orders.tasks import queue_order_receipt
 
-    from orders.tasks import generate_order_receipt_task
+    queue_order_receipt(instance.id)
 
-    order_id = str(instance.id)
-    transaction.on_commit(lambda: generate_order_receipt_task.delay(order_id))
 
+@receiver(orders_synced)
+def on_orders_synced_receipt(sender, orders, **kwargs):
+    from orders.tasks import queue_order_receipt
 
-@receiver(pre_save, sender=Order)
-def track_order_changes(sender, instance, **kwargs):
-    """
-    Track changes to Order model and create OrderHistory records.
-    Stores the old instance in the instance to be used in post_save.
-    """
-    if instance.pk:  # Only track changes for existing orders
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
-            # Store old instance on the new instance for use in post_save
-            instance._old_instance = old_instance
-        except Order.DoesNotExist:
-            # Order doesn't exist yet, this is a new order
-            instance._old_instance = None
+    for order in orders:
+        queue_order_receipt(order.id)
+
+
+def _queue_sales_rollup_refresh(order):
+    from orders.rollups import local_date, publish_rollup_refresh
+
+    # Only the cells of the order's variants can change; re-deriving the
+    # whole branch-day would cost every order sold that day.
+    publish_rollup_refresh(
+        order.branch_id,
+        [local_date(order.created_at)],
+        OrderItem.objects.filter(order=order).values_list("variant_id", flat=True),
+    )
+
+
+@receiver(orders_synced)
+def on_orders_synced_rollup(sender, orders, order_items, **kwargs):
+    from orders.rollups import local_date, publish_rollup_refresh
+
+    publish_rollup_refresh(
+        orders[0].branch_id,
+        [local_date(order.created_at) for order in orders],
+        [item.variant_id for item in order_items],
+    )
+    bump_home_stats_version(orders[0].business_id, orders[0].branch_id)
+
+
+@receiver(orders_synced)
+def on_orders_synced_search(sender, orders, **kwargs):
+    queue_order_search_refresh(*(order.id for order in orders))
+
+
+# Order.search_text/search_document fold in the order's items, customer and
+# employee; keep them current as those change.
+SEARCHED_CUSTOMER_FIELDS = frozenset({"full_name", "phone_number", "email"})
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def refresh_search_for_order_item(sender, instance, **kwargs):
+    queue_order_search_refresh(instance.order_id)
+
+
+@receiver(post_save, sender=Customer)
+def refresh_search_for_customer(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    if created:
+        return
+    if update_fields is not None and not SEARCHED_CUSTOMER_FIELDS & set(update_fields):
+        return
+    from core.outbox import publish
+
+    # A customer can have many orders; re-index them from a worker.
+    publish(SEARCH_OUTBOX_TOPIC, {"customer_id": str(instance.pk)})
+
+
+@receiver(order_returned)
+def on_order_returned_rollup(sender, instance, **kwargs):
+    _queue_sales_rollup_refresh(instance)
+    bump_home_stats_version(instance.business_id, instance.branch_id)
+
+
+# Cached home dashboards also show net cash, low stock and expiring items.
+@receiver([post_save, post_delete], sender=Transaction)
+def invalidate_home_stats_for_transaction(sender, instance, **kwargs):
+    bump_home_stats_version(instance.business_id, instance.branch_id)
+
+
+@receiver([post_save, post_delete], sender=Item)
+def invalidate_home_stats_for_item(sender, instance, **kwargs):
+    bump_home_stats_version(instance.business_id, instance.branch_id)
+
+
+@receiver([post_save, post_delete], sender=SuppliedItem)
+def invalidate_home_stats_for_stock(sender, instance, **kwargs):
+    # The branch lives on the supply; avoid a query when it is not loaded.
+    branch_id = (
+        instance.supply.branch_id if SuppliedItem.supply.is_cached(instance) else None
+    )
+    bump_home_stats_version(instance.business_id, branch_id)
+
+
+# Saves that only touch these fields come from the receipt task itself; they
+# change nothing tracked and must not queue another receipt.
+RECEIPT_ONLY_FIELDS = frozenset({"receipt", "receipt_hash", "updated_at"})
+
+
+def _history_value(value):
+    return str(value) if value is not None else None
+
+
+def _current_actor(business):
+    """User (and their employee record) set on the thread by the request, if any."""
+    import threading
+
+    user = getattr(threading.current_thread(), "user", None)
+    if not user or not user.is_authenticated:
+        return None, None
+
+    from business.models import Employee
+
+    employee = Employee.objects.filter(user=user, business=business).first()
+    return user, employee
 
 
 @receiver(post_save, sender=Order)
-def create_order_history(sender, instance, created, **kwargs):
+def create_order_history(sender, instance, created, update_fields=None, **kwargs):
     """
-    Create OrderHistory records after an order is saved.
+    Create OrderHistory records after an order is saved, diffing the tracked
+    fields against the snapshot taken when the order was loaded.
     """
     if created:
         # For new orders, create an initial history entry
@@ -46,90 +150,72 @@ def create_order_history(sender, instance, created, **kwargs):
             old_value=None,
             new_value="Order created",
         )
-        from django.db import transaction
+        instance._history_snapshot = instance.history_snapshot()
+        queue_order_search_refresh(instance.id)
+        from orders.tasks import queue_order_receipt
 
-        from orders.tasks import generate_order_receipt_task
+        queue_order_receipt(instance.id)
+        return
 
-        order_id = str(instance.id)
-        transaction.on_commit(lambda: generate_order_receipt_task.delay(order_id))
+    if update_fields is not None and set(update_fields) <= RECEIPT_ONLY_FIELDS:
         return
 
-    # For updates, track field changes
-    if hasattr(instance, "_old_instance") and instance._old_instance:
-        old_instance = instance._old_instance
-        tracked_fields = [
-            "status",
-            "total_payable",
-            "customer",
-            "employee",
-            "payment_method",
-            "business",
-            "branch",
-        ]
-
-        for field_name in tracked_fields:
-            old_value = getattr(old_instance, field_name, None)
-            new_value = getattr(instance, field_name, None)
-
-            # Convert ForeignKey objects to their string representation or ID
-            if hasattr(old_value, "pk"):
-                old_value = str(old_value.pk) if old_value else None
-            if hasattr(new_value, "pk"):
-                new_value = str(new_value.pk) if new_value else None
-
-            # Convert to string for storage
-            old_value_str = str(old_value) if old_value is not None else None
-            new_value_str = str(new_value) if new_value is not None else None
-
-            # Only create history if the value actually changed
+    old_snapshot = getattr(instance, "_history_snapshot", None)
+    if old_snapshot is not None:
+        old_status = old_snapshot.get("status")
+        new_snapshot = instance.history_snapshot()
+        saved = set(update_fields) if update_fields is not None else set(new_snapshot)
+        attnames = dict(Order._history_attnames())
+        changes = []
+        for field_name, old_value in old_snapshot.items():
+            if field_name not in saved and attnames[field_name] not in saved:
+                continue
+            old_value_str = _history_value(old_value)
+            new_value_str = _history_value(new_snapshot[field_name])
             if old_value_str != new_value_str:
-                # Try to get user from thread-local storage if available
-                # This can be set in middleware or views
-                changed_by = None
-                changed_by_employee = None
-
-                try:
-                    import threading
-
-                    if hasattr(threading.current_thread(), "user"):
-                        user = threading.current_thread().user
-                        if user and user.is_authenticated:
-                            changed_by = user
-                            # Try to get employee
-                            try:
-                                from business.models import Employee
-
-                                changed_by_employee = Employee.objects.filter(
-                                    user=user, business=instance.business
-                                ).first()
-                            except:
-                                pass
-                except:
-                    pass
-
-                OrderHistory.objects.create(
-                    order=instance,
-                    field_name=field_name,
-                    old_value=old_value_str,
-                    new_value=new_value_str,
-                    changed_by=changed_by,
-                    changed_by_employee=changed_by_employee,
-                )
-
-        # Clean up the stored old instance
-        if hasattr(instance, "_old_instance"):
-            delattr(instance, "_old_instance")
+                changes.append((field_name, old_value_str, new_value_str))
+            # The row now holds the new value; later saves diff against it.
+            old_snapshot[field_name] = new_snapshot[field_name]
+
+        if changes:
+            changed_by, changed_by_employee = _current_actor(instance.business_id)
+            OrderHistory.objects.bulk_create(
+                [
+                    OrderHistory(
+                        order=instance,
+                        field_name=field_name,
+                        old_value=old_value_str,
+                        new_value=new_value_str,
+                        changed_by=changed_by,
+                        changed_by_employee=changed_by_employee,
+                    )
+                    for field_name, old_value_str, new_value_str in changes
+                ]
+            )
+
+        # Completed sales feed DailySalesRollup; refresh the order's cells
+        # when it enters or leaves COMPLETED or its total changes while in it.
+        changed_fields = {field_name for field_name, _, _ in changes}
+        if changed_fields & {"customer", "employee"}:
+            queue_order_search_refresh(instance.id)
+        if changed_fields & {"status", "total_payable"} and (
+            Order.StatusChoices.COMPLETED in (old_status, instance.status)
+        ):
+            _queue_sales_rollup_refresh(instance)
+            bump_home_stats_version(instance.business_id, instance.branch_id)
+        # Income by category of a closed month counts orders by status.
+        if "status" in changed_fields:
+            invalidate_period(
+                instance.business_id, instance.branch_id, instance.created_at
+            )
 
     # Regenerate receipt whenever the order is created or meaningfully updated.
     # Skip the update_fields=["receipt"] save the task does itself to avoid loops.
-    # Use on_commit so the task only fires after the transaction commits — dispatching
-    # Celery inside an atomic block causes the whole transaction to roll back if
-    # the broker is momentarily unavailable.
-    update_fields = kwargs.get("update_fields")
+    # queue_order_receipt defers to on_commit (dispatching Celery inside an
+    # atomic block rolls the whole transaction back if the broker is briefly
+    # unavailable) and coalesces repeat requests; the task skips rendering
+    # when the printable state is unchanged.
     if update_fields is None or "receipt" not in update_fields:
-        from django.db import transaction
-
-        from orders.tasks import generate_order_receipt_task
+        from orders.tasks import queue_order_receipt
 
-        order_id = str(instance.id)
-        transaction.on_commit(lambda: generate_order_receipt_task.delay(order_id))
+        queue_order_receipt(instance.id)
@@ -0,0 +1,143 @@
+"""
+Response cache for the home dashboard (``HomeStatsViewSet.stats``).
+
+Entries are keyed by everything that shapes the response — business, branch,
+ranges, report-access scope and the local date — and stamped with the
+version counters of the business/branch they were computed from.  Writes that
+move the numbers (order completion, returns, transactions, stock) bump those
+counters via ``bump_home_stats_version`` once their transaction commits, and
+so does each ``DailySalesRollup`` refresh they trigger.
+
+An entry whose stamp no longer matches, or that is older than
+``HOME_STATS_FRESH_SECONDS``, is stale.  The first request to see a stale
+entry takes a short lock and recomputes; concurrent requests keep getting the
+stale entry meanwhile, so a burst of dashboards after a sale costs a single
+recomputation.
+
+Every cache call fails soft: with the cache unreachable the stats are simply
+computed on each request.
+"""
+
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HOME_STATS_FRESH_SECONDS = 30
+# Stale entries are kept this long so there is something to serve while the
+# lock holder recomputes.
+HOME_STATS_STALE_TTL = 60 * 10
+HOME_STATS_LOCK_TTL = 30
+
+HOME_STATS_KEY = "orders:home_stats:{}"
+HOME_STATS_LOCK_KEY = "orders:home_stats:lock:{}"
+# Bumped on every change in the business; stamps business-wide entries.
+BUSINESS_VERSION_KEY = "orders:home_stats:v:business:{}"
+# Bumped on changes whose branch is not known; stamps branch entries too.
+BUSINESS_SHARED_VERSION_KEY = "orders:home_stats:v:business-shared:{}"
+BRANCH_VERSION_KEY = "orders:home_stats:v:branch:{}"
+
+
+def _version_keys(business_id, branch_id):
+    if branch_id:
+        return [
+            BRANCH_VERSION_KEY.format(branch_id),
+            BUSINESS_SHARED_VERSION_KEY.format(business_id),
+        ]
+    return [BUSINESS_VERSION_KEY.format(business_id)]
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing counter: start it; a racing bump may have created it first.
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def _bump(business_id, branch_id):
+    try:
+        _incr(BUSINESS_VERSION_KEY.format(business_id))
+        if branch_id:
+            _incr(BRANCH_VERSION_KEY.format(branch_id))
+        else:
+            _incr(BUSINESS_SHARED_VERSION_KEY.format(business_id))
+    except Exception:
+        logger.warning(
+            "home stats: could not bump version for business %s", business_id
+        )
+
+
+def bump_home_stats_version(business_id, branch_id=None):
+    """
+    Invalidate cached dashboards of ``branch_id`` (or every branch when it is
+    not known) and of the business as a whole, once the current transaction
+    commits.
+    """
+    if not business_id:
+        return
+    transaction.on_commit(lambda: _bump(business_id, branch_id))
+
+
+def home_stats_key(*parts):
+    """Cache key for a response shaped by ``parts``, plus the local date."""
+    raw = "|".join(str(part) for part in (*parts, timezone.localdate()))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cached_home_stats(key, business_id, branch_id, compute):
+    """
+    Return the cached response data for ``key``, calling ``compute()`` when
+    it is missing, or stale and no other request is already recomputing it.
+    """
+    entry_key = HOME_STATS_KEY.format(key)
+    lock_key = HOME_STATS_LOCK_KEY.format(key)
+    version_keys = _version_keys(business_id, branch_id)
+
+    try:
+        found = cache.get_many([entry_key, *version_keys])
+    except Exception:
+        logger.warning("home stats: cache unavailable, computing directly")
+        return compute()
+
+    # Read the stamp before computing: a bump landing mid-computation leaves
+    # the new entry stale rather than hiding the change.
+    stamp = [found.get(version_key, 0) for version_key in version_keys]
+    entry = found.get(entry_key)
+    if entry is not None:
+        if entry["stamp"] == stamp and entry["fresh_until"] > time.time():
+            return entry["data"]
+        try:
+            locked = cache.add(lock_key, 1, HOME_STATS_LOCK_TTL)
+        except Exception:
+            locked = True
+        if not locked:
+            return entry["data"]
+
+    try:
+        data = compute()
+        try:
+            cache.set(
+                entry_key,
+                {
+                    "stamp": stamp,
+                    "fresh_until": time.time() + HOME_STATS_FRESH_SECONDS,
+                    "data": data,
+                },
+                HOME_STATS_STALE_TTL,
+            )
+        except Exception:
+            logger.warning("home stats: could not store entry %s", key)
+        return data
+    finally:
+        if entry is not None:
+            try:
+                cache.delete(lock_key)
+            except Exception:
+                pass
@@ -0,0 +1,361 @@
+"""
+Batch sync of orders queued by offline POS clients.
+
+Cashiers that lose connectivity keep selling and later push every queued sale
+in one request.  Each sale carries a client-generated order ``id`` and an
+``idempotency_key``; both are persisted on the created Order so replaying the
+same batch resolves to the orders that already exist instead of selling the
+stock twice.
+
+The batch is processed in chunks of ``SYNC_CHUNK_SIZE`` orders, one database
+transaction per chunk.  Within a chunk every lookup (replays, variants,
+batches, payment methods, customers) is a single query, stock is validated
+against the locked rows in memory and all writes are bulk operations.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from crms.models import Customer
+from finances.models import BusinessPaymentMethod
+from inventories.models import ItemVariant, SuppliedItem
+from orders.models import Order, OrderHistory, OrderItem
+from orders.serializers import OrderSyncEntrySerializer
+from orders.signals import orders_synced
+
+SYNC_CHUNK_SIZE = 100
+
+RESULT_CREATED = "created"
+RESULT_FAILED = "failed"
+RESULT_CONFLICT = "conflict"
+
+
+def _order_payload(order):
+    return {
+        "id": str(order.id),
+        "status": order.status,
+        "total_payable": str(order.total_payable),
+        "created_at": timezone.localtime(order.created_at).isoformat(),
+    }
+
+
+def _result(index, entry, status, *, order=None, errors=None, replayed=False):
+    return {
+        "index": index,
+        "id": str(entry.get("id")) if entry.get("id") else None,
+        "idempotency_key": entry.get("idempotency_key"),
+        "status": status,
+        "replayed": replayed,
+        "order": _order_payload(order) if order is not None else None,
+        "errors": errors,
+    }
+
+
+def sync_orders(raw_orders, *, business, branch, employee, user=None):
+    """
+    Create and complete every order in ``raw_orders``.
+
+    Returns one result dict per input order, in input order.  A failure on
+    one order never affects the others; an unexpected error only fails the
+    chunk it happened in.
+    """
+    results = [None] * len(raw_orders)
+    entries = []
+    seen_ids, seen_keys = set(), set()
+
+    for index, raw in enumerate(raw_orders):
+        entry_serializer = OrderSyncEntrySerializer(data=raw)
+        if not entry_serializer.is_valid():
+            results[index] = _result(
+                index,
+                raw if isinstance(raw, dict) else {},
+                RESULT_FAILED,
+                errors=entry_serializer.errors,
+            )
+            continue
+
+        entry = entry_serializer.validated_data
+        if entry["id"] in seen_ids or entry["idempotency_key"] in seen_keys:
+            results[index] = _result(
+                index,
+                entry,
+                RESULT_FAILED,
+                errors={"detail": "Duplicate id or idempotency_key in batch."},
+            )
+            continue
+        seen_ids.add(entry["id"])
+        seen_keys.add(entry["idempotency_key"])
+        entries.append((index, entry))
+
+    for start in range(0, len(entries), SYNC_CHUNK_SIZE):
+        chunk = entries[start : start + SYNC_CHUNK_SIZE]
+        try:
+            with transaction.atomic():
+                chunk_results = _sync_chunk(
+                    chunk,
+                    business=business,
+                    branch=branch,
+                    employee=employee,
+                    user=user,
+                )
+        except Exception as e:
+            chunk_results = {
+                index: _result(
+                    index, entry, RESULT_FAILED, errors={"detail": f"Sync failed: {e}"}
+                )
+                for index, entry in chunk
+            }
+        for index, result in chunk_results.items():
+            results[index] = result
+
+    return results
+
+
+def _sync_chunk(chunk, *, business, branch, employee, user):
+    results = {}
+
+    # ── Replays ──────────────────────────────────────────────────────────────
+    ids = [entry["id"] for _, entry in chunk]
+    keys = [entry["idempotency_key"] for _, entry in chunk]
+    existing = list(
+        Order.objects.filter(
+            Q(pk__in=ids) | Q(business=business, idempotency_key__in=keys)
+        )
+    )
+    existing_by_id = {order.pk: order for order in existing}
+    existing_by_key = {
+        order.idempotency_key: order
+        for order in existing
+        if order.business_id == business.pk and order.idempotency_key
+    }
+
+    pending = []
+    for index, entry in chunk:
+        by_id = existing_by_id.get(entry["id"])
+        by_key = existing_by_key.get(entry["idempotency_key"])
+        if by_id is None and by_key is None:
+            pending.append((index, entry))
+        elif by_id is not None and by_id is by_key:
+            results[index] = _result(
+                index, entry, RESULT_CREATED, order=by_id, replayed=True
+            )
+        else:
+            results[index] = _result(
+                index,
+                entry,
+                RESULT_CONFLICT,
+                errors={
+                    "detail": "Order id and idempotency_key do not match a previously synced order."
+                },
+            )
+
+    if not pending:
+        return results
+
+    # ── Set-based lookups and row locks ──────────────────────────────────────
+    variant_ids, supplied_ids, fifo_variant_ids = set(), set(), set()
+    pm_ids, customer_ids, transaction_ids = set(), set(), set()
+    for _, entry in pending:
+        for line in entry["item_variants"]:
+            variant_ids.add(line["variant"])
+            if line.get("supplied_item"):
+                supplied_ids.add(line["supplied_item"])
+            else:
+                fifo_variant_ids.add(line["variant"])
+        if entry.get("payment_method"):
+            pm_ids.add(entry["payment_method"])
+        if entry.get("customer"):
+            customer_ids.add(entry["customer"])
+        if entry.get("transaction_id"):
+            transaction_ids.add(entry["transaction_id"])
+
+    variants = {
+        v.pk: v
+        for v in ItemVariant.objects.select_for_update()
+        .filter(pk__in=variant_ids, item__branch=branch)
+        .order_by("pk")
+    }
+    direct_batches = (
+        {
+            s.pk: s
+            for s in SuppliedItem.objects.select_for_update()
+            .filter(pk__in=supplied_ids, variant_id__in=variants.keys())
+            .order_by("pk")
+        }
+        if supplied_ids
+        else {}
+    )
+    fifo_batches = defaultdict(list)
+    if fifo_variant_ids:
+        for batch in (
+            SuppliedItem.objects.select_for_update()
+            .filter(variant_id__in=fifo_variant_ids, quantity__gt=0)
+            .order_by("variant_id", "created_at")
+        ):
+            fifo_batches[batch.variant_id].append(batch)
+
+    payment_methods = (
+        {
+            pm.pk: pm
+            for pm in BusinessPaymentMethod.objects.filter(
+                pk__in=pm_ids, business=business
+            )
+        }
+        if pm_ids
+        else {}
+    )
+    customers = (
+        set(
+            Customer.objects.filter(pk__in=customer_ids, business=business).values_list(
+                "pk", flat=True
+            )
+        )
+        if customer_ids
+        else set()
+    )
+    taken_transaction_ids = (
+        set(
+            Order.objects.filter(
+                payment_method_id__in=pm_ids, transaction_id__in=transaction_ids
+            ).values_list("payment_method_id", "transaction_id")
+        )
+        if pm_ids and transaction_ids
+        else set()
+    )
+
+    # ── Validate and reserve stock in memory, order by order ────────────────
+    now = timezone.now()
+    orders, order_items, touched_variants, touched_batches = [], [], {}, {}
+
+    for index, entry in pending:
+        errors = []
+        lines = entry["item_variants"]
+
+        for line in lines:
+            if line["variant"] not in variants:
+                errors.append(f"Variant {line['variant']} is not in the branch.")
+            elif line.get("supplied_item"):
+                batch = direct_batches.get(line["supplied_item"])
+                if batch is None or batch.variant_id != line["variant"]:
+                    errors.append(
+                        f"Supplied item {line['supplied_item']} does not belong to variant {line['variant']}."
+                    )
+
+        pm_id = entry.get("payment_method")
+        if pm_id and pm_id not in payment_methods:
+            errors.append("Invalid payment method.")
+        if entry.get("customer") and entry["customer"] not in customers:
+            errors.append("Invalid customer.")
+        tx_id = entry.get("transaction_id") or None
+        if tx_id and pm_id and (pm_id, tx_id) in taken_transaction_ids:
+            errors.append("transaction_id is already used for this payment method.")
+
+        if not errors:
+            demand = defaultdict(int)
+            for line in lines:
+                demand[line["variant"]] += line["quantity"]
+            insufficient = [
+                f"'{variants[vid].name}': need {qty}, have {variants[vid].quantity}"
+                for vid, qty in demand.items()
+                if variants[vid].quantity < qty
+            ]
+            if insufficient:
+                errors.append("Insufficient stock for: " + "; ".join(insufficient))
+
+        if errors:
+            results[index] = _result(
+                index, entry, RESULT_FAILED, errors={"detail": errors}
+            )
+            continue
+
+        order = Order(
+            id=entry["id"],
+            idempotency_key=entry["idempotency_key"],
+            status=Order.StatusChoices.COMPLETED,
+            customer_id=entry.get("customer"),
+            employee=employee,
+            payment_method=payment_methods.get(pm_id),
+            business=business,
+            branch=branch,
+            transaction_id=tx_id,
+            additional_info=entry.get("additional_info") or {},
+            created_at=entry.get("created_at") or now,
+        )
+        total_payable = Decimal("0")
+
+        for line in lines:
+            variant = variants[line["variant"]]
+            batch = direct_batches.get(line.get("supplied_item"))
+            price = line.get("price")
+            if not price and batch is not None:
+                price = batch.selling_price
+            total_payable += (price or Decimal("0")) * line["quantity"]
+            order_items.append(
+                OrderItem(
+                    order=order,
+                    variant=variant,
+                    supplied_item=batch,
+                    quantity=line["quantity"],
+                    price=price,
+                )
+            )
+
+            variant.quantity -= line["quantity"]
+            variant.updated_at = now
+            touched_variants[variant.pk] = variant
+            if batch is not None:
+                batch.quantity = max(0, batch.quantity - line["quantity"])
+                batch.updated_at = now
+                touched_batches[batch.pk] = batch
+            else:
+                remaining = line["quantity"]
+                for fifo_batch in fifo_batches.get(variant.pk, []):
+                    if remaining <= 0:
+                        break
+                    deduct = min(fifo_batch.quantity, remaining)
+                    if not deduct:
+                        continue
+                    fifo_batch.quantity -= deduct
+                    fifo_batch.updated_at = now
+                    touched_batches[fifo_batch.pk] = fifo_batch
+                    remaining -= deduct
+
+        order.total_payable = total_payable.quantize(Decimal("0.01"))
+        orders.append(order)
+        if pm_id and tx_id:
+            taken_transaction_ids.add((pm_id, tx_id))
+        results[index] = _result(index, entry, RESULT_CREATED, order=order)
+
+    if not orders:
+        return results
+
+    # ── Bulk writes ─────────────────────────────────────────────────────────
+    Order.objects.bulk_create(orders)
+    OrderItem.objects.bulk_create(order_items)
+    ItemVariant.objects.bulk_update(
+        touched_variants.values(), ["quantity", "updated_at"]
+    )
+    if touched_batches:
+        SuppliedItem.objects.bulk_update(
+            touched_batches.values(), ["quantity", "updated_at"]
+        )
+    OrderHistory.objects.bulk_create(
+        [
+            OrderHistory(
+                order=order,
+                field_name="created",
+                old_value=None,
+                new_value="Order created (offline sync)",
+                changed_by=user,
+                changed_by_employee=employee,
+            )
+            for order in orders
+        ]
+    )
+
+    orders_synced.send(sender=Order, orders=orders, order_items=order_items)
+    return results
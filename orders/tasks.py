@@ -1,54 +1,159 @@
 import logging
 
 from celery import shared_task
+from django.core.cache import cache
+from django.db import transaction
 
 from core.celery.queues import CeleryQueue
+from core.outbox import register_handler
+from orders.rollups import SALES_ROLLUP_OUTBOX_TOPIC, refresh_sales_rollup
+from orders.search import SEARCH_OUTBOX_TOPIC, refresh_order_search
 
 logger = logging.getLogger(__name__)
 
+# Set while a render for the order is queued but not yet started; repeat
+# requests in that window are folded into the queued task.
+RECEIPT_QUEUED_KEY = "orders:receipt:queued:{}"
+RECEIPT_QUEUED_TTL = 60
+# Held while a worker renders the order so two workers never render it at once.
+RECEIPT_RENDER_LOCK_KEY = "orders:receipt:rendering:{}"
+RECEIPT_RENDER_LOCK_TTL = 120
+RECEIPT_LOCK_RETRY_DELAY = 5
 
-@shared_task(queue=CeleryQueue.Definitions.FILE_PROCESSING)
-def generate_order_receipt_task(order_id):
-    from django.core.files.base import ContentFile
-
-    from orders.models import Order
-    from orders.receipt import generate_order_receipt
 
+def _cache_add(key, timeout):
+    """``cache.add`` that treats an unreachable cache as "not held"."""
     try:
-        order = (
-            Order.objects.select_related(
-                "business__address",
-                "branch",
-                "customer",
-                "employee__user",
-                "payment_method__payment",
-            )
-            .prefetch_related("items__variant__item")
-            .get(pk=order_id)
-        )
-    except Order.DoesNotExist:
-        logger.warning("generate_order_receipt_task: order %s not found", order_id)
-        return
+        return cache.add(key, 1, timeout)
+    except Exception:
+        logger.warning("receipt: cache unavailable, not coalescing %s", key)
+        return True
+
 
+def _cache_delete(key):
     try:
-        pdf_bytes = generate_order_receipt(order)
+        cache.delete(key)
     except Exception:
-        logger.exception(
-            "generate_order_receipt_task: PDF generation failed for order %s", order_id
-        )
+        pass
+
+
+def queue_order_receipt(order_id):
+    """
+    Queue a receipt render for ``order_id`` once the current transaction
+    commits.  Requests made while a render is already queued are coalesced
+    into it; the task itself skips rendering when the printable state is
+    unchanged.
+    """
+    order_id = str(order_id)
+    transaction.on_commit(lambda: _enqueue_order_receipt(order_id))
+
+
+def _enqueue_order_receipt(order_id):
+    key = RECEIPT_QUEUED_KEY.format(order_id)
+    if not _cache_add(key, RECEIPT_QUEUED_TTL):
         return
+    try:
+        generate_order_receipt_task.delay(order_id)
+    except Exception:
+        _cache_delete(key)
+        logger.exception("queue_order_receipt: could not queue order %s", order_id)
+
+
+@shared_task(
+    bind=True,
+    queue=CeleryQueue.Definitions.FILE_PROCESSING,
+    max_retries=10,
+)
+def generate_order_receipt_task(self, order_id):
+    from django.core.files.base import ContentFile
+
+    from orders.models import Order
+    from orders.receipt import receipt_context, receipt_hash, render_receipt
 
-    filename = f"order_{order.id}.pdf"
+    # Changes made from here on must queue a fresh render.
+    _cache_delete(RECEIPT_QUEUED_KEY.format(order_id))
 
-    if order.receipt:
+    lock_key = RECEIPT_RENDER_LOCK_KEY.format(order_id)
+    if not _cache_add(lock_key, RECEIPT_RENDER_LOCK_TTL):
+        # Another worker is rendering an older state; run again after it.
         try:
-            order.receipt.delete(save=False)
+            raise self.retry(countdown=RECEIPT_LOCK_RETRY_DELAY)
+        except self.MaxRetriesExceededError:
+            logger.warning(
+                "generate_order_receipt_task: gave up waiting on order %s", order_id
+            )
+            return
+
+    try:
+        try:
+            order = (
+                Order.objects.select_related(
+                    "business__address",
+                    "branch",
+                    "customer",
+                    "employee__user",
+                    "payment_method__payment",
+                )
+                .prefetch_related("items__variant__item")
+                .get(pk=order_id)
+            )
+        except Order.DoesNotExist:
+            logger.warning("generate_order_receipt_task: order %s not found", order_id)
+            return
+
+        try:
+            context = receipt_context(order)
+            digest = receipt_hash(context)
+            if order.receipt and order.receipt_hash == digest:
+                logger.debug(
+                    "generate_order_receipt_task: receipt for order %s is current",
+                    order_id,
+                )
+                return
+            pdf_bytes = render_receipt(context)
         except Exception:
-            pass
-
-    # Save ONLY the receipt field. A full save (save=True) would write the
-    # entire in-memory row — including a stale `status` loaded before a
-    # concurrent checkout committed — clobbering COMPLETED back to PROCESSING.
-    order.receipt.save(filename, ContentFile(pdf_bytes), save=False)
-    order.save(update_fields=["receipt", "updated_at"])
-    logger.info("generate_order_receipt_task: receipt saved for order %s", order_id)
+            logger.exception(
+                "generate_order_receipt_task: PDF generation failed for order %s",
+                order_id,
+            )
+            return
+
+        filename = f"order_{order.id}.pdf"
+
+        if order.receipt:
+            try:
+                order.receipt.delete(save=False)
+            except Exception:
+                pass
+
+        # Save ONLY the receipt fields. A full save (save=True) would write the
+        # entire in-memory row — including a stale `status` loaded before a
+        # concurrent checkout committed — clobbering COMPLETED back to PROCESSING.
+        order.receipt.save(filename, ContentFile(pdf_bytes), save=False)
+        order.receipt_hash = digest
+        order.save(update_fields=["receipt", "receipt_hash", "updated_at"])
+        logger.info("generate_order_receipt_task: receipt saved for order %s", order_id)
+    finally:
+        _cache_delete(lock_key)
+
+
+@shared_task(queue=CeleryQueue.Definitions.ANALYTICS_PROCESSING)
+def refresh_sales_rollup_task(branch_id, dates, variant_ids=None):
+    """Outbox handler: re-derive DailySalesRollup cells touched by a change."""
+    return refresh_sales_rollup(branch_id, dates, variant_ids)
+
+
+register_handler(SALES_ROLLUP_OUTBOX_TOPIC, refresh_sales_rollup_task)
+
+
+@shared_task(queue=CeleryQueue.Definitions.ANALYTICS_PROCESSING)
+def refresh_customer_order_search_task(customer_id):
+    """Outbox handler: re-index the orders of a customer whose details changed."""
+    from orders.models import Order
+
+    refresh_order_search(
+        Order.objects.filter(customer_id=customer_id).values_list("pk", flat=True)
+    )
+
+
+register_handler(SEARCH_OUTBOX_TOPIC, refresh_customer_order_search_task)
@@ -1,3 +1,645 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+from uuid import uuid4
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from business.models import Branch, Business
+from core.models import OutboxEvent
+from crms.models import Customer
+from finances.models import Transaction
+from inventories.models import Item, ItemVariant, SuppliedItem, Supply
+from orders import receipt
+from orders.distribution import DAY, MAX_BUCKETS, MONTH, WEEK, plan_buckets
+from orders.models import (
+    DailySalesRollup,
+    Order,
+    OrderItem,
+    OrderReturn,
+    OrderReturnItem,
+)
+from orders.returns import process_return
+from orders.rollups import SALES_ROLLUP_OUTBOX_TOPIC, refresh_sales_rollup
+from orders.search import SEARCH_OUTBOX_TOPIC, search_orders
+from orders.stats_cache import HOME_STATS_LOCK_KEY, home_stats_key
+from orders.tasks import (
+    generate_order_receipt_task,
+    refresh_customer_order_search_task,
+    refresh_sales_rollup_task,
+)
+from orders.views import HomeStatsViewSet
+
+User = get_user_model()
+
+
+class OrderTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="cashier@example.com", password="password123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.business = Business.objects.create(name="Test Business", owner=self.user)
+        self.branch = Branch.objects.get(business=self.business)
+        self.item = Item.objects.create(
+            name="Soap",
+            inventory_unit="pcs",
+            business=self.business,
+            branch=self.branch,
+        )
+        self.variant = ItemVariant.objects.create(
+            item=self.item, name="Soap", quantity=0, sku="SOAP-1"
+        )
+        self.supply = Supply.objects.create(
+            label="Supply", branch=self.branch, business=self.business
+        )
+        self.supplied_item = SuppliedItem.objects.create(
+            quantity=10,
+            item=self.item,
+            purchase_price=5,
+            selling_price=8,
+            business=self.business,
+            supply=self.supply,
+            variant=self.variant,
+        )
+        self.variant.refresh_from_db()
+
+
+class OrderSyncTest(OrderTestMixin, APITestCase):
+    def _entry(self, quantity, **extra):
+        return {
+            "id": str(uuid4()),
+            "idempotency_key": str(uuid4()),
+            "item_variants": [
+                {
+                    "variant": str(self.variant.id),
+                    "supplied_item": str(self.supplied_item.id),
+                    "quantity": quantity,
+                }
+            ],
+            **extra,
+        }
+
+    def _sync(self, orders):
+        url = reverse("order-sync") + f"?branch_id={self.branch.id}"
+        return self.client.post(url, {"orders": orders}, format="json")
+
+    def test_sync_creates_completed_orders(self):
+        orders = [self._entry(2), self._entry(3)]
+        response = self._sync(orders)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual([r["status"] for r in results], ["created", "created"])
+        self.assertEqual(results[0]["order"]["total_payable"], "16.00")
+
+        self.variant.refresh_from_db()
+        self.supplied_item.refresh_from_db()
+        self.assertEqual(self.variant.quantity, 5)
+        self.assertEqual(self.supplied_item.quantity, 5)
+        self.assertEqual(
+            Order.objects.filter(status=Order.StatusChoices.COMPLETED).count(), 2
+        )
+        self.assertEqual(
+            Transaction.objects.filter(type=Transaction.TransactionType.SALE).count(),
+            2,
+        )
+
+    def test_replayed_batch_returns_same_results_without_selling_twice(self):
+        orders = [self._entry(2), self._entry(3)]
+        first = self._sync(orders).data["results"]
+        second = self._sync(orders).data["results"]
+
+        self.assertTrue(all(r["replayed"] for r in second))
+        self.assertEqual([r["order"] for r in first], [r["order"] for r in second])
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.quantity, 5)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_failed_order_does_not_block_the_rest(self):
+        reused = self._entry(1)
+        orders = [
+            self._entry(4),
+            self._entry(20),
+            {**self._entry(1), "idempotency_key": reused["idempotency_key"]},
+            reused,
+            {"id": "not-a-uuid"},
+        ]
+        results = self._sync(orders).data["results"]
+
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["created", "failed", "created", "failed", "failed"],
+        )
+        self.assertIn("Insufficient stock", results[1]["errors"]["detail"][0])
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.quantity, 5)
+
+    def test_reused_idempotency_key_with_another_id_conflicts(self):
+        entry = self._entry(1)
+        self._sync([entry])
+        results = self._sync([{**entry, "id": str(uuid4())}]).data["results"]
+
+        self.assertEqual(results[0]["status"], "conflict")
+        self.assertEqual(Order.objects.count(), 1)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    STORAGES={
+        "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": tempfile.mkdtemp()},
+        },
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class OrderReceiptTaskTest(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = Order.objects.create(
+            business=self.business, branch=self.branch, total_payable=16
+        )
+        OrderItem.objects.create(
+            order=self.order, variant=self.variant, quantity=2, price=8
+        )
+
+    def test_unchanged_order_is_not_rendered_again(self):
+        with mock.patch(
+            "orders.receipt.render_receipt", wraps=receipt.render_receipt
+        ) as render:
+            generate_order_receipt_task(str(self.order.id))
+            generate_order_receipt_task(str(self.order.id))
+
+        self.assertEqual(render.call_count, 1)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.receipt)
+        self.assertEqual(len(self.order.receipt_hash), 64)
+
+    def test_printable_change_renders_again(self):
+        generate_order_receipt_task(str(self.order.id))
+        self.order.refresh_from_db()
+        first_hash = self.order.receipt_hash
+
+        Order.objects.filter(pk=self.order.pk).update(
+            status=Order.StatusChoices.COMPLETED
+        )
+        with mock.patch(
+            "orders.receipt.render_receipt", wraps=receipt.render_receipt
+        ) as render:
+            generate_order_receipt_task(str(self.order.id))
+
+        self.assertEqual(render.call_count, 1)
+        self.order.refresh_from_db()
+        self.assertNotEqual(self.order.receipt_hash, first_hash)
+
+
+class OrderHistoryTest(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        created = Order.objects.create(business=self.business, branch=self.branch)
+        self.order = Order.objects.get(pk=created.pk)
+
+    def test_status_change_diffs_loaded_snapshot_without_extra_select(self):
+        self.order.status = Order.StatusChoices.COMPLETED
+        # UPDATE order + one bulk INSERT of history rows + the sales rollup
+        # outbox event; no pre-save SELECT.
+        with self.assertNumQueries(3):
+            self.order.save(update_fields=["status", "updated_at"])
+
+        history = self.order.history.exclude(field_name="created")
+        self.assertEqual(
+            list(history.values_list("field_name", "old_value", "new_value")),
+            [("status", "PROCESSING", "COMPLETED")],
+        )
+
+    def test_receipt_only_save_writes_no_history(self):
+        self.order.receipt_hash = "0" * 64
+        with self.assertNumQueries(1):
+            self.order.save(update_fields=["receipt", "receipt_hash", "updated_at"])
+
+        self.assertFalse(self.order.history.exclude(field_name="created").exists())
+
+
+class DailySalesRollupTest(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        created = Order.objects.create(
+            business=self.business,
+            branch=self.branch,
+            total_payable=16,
+            status=Order.StatusChoices.COMPLETED,
+        )
+        self.order_item = OrderItem.objects.create(
+            order=created, variant=self.variant, quantity=2, price=8
+        )
+        self.order = Order.objects.get(pk=created.pk)
+        self.today = timezone.localdate()
+
+    def _refresh(self):
+        refresh_sales_rollup(self.branch.id, [self.today], [self.variant.id])
+
+    def test_refresh_derives_cell_from_orders_and_returns(self):
+        order_return = OrderReturn.objects.create(
+            order=self.order, total_refund_amount=8
+        )
+        OrderReturnItem.objects.create(
+            order_return=order_return,
+            order_item=self.order_item,
+            quantity_returned=1,
+            refund_amount=8,
+        )
+        self._refresh()
+
+        cell = DailySalesRollup.objects.get(
+            branch=self.branch, date=self.today, variant=self.variant
+        )
+        self.assertEqual(cell.business_id, self.business.id)
+        self.assertEqual(cell.quantity, 2)
+        self.assertEqual(cell.revenue, 16)
+        self.assertEqual(cell.order_count, 1)
+        self.assertEqual(cell.returned_quantity, 1)
+        self.assertEqual(cell.returned_amount, 8)
+
+    def test_leaving_completed_publishes_refresh_that_drops_the_cell(self):
+        self._refresh()
+        self.order.status = Order.StatusChoices.RETURNED
+        self.order.save(update_fields=["status", "updated_at"])
+
+        event = OutboxEvent.objects.get(topic=SALES_ROLLUP_OUTBOX_TOPIC)
+        self.assertEqual(event.payload["dates"], [self.today.isoformat()])
+        # Only the order's own cells are re-derived, not the whole branch-day.
+        self.assertEqual(event.payload["variant_ids"], [str(self.variant.id)])
+
+        refresh_sales_rollup(**event.payload)
+        self.assertFalse(DailySalesRollup.objects.exists())
+
+    def test_best_sellers_reads_rebuilt_rollup(self):
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+        OrderItem.objects.filter(pk=self.order_item.pk).update(quantity=5)
+
+        url = reverse("order-best-sellers") + f"?branch_id={self.branch.id}"
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        best = response.data["results"][0]
+        self.assertEqual(best["variant_id"], str(self.variant.id))
+        # Served from the rollup, not the raw items updated behind its back.
+        self.assertEqual(best["total_quantity_sold"], 2)
+        self.assertEqual(best["total_revenue"], 16.0)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class HomeStatsCacheTest(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse("home-stats-stats") + f"?branch_id={self.branch.id}"
+        patcher = mock.patch.object(
+            HomeStatsViewSet,
+            "_get_summary",
+            autospec=True,
+            side_effect=HomeStatsViewSet._get_summary,
+        )
+        self.summary = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("core.tasks.dispatch_outbox_task.delay")
+    @mock.patch("orders.tasks.generate_order_receipt_task.delay")
+    def _complete_order(self, total, *mocks):
+        # Run the commit hooks (version bumps) without reaching a broker.
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(business=self.business, branch=self.branch)
+            order = Order.objects.get(pk=order.pk)
+            order.status = Order.StatusChoices.COMPLETED
+            order.total_payable = total
+            order.save(update_fields=["status", "total_payable", "updated_at"])
+
+    def _total_sales(self, response):
+        return response.data["summary"]["total_sales"]["value"]
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(self.summary.call_count, 1)
+
+    def test_completed_order_invalidates_branch_stats(self):
+        self.assertEqual(self._total_sales(self.client.get(self.url)), 0)
+
+        self._complete_order(16)
+
+        self.assertEqual(self._total_sales(self.client.get(self.url)), 16)
+        self.assertEqual(self.summary.call_count, 2)
+
+    @mock.patch("core.tasks.dispatch_outbox_task.delay")
+    @mock.patch("orders.tasks.generate_order_receipt_task.delay")
+    def test_rollup_refresh_invalidates_stats_cached_before_it(self, *mocks):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(business=self.business, branch=self.branch)
+            OrderItem.objects.create(
+                order=order, variant=self.variant, quantity=2, price=8
+            )
+            order = Order.objects.get(pk=order.pk)
+            order.status = Order.StatusChoices.COMPLETED
+            order.save(update_fields=["status", "updated_at"])
+        # Cached before the outbox refreshed the rollup.
+        distribution = self.client.get(self.url).data["sales_distribution"]
+        self.assertEqual(sum(p["value"] for p in distribution["data"]), 0)
+
+        event = OutboxEvent.objects.get(topic=SALES_ROLLUP_OUTBOX_TOPIC)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_sales_rollup_task(**event.payload)
+
+        distribution = self.client.get(self.url).data["sales_distribution"]
+        self.assertEqual(sum(p["value"] for p in distribution["data"]), 16.0)
+        self.assertEqual(self.summary.call_count, 2)
+
+    def test_stale_entry_is_served_while_another_request_recomputes(self):
+        self.client.get(self.url)
+        self._complete_order(16)
+        key = home_stats_key(
+            self.business.id,
+            self.branch.id,
+            "this_week",
+            "today",
+            None,
+            None,
+            "full",
+        )
+        cache.add(HOME_STATS_LOCK_KEY.format(key), 1)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(self._total_sales(response), 0)
+        self.assertEqual(self.summary.call_count, 1)
+
+        cache.delete(HOME_STATS_LOCK_KEY.format(key))
+        self.assertEqual(self._total_sales(self.client.get(self.url)), 16)
+
+
+class PlanBucketsTest(SimpleTestCase):
+    def test_granularity_follows_range_length(self):
+        first = date(2026, 1, 1)
+
+        days = plan_buckets(first, date(2026, 1, 31))
+        weeks = plan_buckets(first, date(2026, 9, 30))
+
+        self.assertEqual((days.granularity, len(days.starts)), (DAY, 31))
+        self.assertEqual(weeks.granularity, WEEK)
+        self.assertEqual(weeks.starts[1], date(2026, 1, 8))
+
+    def test_multi_year_range_is_downsampled_under_cap(self):
+        plan = plan_buckets(date(2016, 3, 15), date(2026, 2, 1))
+
+        self.assertEqual(plan.granularity, MONTH)
+        self.assertEqual(plan.step, 2)
+        self.assertLessEqual(len(plan.starts), MAX_BUCKETS)
+        self.assertEqual(plan.starts[:2], [date(2016, 3, 1), date(2016, 5, 1)])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SalesDistributionTest(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        order = Order.objects.create(
+            business=self.business,
+            branch=self.branch,
+            total_payable=16,
+            status=Order.StatusChoices.COMPLETED,
+        )
+        OrderItem.objects.create(order=order, variant=self.variant, quantity=2, price=8)
+        self.today = timezone.localdate()
+        refresh_sales_rollup(self.branch.id, [self.today], [self.variant.id])
+
+    def _distribution(self, **params):
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        url = reverse("home-stats-stats") + f"?branch_id={self.branch.id}&{query}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["sales_distribution"]
+
+    def test_custom_range_returns_dense_daily_series(self):
+        first = self.today - timedelta(days=9)
+        result = self._distribution(
+            **{
+                "sales-distribution-range": "custom_range",
+                "start_date": first.isoformat(),
+                "end_date": self.today.isoformat(),
+            }
+        )
+
+        self.assertEqual(result["granularity"], DAY)
+        self.assertEqual([p["value"] for p in result["data"]], [0.0] * 9 + [16.0])
+        self.assertEqual(result["data"][-1]["label"], self.today.strftime("%m/%d"))
+
+    def test_employee_fallback_sums_the_same_line_revenue_as_rollup(self):
+        # A total edited after the fact must not split the two paths apart.
+        Order.objects.update(total_payable=99)
+        owner = self._distribution(**{"sales-distribution-range": "this_week"})
+
+        cache.clear()
+        with mock.patch.object(HomeStatsViewSet, "_rollup_queryset", return_value=None):
+            employee = self._distribution(**{"sales-distribution-range": "this_week"})
+
+        self.assertEqual(employee["data"], owner["data"])
+        self.assertEqual(sum(p["value"] for p in employee["data"]), 16.0)
+
+    def test_multi_year_custom_range_is_capped(self):
+        result = self._distribution(
+            **{
+                "sales-distribution-range": "custom_range",
+                "start_date": (self.today - timedelta(days=3650)).isoformat(),
+                "end_date": self.today.isoformat(),
+            }
+        )
+
+        self.assertEqual(result["granularity"], MONTH)
+        self.assertLessEqual(len(result["data"]), MAX_BUCKETS)
+        self.assertEqual(sum(p["value"] for p in result["data"]), 16.0)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class OrderSearchTest(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = Customer.objects.create(
+            full_name="Abebe Kebede", phone_number="911223344", business=self.business
+        )
+        self.order = self._create_order()
+
+    @mock.patch("core.tasks.dispatch_outbox_task.delay")
+    @mock.patch("orders.tasks.generate_order_receipt_task.delay")
+    def _create_order(self, *mocks):
+        # Run the commit hooks that build the search columns.
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                business=self.business, branch=self.branch, customer=self.customer
+            )
+            for _ in range(2):
+                OrderItem.objects.create(
+                    order=order, variant=self.variant, quantity=1, price=8
+                )
+        return order
+
+    def _search(self, term):
+        url = reverse("order-list") + f"?branch_id={self.branch.id}&search={term}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_matches_item_customer_phone_and_partial_id(self):
+        expected = [str(self.order.id)]
+
+        self.assertEqual(self._search("soap"), expected)
+        self.assertEqual(self._search("abebe kebede"), expected)
+        self.assertEqual(self._search("91122"), expected)
+        self.assertEqual(self._search(str(self.order.id)[:8]), expected)
+        self.assertEqual(self._search("detergent"), [])
+
+    def test_search_needs_no_joins_or_distinct(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._search("soap")
+
+        order_queries = [
+            q["sql"]
+            for q in queries.captured_queries
+            if 'FROM "orders_order"' in q["sql"]
+        ]
+        self.assertTrue(order_queries)
+        for sql in order_queries:
+            self.assertNotIn("DISTINCT", sql)
+            self.assertNotIn("orders_orderitem", sql.split("WHERE")[0])
+
+    @skipUnless(connection.vendor == "postgresql", "trigram indexes are Postgres-only")
+    def test_substring_search_uses_trigram_index(self):
+        Order.objects.bulk_create(
+            Order(
+                business=self.business,
+                branch=self.branch,
+                search_text=f"{uuid4()} Customer {n} 9{n:08d} Item {n % 97}",
+            )
+            for n in range(5000)
+        )
+        queryset = search_orders(Order.objects.all(), ["kebede"])
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE orders_order")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        self.assertIn("Bitmap Index Scan on order_search_text_trgm", plan)
+        self.assertNotIn("Seq Scan on orders_order", plan)
+
+    def test_customer_change_reindexes_orders_from_outbox(self):
+        self.customer.full_name = "Almaz Tesfaye"
+        self.customer.save()
+
+        event = OutboxEvent.objects.get(topic=SEARCH_OUTBOX_TOPIC)
+        refresh_customer_order_search_task(**event.payload)
+
+        self.assertEqual(self._search("almaz"), [str(self.order.id)])
+        self.assertEqual(self._search("abebe"), [])
+
+
+class OrderReturnTest(OrderTestMixin, APITestCase):
+    def _completed_order(self, lines):
+        order = Order.objects.create(
+            business=self.business,
+            branch=self.branch,
+            total_payable=8 * 3 * lines,
+            status=Order.StatusChoices.COMPLETED,
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                variant=self.variant,
+                supplied_item=self.supplied_item,
+                quantity=3,
+                price=8,
+            )
+            for _ in range(lines)
+        )
+        return order
+
+    def _return(self, order, items):
+        url = reverse("order-return-order", args=[order.id])
+        url += f"?branch_id={self.branch.id}"
+        return self.client.post(url, {"items": items}, format="json")
+
+    def test_partial_return_restocks_and_records_one_refund(self):
+        order = self._completed_order(2)
+        first, second = order.items.all()
+
+        response = self._return(
+            order,
+            [
+                {"order_item_id": str(first.id), "quantity_returned": 1},
+                {"order_item_id": str(second.id), "quantity_returned": 2},
+            ],
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.variant.refresh_from_db()
+        self.supplied_item.refresh_from_db()
+        self.assertEqual(self.variant.quantity, 13)
+        self.assertEqual(self.supplied_item.quantity, 13)
+        refund = Transaction.objects.get(
+            order=order, type=Transaction.TransactionType.REFUND
+        )
+        self.assertEqual(refund.total_paid_amount, -24)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.StatusChoices.COMPLETED)
+
+    def test_lines_for_the_same_item_are_validated_together(self):
+        order = self._completed_order(1)
+        order_item = order.items.get()
+
+        response = self._return(
+            order,
+            [
+                {"order_item_id": str(order_item.id), "quantity_returned": 2},
+                {"order_item_id": str(order_item.id), "quantity_returned": 2},
+            ],
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("only 3 eligible", response.data["errors"][0])
+        self.assertFalse(OrderReturn.objects.exists())
+
+    def _count_return_queries(self, lines):
+        order = self._completed_order(lines)
+        items = [
+            {"order_item_id": order_item.id, "quantity_returned": 3}
+            for order_item in order.items.all()
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            process_return(order, items, user=self.user)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.StatusChoices.RETURNED)
+        return len(queries.captured_queries)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        self.assertEqual(self._count_return_queries(5), self._count_return_queries(50))
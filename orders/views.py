@@ -2,8 +2,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 from django.db import transaction as db_transaction
-from django.db.models import Count, F, Q, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db.models import Count, F, Q, Sum
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
@@ -11,14 +10,13 @@ from drf_spectacular.utils import (
     OpenApiTypes,
     extend_schema,
 )
-from rest_framework import filters, status
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
-import inventories.models as inventories_models
 from business.models import Branch, Business, Employee, biz_perm
 from business.permissions import (
     BranchLevelPermission,
@@ -29,16 +27,27 @@ from core.idempotency import idempotent
 from core.utils import is_valid_uuid
 from finances.models import BusinessPaymentMethod, Transaction
 from inventories.models import Item, ItemVariant, SuppliedItem
-from orders.filters import OrderFilter
-from orders.models import Order, OrderItem, OrderReturn, OrderReturnItem
+from orders.distribution import DAY, MONTH, bucket_totals, plan_buckets
+from orders.filters import OrderFilter, OrderSearchFilter
+from orders.models import (
+    DailySalesRollup,
+    Order,
+    OrderItem,
+    OrderReturn,
+)
+from orders.returns import process_return
+from orders.rollups import line_revenue, local_date
 from orders.serializers import (
     OrderItemSerializer,
     OrderListSerializer,
     OrderReturnCreateSerializer,
     OrderReturnReadSerializer,
     OrderSerializer,
+    OrderSyncSerializer,
 )
 from orders.signals import order_completed
+from orders.stats_cache import cached_home_stats, home_stats_key
+from orders.sync import sync_orders
 
 
 def decrement_order_inventory(order):
@@ -172,18 +181,8 @@ class OrderViewset(ModelViewSet):
     serializer_class = OrderSerializer
     http_method_names = ["get", "post", "patch"]
     permission_classes = [IsAuthenticated, BranchLevelPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, OrderSearchFilter]
     filterset_class = OrderFilter
-    search_fields = [
-        "customer__full_name",
-        "customer__phone_number",
-        "customer__email",
-        "employee__user__email",
-        "employee__user__first_name",
-        "employee__user__last_name",
-        "items__variant__item__name",
-        "id",
-    ]
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -210,11 +209,9 @@ class OrderViewset(ModelViewSet):
             )
             .prefetch_related("items__variant__item", "items__supplied_item")
             .order_by("-created_at")
-            # `items__variant__item__name` in search_fields joins through the
-            # reverse `items` FK; DRF's SearchFilter only auto-dedupes m2m
-            # joins, not one-to-many ones, so an order with several items
-            # would otherwise come back once per matching item.
-            .distinct()
+            # The search columns are only read by the filter; keep them out
+            # of every list row.
+            .defer("search_text", "search_document")
         )
 
     def get_serializer_class(self):
@@ -288,12 +285,12 @@ class OrderViewset(ModelViewSet):
 
     @action(detail=True, methods=["get"], url_path="receipt")
     def receipt(self, request, *args, **kwargs):
-        from orders.tasks import generate_order_receipt_task
+        from orders.tasks import queue_order_receipt
 
         order = self.get_object()
 
         if not order.receipt:
-            generate_order_receipt_task.delay(str(order.id))
+            queue_order_receipt(order.id)
             return Response(
                 {"detail": "Receipt is being generated. Please try again in a moment."},
                 status=status.HTTP_202_ACCEPTED,
@@ -303,7 +300,7 @@ class OrderViewset(ModelViewSet):
             url = order.receipt.url
         except Exception:
             Order.objects.filter(pk=order.pk).update(receipt="")
-            generate_order_receipt_task.delay(str(order.id))
+            queue_order_receipt(order.id)
             return Response(
                 {
                     "detail": "Receipt is being regenerated. Please try again in a moment."
@@ -355,6 +352,38 @@ class OrderViewset(ModelViewSet):
 
         return Response(OrderListSerializer(order).data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        request=OrderSyncSerializer,
+        description=(
+            "Push sales queued by an offline POS in one request. Every order "
+            "needs a client-generated `id` and an `idempotency_key`; it is "
+            "created, its stock decremented and it is marked COMPLETED. "
+            "The response carries one result per input order, in order. "
+            "Replaying a batch returns the already-synced orders with "
+            "`replayed: true` and touches no stock."
+        ),
+    )
+    @action(detail=False, methods=["post"], url_path="sync")
+    @idempotent
+    def sync(self, request, *args, **kwargs):
+        serializer = OrderSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if not request.business or not request.branch:
+            raise ValidationError({"detail": "Business and branch are required"})
+
+        employee = Employee.objects.filter(
+            user=request.user, business=request.business
+        ).first()
+        results = sync_orders(
+            serializer.validated_data["orders"],
+            business=request.business,
+            branch=request.branch,
+            employee=employee,
+            user=request.user,
+        )
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["post"], url_path="return")
     @idempotent
     def return_order(self, request, *args, **kwargs):
@@ -371,7 +400,7 @@ class OrderViewset(ModelViewSet):
             "refund_method": "<BusinessPaymentMethod UUID>"   // optional
         }
 
-        Side effects (all inside one atomic transaction):
+        Side effects (all inside one atomic transaction, see orders.returns):
         - OrderReturn + OrderReturnItem records are created.
         - ItemVariant.quantity incremented for every returnable item.
         - A REFUND Transaction is recorded against the order.
@@ -389,20 +418,6 @@ class OrderViewset(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
-        order_items_map = {
-            str(oi.id): oi for oi in order.items.select_related("variant__item").all()
-        }
-
-        # Batch-fetch already-returned quantities for every order item in one query.
-        already_returned_map = {
-            str(r["order_item_id"]): r["total"]
-            for r in OrderReturnItem.objects.filter(
-                order_item_id__in=order_items_map.keys()
-            )
-            .values("order_item_id")
-            .annotate(total=Sum("quantity_returned"))
-        }
-
         # Resolve refund method
         refund_method = order.payment_method
         if data["refund_method"]:
@@ -419,144 +434,22 @@ class OrderViewset(ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        # Validate every requested return line before touching the DB
-        errors = []
-        validated_lines = []
-        for line in data["items"]:
-            oi_id = str(line["order_item_id"])
-            qty = line["quantity_returned"]
-
-            if oi_id not in order_items_map:
-                errors.append(f"order_item {oi_id} does not belong to this order.")
-                continue
-
-            order_item = order_items_map[oi_id]
-            already_returned = already_returned_map.get(oi_id, 0) or 0
-            available = order_item.quantity - already_returned
-            if qty > available:
-                errors.append(
-                    f"'{order_item.variant.name}': requested {qty}, "
-                    f"but only {available} eligible for return."
-                )
-                continue
-
-            validated_lines.append(
-                {
-                    "order_item": order_item,
-                    "quantity_returned": qty,
-                    "is_returnable": order_item.variant.item.is_returnable,
-                }
-            )
-
-        if errors:
-            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Determine full vs partial (already_returned_map covers all order items)
-        total_ordered = sum(oi.quantity for oi in order_items_map.values())
-        total_already_returned = sum(already_returned_map.values())
-        total_now_returning = sum(l["quantity_returned"] for l in validated_lines)
-        return_status = (
-            OrderReturn.StatusChoices.FULL
-            if (total_already_returned + total_now_returning) >= total_ordered
-            else OrderReturn.StatusChoices.PARTIAL
-        )
-
         # Resolve the employee making the return
         employee = Employee.objects.filter(
             user=request.user, business=order.business
         ).first()
 
         try:
-            with db_transaction.atomic():
-                # Lock all variants and supplied items being restocked
-                all_variant_ids = [l["order_item"].variant_id for l in validated_lines]
-                all_supplied_item_ids = [
-                    l["order_item"].supplied_item_id
-                    for l in validated_lines
-                    if l["order_item"].supplied_item_id
-                ]
-                locked_variants = {
-                    v.pk: v
-                    for v in inventories_models.ItemVariant.objects.select_for_update().filter(
-                        pk__in=all_variant_ids
-                    )
-                }
-                locked_supplied_items = {
-                    s.pk: s
-                    for s in inventories_models.SuppliedItem.objects.select_for_update().filter(
-                        pk__in=all_supplied_item_ids
-                    )
-                }
-
-                total_refund = Decimal("0")
-                return_item_payloads = []
-
-                for line in validated_lines:
-                    order_item = line["order_item"]
-                    qty = line["quantity_returned"]
-                    line_refund = (order_item.price or Decimal("0")) * qty
-                    total_refund += line_refund
-
-                    variant = locked_variants[order_item.variant_id]
-                    variant.quantity += qty
-                    variant.save(update_fields=["quantity", "updated_at"])
-
-                    if (
-                        order_item.supplied_item_id
-                        and order_item.supplied_item_id in locked_supplied_items
-                    ):
-                        supplied_item = locked_supplied_items[
-                            order_item.supplied_item_id
-                        ]
-                        supplied_item.quantity += qty
-                        supplied_item.save(update_fields=["quantity", "updated_at"])
-
-                    return_item_payloads.append(
-                        {
-                            "order_item": order_item,
-                            "quantity_returned": qty,
-                            "is_restocked": True,
-                            "refund_amount": line_refund,
-                        }
-                    )
-
-                order_return = OrderReturn.objects.create(
-                    order=order,
-                    reason=data.get("reason", ""),
-                    refund_method=refund_method,
-                    total_refund_amount=total_refund,
-                    status=return_status,
-                    processed_by=employee,
-                )
-
-                OrderReturnItem.objects.bulk_create(
-                    [
-                        OrderReturnItem(
-                            order_return=order_return,
-                            **payload,
-                        )
-                        for payload in return_item_payloads
-                    ]
-                )
-
-                # Record a REFUND transaction. Refunds are money paid back to
-                # the customer, so the amount is stored negative — it reduces
-                # account balances/assets and net profit in the finance reports.
-                Transaction.objects.create(
-                    order=order,
-                    branch=order.branch,
-                    business=order.business,
-                    payment_method=refund_method,
-                    type=Transaction.TransactionType.REFUND,
-                    total_paid_amount=-total_refund,
-                    created_by=request.user,
-                )
-
-                # Update order status only on a full return
-                if return_status == OrderReturn.StatusChoices.FULL:
-                    order.status = Order.StatusChoices.RETURNED
-                    order.save(update_fields=["status", "updated_at"])
-
+            order_return = process_return(
+                order,
+                data["items"],
+                reason=data.get("reason", ""),
+                refund_method=refund_method,
+                processed_by=employee,
+                user=request.user,
+            )
+        except ValidationError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as exc:
             return Response(
                 {"error": str(exc)},
@@ -678,20 +571,24 @@ class OrderViewset(ModelViewSet):
         except ValidationError as e:
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get base queryset filtered by business/branch
-        queryset = self.get_queryset()
+        if not self.request.business:
+            raise ValidationError({"detail": "Empty or invalid business"})
 
-        # Filter completed orders within date range
-        completed_orders = queryset.filter(
-            status=Order.StatusChoices.COMPLETED,
-            created_at__gte=start_date,
-            created_at__lte=end_date,
-        )
+        # Read the pre-aggregated daily rollup for the branch rather than
+        # re-aggregating every order item in the range.
+        if self.request.user.has_perm(
+            biz_perm("order", "view", "branch"),
+            self.request.branch,
+        ):
+            rollup = DailySalesRollup.objects.filter(branch=self.request.branch)
+        else:
+            rollup = DailySalesRollup.objects.none()
 
-        # Aggregate order items by variant and calculate metrics
         best_sellers = (
-            OrderItem.objects.filter(order__in=completed_orders)
-            .select_related("variant", "variant__item")
+            rollup.filter(
+                date__gte=local_date(start_date),
+                date__lte=local_date(end_date),
+            )
             .values(
                 "variant__item__id",
                 "variant__item__name",
@@ -700,9 +597,7 @@ class OrderViewset(ModelViewSet):
             )
             .annotate(
                 total_quantity_sold=Sum("quantity"),
-                total_revenue=Sum(
-                    F("quantity") * Coalesce(F("price"), Value(Decimal("0")))
-                ),
+                total_revenue=Sum("revenue"),
             )
             .order_by("-total_revenue", "-total_quantity_sold")[:limit]
         )
@@ -806,6 +701,9 @@ class HomeStatsViewSet(GenericViewSet):
         business, branch = self._get_business_and_branch()
 
         base_filter = Q(business=business)
+        # Which slice of the business the caller sees; part of the stats
+        # cache key.
+        scope = "full"
 
         if branch:
             # If branch is specified, filter by branch
@@ -816,6 +714,12 @@ class HomeStatsViewSet(GenericViewSet):
                 base_filter = Q(branch=branch)
             else:
                 base_filter = Q(pk__in=[])  # No access
+                scope = "none"
+
+        # DailySalesRollup shares the business/branch columns, so the same
+        # filter scopes it. It has no employee dimension: employee-scoped
+        # stats below fall back to the raw order tables.
+        self._rollup_filter = base_filter
 
         # Owners, business admins, and branch managers see business/branch-
         # wide stats; plain employees (role_name == "employee") only see
@@ -824,15 +728,20 @@ class HomeStatsViewSet(GenericViewSet):
         # can_view_order_branch for their day-to-day work.
         employee = resolve_employee(self.request.user, business)
         if not has_full_report_access(self.request.user, business, employee=employee):
+            self._rollup_filter = None
             if employee:
                 base_filter &= Q(employee=employee)
+                if scope == "full":
+                    scope = f"employee:{employee.pk}"
             else:
                 base_filter = Q(pk__in=[])
+                scope = "none"
 
         # Store for use in other methods
         self._current_business = business
         self._current_branch = branch
         self._current_employee = employee
+        self._report_scope = scope
 
         return base_filter
 
@@ -874,31 +783,78 @@ class HomeStatsViewSet(GenericViewSet):
 
         return start, end
 
-    def _get_best_seller(
-        self, base_filter, range_type="today", start_date=None, end_date=None
-    ):
-        """Get best selling item by revenue within the given date range"""
-        start, end = self._get_date_range(range_type, start_date, end_date)
+    def _rollup_queryset(self, start, end):
+        """
+        DailySalesRollup rows for the current scope between ``start`` and
+        ``end``, or None when the scope is per-employee and callers must use
+        the raw order tables.
+        """
+        rollup_filter = getattr(self, "_rollup_filter", None)
+        if rollup_filter is None:
+            return None
+        return DailySalesRollup.objects.filter(
+            rollup_filter,
+            date__gte=local_date(start),
+            date__lte=local_date(end),
+        )
 
-        # Get completed orders within the date range
+    def _daily_sales_queryset(self, base_filter, start, end):
+        """Completed sales per local date as ``date``/``amount`` rows."""
+        rollup = self._rollup_queryset(start, end)
+        if rollup is not None:
+            return rollup.values("date").annotate(amount=Sum("revenue")).order_by()
+
+        from django.db.models.functions import TruncDate
+
+        # Line revenue, like the rollup, so employee-scoped distributions
+        # agree with the business-wide ones for the same orders.
         completed_orders = Order.objects.filter(
             base_filter,
             status=Order.StatusChoices.COMPLETED,
             created_at__gte=start,
             created_at__lte=end,
         )
-
-        top_2 = list(
+        return (
             OrderItem.objects.filter(order__in=completed_orders)
-            .values("variant__item__id", "variant__item__name")
             .annotate(
-                total_sales=Sum(
-                    F("quantity") * Coalesce(F("price"), Value(Decimal("0")))
+                date=TruncDate(
+                    "order__created_at", tzinfo=timezone.get_current_timezone()
                 )
             )
-            .order_by("-total_sales")[:2]
+            .values("date")
+            .annotate(amount=line_revenue())
+            .order_by()
         )
 
+    def _get_best_seller(
+        self, base_filter, range_type="today", start_date=None, end_date=None
+    ):
+        """Get best selling item by revenue within the given date range"""
+        start, end = self._get_date_range(range_type, start_date, end_date)
+
+        rollup = self._rollup_queryset(start, end)
+        if rollup is not None:
+            top_2 = list(
+                rollup.values("variant__item__id", "variant__item__name")
+                .annotate(total_sales=Sum("revenue"))
+                .order_by("-total_sales")[:2]
+            )
+        else:
+            # Get completed orders within the date range
+            completed_orders = Order.objects.filter(
+                base_filter,
+                status=Order.StatusChoices.COMPLETED,
+                created_at__gte=start,
+                created_at__lte=end,
+            )
+
+            top_2 = list(
+                OrderItem.objects.filter(order__in=completed_orders)
+                .values("variant__item__id", "variant__item__name")
+                .annotate(total_sales=line_revenue())
+                .order_by("-total_sales")[:2]
+            )
+
         if not top_2:
             return {
                 "item_id": None,
@@ -930,151 +886,64 @@ class HomeStatsViewSet(GenericViewSet):
             "progress_percent": progress_percent,
         }
 
+    DAY_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    MONTH_LABELS = [
+        "Jan",
+        "Feb",
+        "Mar",
+        "Apr",
+        "May",
+        "Jun",
+        "Jul",
+        "Aug",
+        "Sep",
+        "Oct",
+        "Nov",
+        "Dec",
+    ]
+
+    def _bucket_label(self, range_type, plan, day):
+        if plan.granularity == MONTH:
+            label = self.MONTH_LABELS[day.month - 1]
+            return label if range_type == "this_year" else f"{label} {day.year}"
+        if plan.granularity == DAY and range_type == "this_week":
+            return self.DAY_LABELS[day.weekday()]
+        if plan.granularity == DAY and range_type == "this_month":
+            return day.strftime("%d")
+        return day.strftime("%m/%d")
+
     def _get_sales_distribution(
         self, base_filter, range_type, start_date=None, end_date=None
     ):
-        """Get sales distribution by date"""
+        """
+        Get sales distribution by date as a dense series: one point per
+        local day, week or month bucket, empty buckets included.
+        """
         start, end = self._get_date_range(range_type, start_date, end_date)
-
-        completed_orders = Order.objects.filter(
-            base_filter,
-            status=Order.StatusChoices.COMPLETED,
-            created_at__gte=start,
-            created_at__lte=end,
+        first, last = local_date(start), local_date(end)
+        if last < first:
+            raise ValidationError({"detail": "end_date must not be before start_date"})
+
+        # Preset ranges keep their fixed granularity; custom ranges pick one
+        # from their length and are downsampled past MAX_BUCKETS points.
+        granularity = {
+            "this_week": DAY,
+            "this_month": DAY,
+            "this_year": MONTH,
+        }.get(range_type)
+        plan = plan_buckets(first, last, granularity)
+        totals = bucket_totals(
+            self._daily_sales_queryset(base_filter, start, end), plan
         )
 
-        if range_type == "this_week":
-            # Group by day of week
-            from django.db.models.functions import TruncDate
-
-            sales_by_day = (
-                completed_orders.annotate(date=TruncDate("created_at"))
-                .values("date")
-                .annotate(total=Sum("total_payable"))
-                .order_by("date")
-            )
-
-            # Convert to dictionary for easy lookup
-            sales_dict = {item["date"]: float(item["total"]) for item in sales_by_day}
-
-            # Map to day labels
-            day_labels = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-            data = []
-
-            # Get all days in the week
-            current = start
-            while current <= end:
-                weekday = current.weekday()  # 0=Monday, 6=Sunday
-                date_key = current.date()
-                data.append(
-                    {"label": day_labels[weekday], "value": sales_dict.get(date_key, 0)}
-                )
-                current += timedelta(days=1)
-
-            return {"range": range_type, "data": data}
-        elif range_type == "this_month":
-            # Group by day
-            from django.db.models.functions import TruncDate
-
-            sales_by_day = (
-                completed_orders.annotate(date=TruncDate("created_at"))
-                .values("date")
-                .annotate(total=Sum("total_payable"))
-                .order_by("date")
-            )
-
-            # Convert to dictionary for easy lookup
-            sales_dict = {item["date"]: float(item["total"]) for item in sales_by_day}
-
-            data = []
-            current = start
-            while current <= end:
-                date_key = current.date()
-                data.append(
-                    {
-                        "label": current.strftime("%d"),
-                        "value": sales_dict.get(date_key, 0),
-                    }
-                )
-                current += timedelta(days=1)
-
-            return {"range": range_type, "data": data}
-        elif range_type == "this_year":
-            # Group by month
-            from django.db.models.functions import TruncMonth
-
-            sales_by_month = (
-                completed_orders.annotate(month=TruncMonth("created_at"))
-                .values("month")
-                .annotate(total=Sum("total_payable"))
-                .order_by("month")
-            )
-
-            # Convert to dictionary for easy lookup
-            sales_dict = {}
-            for item in sales_by_month:
-                month_key = (item["month"].year, item["month"].month)
-                sales_dict[month_key] = float(item["total"])
-
-            month_labels = [
-                "Jan",
-                "Feb",
-                "Mar",
-                "Apr",
-                "May",
-                "Jun",
-                "Jul",
-                "Aug",
-                "Sep",
-                "Oct",
-                "Nov",
-                "Dec",
-            ]
-            data = []
-
-            current = start
-            while current <= end:
-                month_key = (current.year, current.month)
-                data.append(
-                    {
-                        "label": month_labels[current.month - 1],
-                        "value": sales_dict.get(month_key, 0),
-                    }
-                )
-                # Move to next month
-                if current.month == 12:
-                    current = current.replace(year=current.year + 1, month=1)
-                else:
-                    current = current.replace(month=current.month + 1)
-
-            return {"range": range_type, "data": data}
-        else:  # custom_range
-            # Group by day for custom range
-            from django.db.models.functions import TruncDate
-
-            sales_by_day = (
-                completed_orders.annotate(date=TruncDate("created_at"))
-                .values("date")
-                .annotate(total=Sum("total_payable"))
-                .order_by("date")
-            )
-
-            # Convert to dictionary for easy lookup
-            sales_dict = {item["date"]: float(item["total"]) for item in sales_by_day}
-
-            data = []
-            current = start
-            while current <= end:
-                date_key = current.date()
-                data.append(
-                    {
-                        "label": current.strftime("%m/%d"),
-                        "value": sales_dict.get(date_key, 0),
-                    }
-                )
-                current += timedelta(days=1)
-
-            return {"range": range_type, "data": data}
+        return {
+            "range": range_type,
+            "granularity": plan.granularity,
+            "data": [
+                {"label": self._bucket_label(range_type, plan, day), "value": total}
+                for day, total in zip(plan.starts, totals)
+            ],
+        }
 
     def _get_summary(self, base_filter, range_type, start_date=None, end_date=None):
         """Get summary statistics"""
@@ -1341,31 +1210,35 @@ class HomeStatsViewSet(GenericViewSet):
         start_date = request.query_params.get("start_date")
         end_date = request.query_params.get("end_date")
 
-        # Get best seller
-        best_seller = self._get_best_seller(
-            base_filter, summary_range, start_date, end_date
-        )
-
-        # Get sales distribution
-        try:
-            sales_distribution = self._get_sales_distribution(
-                base_filter, sales_distribution_range, start_date, end_date
-            )
-        except ValidationError as e:
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        def compute():
+            return {
+                "best_seller": self._get_best_seller(
+                    base_filter, summary_range, start_date, end_date
+                ),
+                "sales_distribution": self._get_sales_distribution(
+                    base_filter, sales_distribution_range, start_date, end_date
+                ),
+                "summary": self._get_summary(
+                    base_filter, summary_range, start_date, end_date
+                ),
+            }
 
-        # Get summary
+        # Dashboards poll this endpoint; serve it from the response cache,
+        # invalidated by sales, returns, transactions and stock changes.
+        business_id = self._current_business.pk
+        branch_id = self._current_branch.pk if self._current_branch else None
+        key = home_stats_key(
+            business_id,
+            branch_id,
+            sales_distribution_range,
+            summary_range,
+            start_date,
+            end_date,
+            self._report_scope,
+        )
         try:
-            summary = self._get_summary(
-                base_filter, summary_range, start_date, end_date
-            )
+            data = cached_home_stats(key, business_id, branch_id, compute)
         except ValidationError as e:
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(
-            {
-                "best_seller": best_seller,
-                "sales_distribution": sales_distribution,
-                "summary": summary,
-            }
-        )
+        return Response(data)